@@ -1,6 +1,132 @@
 from django.contrib import admin
+from django.utils import timezone
 
-from social.models import Profile, Post
+from social.deletion import request_deletion
+from social.models import (
+    City,
+    Country,
+    CountryAlias,
+    Profile,
+    Post,
+    Follow,
+    Job,
+    ProfileDeletion,
+)
+from social_media_api.pagination import EstimatedCountPaginator
 
-admin.site.register(Profile)
-admin.site.register(Post)
+
+class LargeTableAdminMixin:
+    """Changelist settings for tables too large to count on every page.
+
+    Searches use prefix lookups, which can be served by a
+    varchar_pattern_ops index instead of scanning the table."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class SoftDeleteProfileMixin:
+    """Deletes profiles in the background instead of in the request"""
+
+    delete_user = False
+
+    def get_profile(self, obj):
+        """Profile to delete with obj, None deletes obj right away"""
+        return obj
+
+    def get_deleted_objects(self, objs, request):
+        # listing the whole cascade is as slow as deleting it
+        deleted_objects = [str(obj) for obj in objs]
+        model_count = {self.model._meta.verbose_name_plural: len(objs)}
+        return deleted_objects, model_count, set(), []
+
+    def delete_model(self, request, obj):
+        profile = self.get_profile(obj)
+        if profile is None:
+            super().delete_model(request, obj)
+        else:
+            request_deletion(profile, delete_user=self.delete_user)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.delete_model(request, obj)
+
+
+@admin.register(Profile)
+class ProfileAdmin(
+    LargeTableAdminMixin, SoftDeleteProfileMixin, admin.ModelAdmin
+):
+    list_display = ("full_name", "country", "city", "deleted_at")
+    search_fields = ("user__email__startswith", "full_name__startswith")
+    list_select_related = ("country", "city")
+    raw_id_fields = ("user",)
+    autocomplete_fields = ("country", "city")
+
+
+class CountryAliasInline(admin.TabularInline):
+    model = CountryAlias
+    extra = 1
+
+
+@admin.register(Country)
+class CountryAdmin(admin.ModelAdmin):
+    list_display = ("name", "profile_count")
+    search_fields = ("key__startswith",)
+    readonly_fields = ("key", "profile_count")
+    inlines = (CountryAliasInline,)
+
+
+@admin.register(City)
+class CityAdmin(admin.ModelAdmin):
+    list_display = ("name", "country", "profile_count")
+    list_select_related = ("country",)
+    search_fields = ("key__startswith",)
+    readonly_fields = ("key", "profile_count")
+    autocomplete_fields = ("country",)
+
+
+@admin.register(Post)
+class PostAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("title", "profile", "created_at", "published")
+    list_select_related = ("profile",)
+    search_fields = ("title__startswith",)
+    raw_id_fields = ("profile",)
+
+
+@admin.register(Follow)
+class FollowAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("follower", "following", "created_at")
+    list_select_related = ("follower", "following")
+    raw_id_fields = ("follower", "following")
+
+
+@admin.register(ProfileDeletion)
+class ProfileDeletionAdmin(admin.ModelAdmin):
+    list_display = (
+        "profile_id",
+        "phase",
+        "deleted_rows",
+        "deleted_files",
+        "requested_at",
+        "finished_at",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("name", "state", "priority", "attempts", "run_at")
+    list_filter = ("state", "name")
+    readonly_fields = ("attempts", "started_at", "last_error", "created_at")
+    actions = ("retry",)
+
+    @admin.action(description="Retry selected jobs")
+    def retry(self, request, queryset):
+        queryset.exclude(state=Job.RUNNING).update(
+            state=Job.QUEUED, attempts=0, run_at=timezone.now()
+        )
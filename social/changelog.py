@@ -0,0 +1,150 @@
+"""Change log for incremental sync of offline clients.
+
+Every create, update and delete of a post, follow or profile appends a
+ChangeLogEntry in the transaction of the write. Clients page through
+the entries relevant to them with an opaque cursor and fetch the
+changed objects with the ?ids= multi-get, instead of refetching whole
+lists, and see deletions they couldn't notice otherwise.
+
+Ids are handed out before commit, so a transaction can commit an entry
+below a cursor already given out. Entries younger than
+SYNC_SETTLE_SECONDS are held back to give such transactions time to
+commit. compact_change_log keeps only the newest entry of each object
+and drops entries older than SYNC_RETENTION; cursors older than that
+ask the client to reset.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from social.models import ChangeLogEntry, Follow
+from social.sharding import subquery
+
+SYNC_PAGE_SIZE = 100
+MAX_SYNC_PAGE_SIZE = 500
+SYNC_RETENTION = timedelta(days=30)
+COMPACTION_BATCH_SIZE = 1000
+
+
+def log_change(model: str, obj, action: str) -> None:
+    ChangeLogEntry.objects.create(**change_fields(model, obj), action=action)
+
+
+def log_changes(model: str, objs, action: str) -> None:
+    ChangeLogEntry.objects.bulk_create(
+        ChangeLogEntry(**change_fields(model, obj), action=action)
+        for obj in objs
+    )
+
+
+def change_fields(model: str, obj) -> dict:
+    if model == "post":
+        return {
+            "model": model,
+            "object_id": obj.pk,
+            "owner_id": obj.profile_id,
+        }
+    if model == "follow":
+        return {
+            "model": model,
+            "object_id": obj.pk,
+            "owner_id": obj.follower_id,
+            "target_id": obj.following_id,
+        }
+    return {"model": model, "object_id": obj.pk, "owner_id": obj.pk}
+
+
+def encode_cursor(entry_id: int) -> str:
+    """Cursor after entry_id, stamped with the time it was issued"""
+    return f"{entry_id}-{int(timezone.now().timestamp())}"
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """(entry id, issue timestamp) of a cursor"""
+    try:
+        entry_id, issued = (int(part) for part in cursor.split("-"))
+    except ValueError:
+        raise ValidationError({"since": "Invalid cursor"})
+    return entry_id, issued
+
+
+def settled_changes():
+    """Entries old enough for every earlier transaction to have committed"""
+    settled = timezone.now() - timedelta(
+        seconds=getattr(settings, "SYNC_SETTLE_SECONDS", 0)
+    )
+    return ChangeLogEntry.objects.filter(created_at__lte=settled)
+
+
+def head_cursor() -> str:
+    """Cursor to sync from after loading the current state in full"""
+    last = settled_changes().order_by("-id").values("id").first()
+    return encode_cursor(last["id"] if last else 0)
+
+
+def relevant_changes(profile):
+    """Entries about the profile's own data, its follows both ways and
+    the posts and profiles of the profiles it follows"""
+    followed = subquery(
+        Follow.objects.filter(follower=profile).values_list(
+            "following", flat=True
+        )
+    )
+    return settled_changes().filter(
+        Q(owner_id=profile.pk)
+        | Q(target_id=profile.pk)
+        | (Q(owner_id__in=followed) & ~Q(model="follow"))
+    )
+
+
+def changes_since(profile, cursor: str, limit: int = SYNC_PAGE_SIZE):
+    """One page of changes after the cursor.
+
+    Returns (entries, next cursor, has_more), or None when the cursor
+    is older than the retention and the client has to reset."""
+    since, issued = decode_cursor(cursor)
+    if issued < (timezone.now() - SYNC_RETENTION).timestamp():
+        return None
+
+    entries = list(
+        relevant_changes(profile)
+        .filter(id__gt=since)
+        .order_by("id")[: limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    last = entries[-1].id if entries else since
+    return entries, encode_cursor(last), has_more
+
+
+def compact(batch_size: int = COMPACTION_BATCH_SIZE) -> int:
+    """Delete one batch of expired or superseded entries, returns their
+    number. A client past an entry only needs the newest one of its
+    object, which the compaction keeps."""
+    expired = ChangeLogEntry.objects.filter(
+        created_at__lt=timezone.now() - SYNC_RETENTION
+    )
+    newer = ChangeLogEntry.objects.filter(
+        model=OuterRef("model"),
+        object_id=OuterRef("object_id"),
+        id__gt=OuterRef("id"),
+    )
+    superseded = ChangeLogEntry.objects.filter(Exists(newer))
+
+    deleted = 0
+    for queryset in (expired, superseded):
+        pks = list(
+            queryset.order_by("id").values_list("id", flat=True)[
+                : batch_size - deleted
+            ]
+        )
+        ChangeLogEntry.objects.filter(pk__in=pks).delete()
+        deleted += len(pks)
+        if deleted >= batch_size:
+            break
+    return deleted
@@ -0,0 +1,89 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from social import ranking
+from social.counters import comment_counter
+from social.models import Comment, Post, Profile
+
+PATH_SEGMENT_LENGTH = 12
+MAX_DEPTH = Comment._meta.get_field("path").max_length // PATH_SEGMENT_LENGTH
+DEFAULT_THREAD_DEPTH = 3
+
+# sorts after every hex digit, closes the path range of a subtree
+PATH_RANGE_END = "g"
+
+
+class CommentDepthError(ValueError):
+    pass
+
+
+@transaction.atomic
+def create_comment(
+    post: Post, profile: Profile, content: str, parent: Comment = None
+) -> Comment:
+    depth = parent.depth + 1 if parent else 0
+    if depth >= MAX_DEPTH:
+        raise CommentDepthError(f"Replies can't be nested over {MAX_DEPTH}")
+
+    comment = Comment.objects.create(
+        post=post, profile=profile, parent=parent, content=content, depth=depth
+    )
+    parent_path = parent.path if parent else ""
+    comment.path = parent_path + format(comment.pk, f"0{PATH_SEGMENT_LENGTH}x")
+    Comment.objects.filter(pk=comment.pk).update(path=comment.path)
+
+    if parent:
+        Comment.objects.filter(pk=parent.pk).update(
+            reply_count=F("reply_count") + 1
+        )
+
+    comment_counter.add(post.pk)
+    ranking.record_interaction(profile.pk, post.profile_id)
+    return comment
+
+
+@transaction.atomic
+def delete_comment(comment: Comment) -> None:
+    """Delete a comment with all replies below it"""
+    _, deleted = Comment.objects.filter(
+        post=comment.post_id,
+        path__gte=comment.path,
+        path__lt=comment.path + PATH_RANGE_END,
+    ).delete()
+
+    if comment.parent_id:
+        Comment.objects.filter(pk=comment.parent_id).update(
+            reply_count=F("reply_count") - 1
+        )
+
+    comment_counter.add(comment.post_id, -deleted.get("social.Comment", 0))
+
+
+def load_replies(roots: list, depth: int) -> dict:
+    """Map comment id to its replies down to `depth` levels below roots.
+
+    Roots are consecutive in path order, so all their subtrees are read
+    with one range query over the (post, path) index."""
+    if not roots or depth <= 0:
+        return {}
+
+    replies = (
+        Comment.objects.visible()
+        .filter(
+            post=roots[0].post_id,
+            path__gt=roots[0].path,
+            path__lt=roots[-1].path + PATH_RANGE_END,
+            depth__gt=roots[0].depth,
+            depth__lte=roots[0].depth + depth,
+        )
+        .select_related("profile")
+        .order_by("path")
+    )
+
+    children = defaultdict(list)
+    for reply in replies:
+        children[reply.parent_id].append(reply)
+
+    return children
@@ -0,0 +1,174 @@
+import abc
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.db.models import Case, F, IntegerField, Value, When
+
+from social import ranking
+from social.models import City, Country, Post, Profile
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBuffer(abc.ABC):
+    """Collects writes in memory and applies them in batches.
+
+    A background thread flushes pending items every
+    COUNTER_FLUSH_INTERVAL seconds, an interval of 0 writes through on
+    every event. Subclasses define how items merge and get written."""
+
+    name = "write buffer"
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._worker = None
+        self._stopped = None
+        self._database = None
+
+    def merge(self, current, value):
+        return current + value
+
+    @abc.abstractmethod
+    def write(self, pending: dict) -> None:
+        """Apply a batch of merged items"""
+
+    def add(self, key, value=1) -> None:
+        with self._lock:
+            self._put(key, value)
+
+        interval = getattr(settings, "COUNTER_FLUSH_INTERVAL", 0)
+        if not interval:
+            self.flush()
+        elif self._worker is None:
+            self._start_worker(interval)
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return
+
+        try:
+            self.write(pending)
+        except Exception:
+            # keep the items for the next flush, ahead of newer ones
+            with self._lock:
+                newer, self._pending = self._pending, pending
+                for key, value in newer.items():
+                    self._put(key, value)
+            raise
+
+    def clear(self) -> None:
+        """Drop pending items without writing them"""
+        with self._lock:
+            self._pending.clear()
+
+    def _put(self, key, value):
+        if key in self._pending:
+            value = self.merge(self._pending[key], value)
+        self._pending[key] = value
+
+    def stop(self) -> None:
+        """Stop the background thread, writing what it left pending"""
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is None:
+            return
+
+        self._stopped.set()
+        worker.join()
+        atexit.unregister(self._flush_at_exit)
+        self.flush()
+
+    def _start_worker(self, interval: float) -> None:
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._stopped = threading.Event()
+            self._database = current_database()
+            self._worker = threading.Thread(
+                target=self._run,
+                args=(interval, self._stopped),
+                name=f"{self.name} flusher",
+                daemon=True,
+            )
+            self._worker.start()
+        atexit.register(self._flush_at_exit)
+
+    def _run(self, interval: float, stopped: threading.Event) -> None:
+        while not stopped.wait(interval):
+            if current_database() != self._database:
+                # e.g. a test database, destroyed since
+                logger.warning(
+                    "Database changed, dropped pending %s", self.name
+                )
+                self.clear()
+                return
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush %s", self.name)
+            finally:
+                close_old_connections()
+
+    def _flush_at_exit(self) -> None:
+        if current_database() == self._database:
+            self.flush()
+
+
+def current_database():
+    """Name of the database writes go to, which tests swap"""
+    return connections[DEFAULT_DB_ALIAS].settings_dict["NAME"]
+
+
+class CounterBuffer(WriteBuffer):
+    """Buffers counter deltas per row and applies them with one UPDATE,
+    instead of an UPDATE per event on a hot row"""
+
+    def __init__(self, model, field: str, on_flush=None):
+        super().__init__()
+        self.model = model
+        self.field = field
+        self.on_flush = on_flush
+        self.name = f"{model.__name__}.{field}"
+
+    def write(self, pending: dict) -> None:
+        deltas = {pk: delta for pk, delta in pending.items() if delta}
+        if not deltas:
+            return
+
+        increment = Case(
+            *(When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        self.model.objects.filter(pk__in=deltas).update(
+            **{self.field: F(self.field) + increment}
+        )
+
+        if self.on_flush:
+            try:
+                self.on_flush(deltas)
+            except Exception:
+                # the counters are written, don't let a retry apply them twice
+                logger.exception("Failed to process flushed %s", self.name)
+
+
+like_counter = CounterBuffer(
+    Post, "like_count", on_flush=ranking.record_engagement_deltas
+)
+
+comment_counter = CounterBuffer(
+    Post, "comment_count", on_flush=ranking.record_engagement_deltas
+)
+
+follower_counter = CounterBuffer(Profile, "follower_count")
+
+country_counter = CounterBuffer(Country, "profile_count")
+
+city_counter = CounterBuffer(City, "profile_count")
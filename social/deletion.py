@@ -0,0 +1,223 @@
+"""Deletion of profiles in the background.
+
+Deleting a profile in one transaction cascades to all its posts, likes,
+comments, follows and feed items and holds the locks for as long as
+that takes. request_deletion() only hides the profile, then
+purge_deleted_profiles removes its data in bounded batches, each in a
+short transaction of its own.
+"""
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from social.changelog import log_change
+from social.comments import delete_comment
+from social.counters import like_counter
+from social.locations import count_location
+from social.models import (
+    Comment,
+    FeedItem,
+    Follow,
+    Like,
+    Notification,
+    Post,
+    Profile,
+    ProfileDeletion,
+)
+from social.sharding import subquery
+
+DELETION_BATCH_SIZE = 500
+
+
+def delete_batch(queryset, batch_size: int) -> int:
+    """Delete up to batch_size rows of a queryset, returns their number"""
+    pks = list(
+        queryset.order_by("pk").values_list("pk", flat=True)[:batch_size]
+    )
+    if pks:
+        queryset.model.objects.filter(pk__in=pks).delete()
+    return len(pks)
+
+
+def delete_files(names) -> None:
+    names = [name for name in names if name]
+
+    def delete():
+        for name in names:
+            default_storage.delete(name)
+
+    transaction.on_commit(delete)
+
+
+def purge_comments(profile: Profile, deletion, batch_size: int) -> int:
+    """Comments of the profile with their replies, keeping counts right"""
+    comments = list(
+        Comment.objects.filter(profile=profile).order_by("path")[:batch_size]
+    )
+    deleted_path = None
+    for comment in comments:
+        # already gone with the subtree of a previous comment
+        if deleted_path and comment.path.startswith(deleted_path):
+            continue
+        delete_comment(comment)
+        deleted_path = comment.path
+    return len(comments)
+
+
+def purge_likes(profile: Profile, deletion, batch_size: int) -> int:
+    likes = list(
+        Like.objects.filter(profile=profile)
+        .order_by("pk")
+        .values_list("pk", "post_id")[:batch_size]
+    )
+    Like.objects.filter(pk__in=[pk for pk, _ in likes]).delete()
+    for _, post_id in likes:
+        like_counter.add(post_id, -1)
+    return len(likes)
+
+
+def profile_post_ids(profile: Profile):
+    return subquery(
+        Post.objects.filter(profile=profile).values_list("pk", flat=True)
+    )
+
+
+def purge_post_comments(profile: Profile, deletion, batch_size: int) -> int:
+    return delete_batch(
+        Comment.objects.filter(post__in=profile_post_ids(profile)),
+        batch_size,
+    )
+
+
+def purge_post_likes(profile: Profile, deletion, batch_size: int) -> int:
+    return delete_batch(
+        Like.objects.filter(post__in=profile_post_ids(profile)), batch_size
+    )
+
+
+def purge_feed_items(profile: Profile, deletion, batch_size: int) -> int:
+    return delete_batch(
+        FeedItem.objects.filter(Q(profile=profile) | Q(author=profile)),
+        batch_size,
+    )
+
+
+def purge_follows(profile: Profile, deletion, batch_size: int) -> int:
+    return delete_batch(
+        Follow.objects.filter(Q(follower=profile) | Q(following=profile)),
+        batch_size,
+    )
+
+
+def purge_notifications(profile: Profile, deletion, batch_size: int) -> int:
+    return delete_batch(
+        Notification.objects.filter(recipient=profile), batch_size
+    )
+
+
+def purge_posts(profile: Profile, deletion, batch_size: int) -> int:
+    posts = list(
+        Post.objects.filter(profile=profile)
+        .order_by("pk")
+        .values_list("pk", "media")[:batch_size]
+    )
+    Post.objects.filter(
+        profile=profile, pk__in=[pk for pk, _ in posts]
+    ).delete()
+
+    media = [name for _, name in posts if name]
+    delete_files(media)
+    deletion.deleted_files += len(media)
+    return len(posts)
+
+
+def purge_profile(profile: Profile, deletion, batch_size: int) -> int:
+    user = profile.user
+    if profile.image:
+        delete_files([profile.image.name])
+        deletion.deleted_files += 1
+
+    profile.delete()
+    deletion.profile = None
+    if deletion.delete_user:
+        user.delete()
+
+    deletion.finished_at = timezone.now()
+    return 1
+
+
+# phases of a deletion, each runs until a batch comes back short
+PHASES = (
+    ("comments", purge_comments),
+    ("likes", purge_likes),
+    ("post_comments", purge_post_comments),
+    ("post_likes", purge_post_likes),
+    ("feed_items", purge_feed_items),
+    ("follows", purge_follows),
+    ("notifications", purge_notifications),
+    ("posts", purge_posts),
+    ("profile", purge_profile),
+)
+PHASE_NAMES = [name for name, _ in PHASES]
+
+
+@transaction.atomic
+def request_deletion(profile: Profile, delete_user: bool = False):
+    """Hide the profile now and queue its data for deletion"""
+    now = timezone.now()
+    hidden = Profile.objects.filter(
+        pk=profile.pk, deleted_at__isnull=True
+    ).update(deleted_at=now)
+    if hidden:
+        profile.deleted_at = now
+        count_location(profile.country_id, profile.city_id, delta=-1)
+        log_change("profile", profile, "delete")
+
+    if delete_user:
+        type(profile.user).objects.filter(pk=profile.user_id).update(
+            is_active=False
+        )
+
+    deletion, created = ProfileDeletion.objects.get_or_create(
+        profile=profile,
+        defaults={"delete_user": delete_user, "phase": PHASE_NAMES[0]},
+    )
+    if not created and delete_user and not deletion.delete_user:
+        deletion.delete_user = True
+        deletion.save(update_fields=["delete_user"])
+    return deletion
+
+
+def purge_next_batch(batch_size: int = DELETION_BATCH_SIZE) -> bool:
+    """Run one batch of a pending deletion, False when none is left.
+
+    Deletions are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so
+    several purgers can work on different profiles side by side."""
+    with transaction.atomic():
+        deletion = (
+            ProfileDeletion.objects.filter(finished_at__isnull=True)
+            .select_for_update(skip_locked=True, of=("self",))
+            .select_related("profile__user")
+            .first()
+        )
+        if deletion is None:
+            return False
+
+        if deletion.profile is None:
+            # deleted some other way, its data went with it
+            deletion.finished_at = timezone.now()
+            deletion.save(update_fields=["finished_at"])
+            return True
+
+        name = deletion.phase
+        purge = dict(PHASES)[name]
+        deleted = purge(deletion.profile, deletion, batch_size)
+
+        deletion.deleted_rows += deleted
+        if deleted < batch_size and deletion.finished_at is None:
+            deletion.phase = PHASE_NAMES[PHASE_NAMES.index(name) + 1]
+        deletion.save()
+
+    return True
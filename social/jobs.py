@@ -0,0 +1,204 @@
+"""Job queue for slow work that doesn't have to finish in the request.
+
+enqueue() inserts a Job row in the transaction of the caller, so a job
+becomes visible to the workers when the data it works on commits and
+disappears with it on rollback. run_workers claims due jobs by priority
+with SELECT ... FOR UPDATE SKIP LOCKED, so workers never wait on each
+other, and runs each one outside the claiming transaction.
+
+A failing job is retried with exponential backoff until it runs out of
+attempts and stays in the table as failed. A job still running after
+JOB_TIMEOUT belonged to a worker that died and is requeued, so jobs
+have to be safe to run twice. With JOBS_RUN_INLINE set, enqueue() runs
+the job right away instead, for tests and setups without workers.
+"""
+
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+
+from social.models import Job
+
+logger = logging.getLogger(__name__)
+
+RETRY_BACKOFF = timedelta(seconds=10)
+MAX_RETRY_BACKOFF = timedelta(hours=1)
+JOB_TIMEOUT = timedelta(minutes=10)
+
+# job name -> function
+registry = {}
+
+
+def job(priority: int = 0, max_attempts: int = 5):
+    """Register a function as a job, called with the kwargs given to
+    enqueue(), which have to be JSON serializable"""
+
+    def register(func):
+        func.job_name = f"{func.__module__}.{func.__name__}"
+        func.job_priority = priority
+        func.job_max_attempts = max_attempts
+        registry[func.job_name] = func
+        return func
+
+    return register
+
+
+def enqueue(func, *, priority: int = None, delay: timedelta = None, **kwargs):
+    """Queue a registered job, returns the Job or None if it ran inline"""
+    if getattr(settings, "JOBS_RUN_INLINE", False):
+        func(**kwargs)
+        return None
+
+    return Job.objects.create(
+        name=func.job_name,
+        kwargs=kwargs,
+        priority=func.job_priority if priority is None else priority,
+        max_attempts=func.job_max_attempts,
+        run_at=timezone.now() + (delay or timedelta()),
+    )
+
+
+def claim_next_job():
+    """Mark the most urgent due job as running and return it"""
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(state=Job.QUEUED, run_at__lte=now)
+            .order_by("-priority", "run_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.state = Job.RUNNING
+        job.started_at = now
+        job.attempts = F("attempts") + 1
+        job.save(update_fields=("state", "started_at", "attempts"))
+    job.refresh_from_db(fields=("attempts",))
+    return job
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return min(RETRY_BACKOFF * 2 ** (attempts - 1), MAX_RETRY_BACKOFF)
+
+
+def run_job(job: Job) -> bool:
+    """Run a claimed job, returns whether it succeeded"""
+    started = time.monotonic()
+    try:
+        func = registry.get(job.name)
+        if func is None:
+            raise LookupError(f"Unknown job {job.name}")
+        func(**job.kwargs)
+    except Exception:
+        fail_job(job, traceback.format_exc())
+        return False
+    else:
+        Job.objects.filter(pk=job.pk).delete()
+        return True
+    finally:
+        logger.info(
+            "Job %s #%s waited %.3fs, ran %.3fs",
+            job.name,
+            job.pk,
+            (job.started_at - job.run_at).total_seconds(),
+            time.monotonic() - started,
+        )
+
+
+def fail_job(job: Job, error: str) -> None:
+    if job.attempts >= job.max_attempts:
+        logger.error("Job %s #%s failed:\n%s", job.name, job.pk, error)
+        Job.objects.filter(pk=job.pk).update(
+            state=Job.FAILED, last_error=error
+        )
+    else:
+        Job.objects.filter(pk=job.pk).update(
+            state=Job.QUEUED,
+            run_at=timezone.now() + retry_delay(job.attempts),
+            last_error=error,
+        )
+
+
+def run_next_job() -> bool:
+    """Claim and run one job, returns False when none is due"""
+    job = claim_next_job()
+    if job is None:
+        return False
+    run_job(job)
+    return True
+
+
+def requeue_stale_jobs() -> int:
+    """Requeue jobs of workers that died while running them, returns
+    their number. Jobs out of attempts are failed instead."""
+    stale = Job.objects.filter(
+        state=Job.RUNNING, started_at__lt=timezone.now() - JOB_TIMEOUT
+    )
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        state=Job.FAILED, last_error="Worker stopped while running the job"
+    )
+    return stale.update(state=Job.QUEUED, run_at=timezone.now())
+
+
+def queue_metrics() -> list:
+    """Depth and latency of the queue per job name.
+
+    latency is how long the oldest due job has been waiting for a
+    worker, it grows when the workers fall behind."""
+    now = timezone.now()
+    due = Q(state=Job.QUEUED, run_at__lte=now)
+    rows = (
+        Job.objects.values("name")
+        .annotate(
+            queued=Count("pk", filter=due),
+            scheduled=Count("pk", filter=Q(state=Job.QUEUED, run_at__gt=now)),
+            running=Count("pk", filter=Q(state=Job.RUNNING)),
+            failed=Count("pk", filter=Q(state=Job.FAILED)),
+            oldest=Min("run_at", filter=due),
+        )
+        .order_by("name")
+    )
+    for row in rows:
+        oldest = row.pop("oldest")
+        row["latency"] = (now - oldest).total_seconds() if oldest else 0.0
+    return list(rows)
+
+
+METRICS = (
+    ("queued", "Jobs due and waiting for a worker"),
+    ("scheduled", "Jobs waiting for their run time or a retry"),
+    ("running", "Jobs being run"),
+    ("failed", "Jobs out of attempts"),
+    ("latency", "Seconds the oldest due job has been waiting"),
+)
+
+
+class MetricsRenderer(BaseRenderer):
+    """queue_metrics() rows in the Prometheus text format"""
+
+    media_type = "text/plain"
+    format = "prometheus"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, list):
+            # error responses
+            return "".join(f"# {value}\n" for value in data.values())
+
+        lines = []
+        for metric, description in METRICS:
+            lines.append(f"# HELP jobs_{metric} {description}")
+            lines.append(f"# TYPE jobs_{metric} gauge")
+            lines.extend(
+                f'jobs_{metric}{{name="{row["name"]}"}} {row[metric]}'
+                for row in data
+            )
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,350 @@
+"""Load testing by replaying a request mix against a running instance.
+
+Requests are sent at the target rate whether or not earlier ones have
+finished, and latency counts from the time a request was due, so a
+server falling behind shows up as growing latency rather than as a
+quietly lower request rate. Each client keeps one HTTP/1.1 connection
+open and sends the requests of one user in order.
+
+A recorded mix is a JSON lines file, one request per line:
+
+    {"op": "feed", "method": "GET", "path": "/api/social/posts/feed/",
+     "body": null, "user": 3}
+
+user picks the client, and with it the account, sending the request.
+Without a recording the mix is generated from operation weights.
+"""
+
+import asyncio
+import itertools
+import json
+import math
+import random
+import ssl
+import time
+from collections import Counter, defaultdict, namedtuple
+from urllib.parse import urlencode, urlsplit
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from social.models import Follow, Profile
+from social.search import profile_names
+
+LoadRequest = namedtuple("LoadRequest", "op method path body user")
+Sample = namedtuple("Sample", "op status latency")
+
+DEFAULT_MIX = {"feed": 50, "search": 25, "follow": 15, "post": 10}
+SEED_FOLLOWS = 5
+PERCENTILES = (50, 90, 99)
+
+
+def parse_mix(value: str) -> dict:
+    """Operation weights from "feed=50,post=10" """
+    mix = {}
+    for part in value.split(","):
+        op, _, weight = part.partition("=")
+        if op not in DEFAULT_MIX:
+            raise ValueError(f"Unknown operation {op}")
+        mix[op] = int(weight)
+    return mix
+
+
+def create_load_users(count: int) -> list:
+    """Access tokens of count load test accounts, created on first use.
+
+    Their follows are reset to each following the next SEED_FOLLOWS
+    accounts, which synthetic_requests() expects."""
+    users = []
+    for index in range(count):
+        user, created = get_user_model().objects.get_or_create(
+            email=f"loadtest_{index}@social.com",
+            defaults={"first_name": "Load", "last_name": f"User {index}"},
+        )
+        if created:
+            user.set_unusable_password()
+            user.save()
+            Profile.objects.create(user=user, **profile_names(user))
+        users.append(user)
+
+    profiles = [user.profile for user in users]
+    Follow.objects.filter(
+        follower__in=profiles, following__in=profiles
+    ).delete()
+    for index, profile in enumerate(profiles):
+        for target in seed_follows(index, count):
+            Follow.objects.create(follower=profile, following=profiles[target])
+
+    return [
+        (user.profile.pk, str(AccessToken.for_user(user))) for user in users
+    ]
+
+
+def seed_follows(index: int, count: int) -> list:
+    return [
+        (index + offset) % count
+        for offset in range(1, min(SEED_FOLLOWS, count - 1) + 1)
+    ]
+
+
+def synthetic_requests(mix: dict, profile_ids: list, seed=None):
+    """Endless requests with operations drawn by weight, users following
+    and unfollowing each other so every follow succeeds"""
+    rng = random.Random(seed)
+    ops, weights = zip(*mix.items())
+    count = len(profile_ids)
+    following = {
+        (index, target)
+        for index in range(count)
+        for target in seed_follows(index, count)
+    }
+
+    for number in itertools.count(1):
+        user = rng.randrange(count)
+        op = rng.choices(ops, weights)[0]
+        if op == "feed":
+            yield LoadRequest(
+                op, "GET", reverse("social:post-feed"), None, user
+            )
+        elif op == "search":
+            query = urlencode({"name": f"User {rng.randrange(count)}"})
+            yield LoadRequest(
+                op,
+                "GET",
+                f"{reverse('social:profile-list')}?{query}",
+                None,
+                user,
+            )
+        elif op == "post":
+            yield LoadRequest(
+                op,
+                "POST",
+                reverse("social:post-list"),
+                {"title": f"Load {number}", "content": "Load test #load"},
+                user,
+            )
+        else:
+            target = rng.choice([i for i in range(count) if i != user])
+            action = "unfollow" if (user, target) in following else "follow"
+            following ^= {(user, target)}
+            yield LoadRequest(
+                op,
+                "POST",
+                reverse(
+                    f"social:profile-{action}", args=[profile_ids[target]]
+                ),
+                None,
+                user,
+            )
+
+
+def recorded_requests(lines):
+    for line in lines:
+        if line.strip():
+            record = json.loads(line)
+            yield LoadRequest(
+                record.get("op") or f"{record['method']} {record['path']}",
+                record["method"],
+                record["path"],
+                record.get("body"),
+                record.get("user", 0),
+            )
+
+
+class Connection:
+    """Keep-alive HTTP/1.1 connection of one client"""
+
+    def __init__(self, url: str, token: str = None):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = (
+            ssl.create_default_context() if parts.scheme == "https" else None
+        )
+        self.token = token
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body=None) -> int:
+        """Send a request and read the whole response, returns its status"""
+        payload = b"" if body is None else json.dumps(body).encode()
+        headers = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            f"Content-Length: {len(payload)}",
+            "Content-Type: application/json",
+            "Accept: application/json",
+        ]
+        if self.token:
+            headers.append(f"Authorization: Bearer {self.token}")
+        message = ("\r\n".join(headers) + "\r\n\r\n").encode() + payload
+
+        reused = self.writer is not None
+        try:
+            return await self._send(message, method)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            if not reused:
+                raise
+        # the server closed the idle connection, try a new one once
+        return await self._send(message, method)
+
+    async def _send(self, message: bytes, method: str) -> int:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port, ssl=self.ssl
+            )
+        self.writer.write(message)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed")
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await self.reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+
+        if "content-length" in headers and method != "HEAD":
+            await self.reader.readexactly(int(headers["content-length"]))
+        elif method == "HEAD" or status in (204, 304) or status < 200:
+            pass
+        elif headers.get("transfer-encoding") == "chunked":
+            while size := int((await self.reader.readline()).strip(), 16):
+                await self.reader.readexactly(size + 2)
+            await self.reader.readline()
+        else:
+            await self.reader.read()
+            headers["connection"] = "close"
+
+        if headers.get("connection") == "close":
+            self.close()
+        return status
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def replay(
+    url: str, requests, tokens: list, rps: float, duration: float
+) -> list:
+    """Send requests at rps for up to duration seconds with a client per
+    token, returns a Sample per request. Failed connections have status
+    0."""
+    loop = asyncio.get_running_loop()
+    queues = [asyncio.Queue() for _ in tokens]
+    samples = []
+
+    async def client(queue, connection):
+        while (item := await queue.get()) is not None:
+            due, request = item
+            try:
+                status = await connection.request(
+                    request.method, request.path, request.body
+                )
+            except (OSError, ValueError, asyncio.IncompleteReadError):
+                connection.close()
+                status = 0
+            samples.append(Sample(request.op, status, loop.time() - due))
+        connection.close()
+
+    clients = [
+        asyncio.create_task(client(queue, Connection(url, token)))
+        for queue, token in zip(queues, tokens)
+    ]
+
+    start = loop.time()
+    for index, request in enumerate(requests):
+        due = start + index / rps
+        if due - start >= duration:
+            break
+        await asyncio.sleep(due - loop.time())
+        queues[request.user % len(queues)].put_nowait((due, request))
+
+    for queue in queues:
+        queue.put_nowait(None)
+    await asyncio.gather(*clients)
+    return samples
+
+
+def percentile(values: list, percent: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[max(math.ceil(percent / 100 * len(values)) - 1, 0)]
+
+
+def latency_summary(latencies: list) -> dict:
+    """Latency distribution in milliseconds"""
+    latencies = sorted(latency * 1000 for latency in latencies)
+    summary = {
+        "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+        **{
+            f"p{percent}": percentile(latencies, percent)
+            for percent in PERCENTILES
+        },
+        "max": latencies[-1] if latencies else 0.0,
+    }
+    return {name: round(value, 2) for name, value in summary.items()}
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    """Throughput, latency distribution and error rate, overall and per
+    operation. Statuses of 400 and up and failed connections count as
+    errors."""
+
+    def totals(group):
+        errors = sum(1 for sample in group if not 200 <= sample.status < 400)
+        return {
+            "requests": len(group),
+            "throughput": round(len(group) / elapsed, 2) if elapsed else 0.0,
+            "errors": errors,
+            "error_rate": round(errors / len(group), 4) if group else 0.0,
+            "latency": latency_summary([sample.latency for sample in group]),
+        }
+
+    by_op = defaultdict(list)
+    for sample in samples:
+        by_op[sample.op].append(sample)
+
+    return {
+        **totals(samples),
+        "elapsed": round(elapsed, 2),
+        "statuses": dict(
+            sorted(Counter(str(sample.status) for sample in samples).items())
+        ),
+        "operations": {
+            op: totals(group) for op, group in sorted(by_op.items())
+        },
+    }
+
+
+def compare(baseline: dict, results: dict) -> list:
+    """(scope, metric, baseline, current) rows of two runs' summaries"""
+    rows = []
+    scopes = [("all", baseline, results)] + [
+        (op, baseline["operations"][op], summary)
+        for op, summary in results["operations"].items()
+        if op in baseline["operations"]
+    ]
+    for scope, before, after in scopes:
+        rows.append(
+            (scope, "throughput", before["throughput"], after["throughput"])
+        )
+        rows.append(
+            (scope, "error_rate", before["error_rate"], after["error_rate"])
+        )
+        for name in ("p50", "p99"):
+            rows.append(
+                (scope, name, before["latency"][name], after["latency"][name])
+            )
+    return rows
+
+
+def run(url, requests, tokens, rps, duration) -> dict:
+    started = time.monotonic()
+    samples = asyncio.run(replay(url, requests, tokens, rps, duration))
+    return summarize(samples, time.monotonic() - started)
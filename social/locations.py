@@ -0,0 +1,120 @@
+"""Normalized profile locations and their facet counts.
+
+Countries and cities are lookup tables keyed by the normalized name,
+and aliases map other spellings ("US", "USA") to a country, so
+profiles are filtered by an indexed foreign key instead of icontains
+over free text. Every country and city keeps profile_count, the number
+of active profiles located there, adjusted through counter buffers as
+profiles are created, moved or deleted. Facets read these rows instead
+of grouping all profiles.
+
+Common countries and their aliases are seeded by migration 0013, any
+other spelling creates a country on first use. An alias added later
+for such a spelling merges its country into the aliased one.
+"""
+
+from django.db import transaction
+from django.db.models import F
+
+from social.changelog import log_changes
+from social.counters import city_counter, country_counter
+from social.models import City, Country, CountryAlias, Profile
+from social.search import normalize_name
+
+FACET_LIMIT = 20
+
+
+def clean_name(name: str) -> str:
+    return " ".join(name.split())
+
+
+def find_country(name: str):
+    """Country a name or one of its aliases refers to, None if unknown"""
+    key = normalize_name(name)
+    if not key:
+        return None
+
+    alias = (
+        CountryAlias.objects.filter(key=key).select_related("country").first()
+    )
+    if alias is not None:
+        return alias.country
+    return Country.objects.filter(key=key).first()
+
+
+def get_country(name: str):
+    """Country of the name, created on first use, None for a blank name"""
+    country = find_country(name)
+    if country is None and normalize_name(name):
+        country, _ = Country.objects.get_or_create(
+            key=normalize_name(name), defaults={"name": clean_name(name)}
+        )
+    return country
+
+
+def find_cities(name: str, country=None):
+    """Cities of that name, in any country unless one is given"""
+    cities = City.objects.filter(key=normalize_name(name))
+    if country is not None:
+        cities = cities.filter(country=country)
+    return cities
+
+
+def get_city(country, name: str):
+    """City of the name in the country, created on first use"""
+    key = normalize_name(name)
+    if country is None or not key:
+        return None
+
+    city, _ = City.objects.get_or_create(
+        country=country, key=key, defaults={"name": clean_name(name)}
+    )
+    return city
+
+
+def merge_country(country, duplicate) -> None:
+    """Move the profiles, cities, aliases and counts of duplicate, another
+    row of the same country, to country and delete it"""
+    country_counter.flush()
+    city_counter.flush()
+    with transaction.atomic():
+        duplicate = Country.objects.select_for_update().get(pk=duplicate.pk)
+        for city in duplicate.cities.select_for_update():
+            same = City.objects.filter(country=country, key=city.key).first()
+            if same is None:
+                City.objects.filter(pk=city.pk).update(country=country)
+                continue
+            Profile.objects.filter(city=city).update(city=same)
+            City.objects.filter(pk=same.pk).update(
+                profile_count=F("profile_count") + city.profile_count
+            )
+            city.delete()
+
+        profiles = list(Profile.objects.filter(country=duplicate).only("pk"))
+        Profile.objects.filter(country=duplicate).update(country=country)
+        CountryAlias.objects.filter(country=duplicate).update(country=country)
+        Country.objects.filter(pk=country.pk).update(
+            profile_count=F("profile_count") + duplicate.profile_count
+        )
+        duplicate.delete()
+        log_changes("profile", profiles, "update")
+
+
+def count_location(country_id, city_id, delta: int = 1) -> None:
+    if country_id:
+        country_counter.add(country_id, delta)
+    if city_id:
+        city_counter.add(city_id, delta)
+
+
+def country_facets(limit: int = FACET_LIMIT):
+    return Country.objects.filter(profile_count__gt=0).order_by(
+        "-profile_count", "name"
+    )[:limit]
+
+
+def city_facets(country=None, limit: int = FACET_LIMIT):
+    cities = City.objects.filter(profile_count__gt=0)
+    if country is not None:
+        cities = cities.filter(country=country)
+    return cities.order_by("-profile_count", "name")[:limit]
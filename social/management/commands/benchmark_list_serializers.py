@@ -0,0 +1,118 @@
+import time
+from contextlib import ExitStack
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from social.locations import get_city, get_country
+from social.models import Profile, Post
+from social.search import profile_names
+from social.sharding import shards
+from social.serializers import PostListSerializer, ProfileListSerializer
+
+
+class Command(BaseCommand):
+    """Compares list serializers with their .values() fast path.
+
+    Fixture rows are created inside transactions on every shard, all
+    rolled back."""
+
+    help = "Benchmark list serializers against the .values() fast path"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        context = {"request": Request(APIRequestFactory().get("/"))}
+
+        with ExitStack() as stack:
+            # posts are routed to their profile's shard
+            for alias in shards():
+                stack.enter_context(transaction.atomic(using=alias))
+            self._create_fixtures(options["rows"])
+
+            cases = (
+                (
+                    PostListSerializer,
+                    Post.objects.select_related("profile"),
+                ),
+                (
+                    ProfileListSerializer,
+                    Profile.objects.select_related("country", "city"),
+                ),
+            )
+            for serializer_class, queryset in cases:
+                self._compare(
+                    serializer_class, queryset, context, options["repeat"]
+                )
+
+            for alias in shards():
+                transaction.set_rollback(True, using=alias)
+
+    def _create_fixtures(self, rows):
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(
+                email=f"benchmark_{index}@social.com",
+                first_name=f"name_{index}",
+                last_name=f"surname_{index}",
+            )
+            for index in range(rows)
+        )
+        country = get_country("Ukraine")
+        city = get_city(country, "Kyiv")
+        profiles = Profile.objects.bulk_create(
+            Profile(
+                user=user,
+                country=country,
+                city=city,
+                **profile_names(user),
+            )
+            for user in users
+        )
+        Post.objects.bulk_create(
+            Post(profile=profile, title="Benchmark", content="Content")
+            for profile in profiles
+        )
+
+    def _compare(self, serializer_class, queryset, context, repeat):
+        def regular():
+            return serializer_class(
+                queryset.all(), many=True, context=context
+            ).data
+
+        def fast():
+            return serializer_class.serialize_values(queryset.all(), context)
+
+        renderer = JSONRenderer()
+        if renderer.render(regular()) != renderer.render(fast()):
+            self.stdout.write(
+                self.style.ERROR(
+                    f"{serializer_class.__name__}: output differs"
+                )
+            )
+            return
+
+        rows = queryset.count()
+        regular_time = self._best_of(regular, repeat)
+        fast_time = self._best_of(fast, repeat)
+
+        self.stdout.write(
+            f"{serializer_class.__name__}: {rows} rows, "
+            f"regular {rows / regular_time:,.0f} rows/s, "
+            f"fast {rows / fast_time:,.0f} rows/s "
+            f"({regular_time / fast_time:.1f}x)"
+        )
+
+    @staticmethod
+    def _best_of(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
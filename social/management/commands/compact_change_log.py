@@ -0,0 +1,42 @@
+import time
+
+from django.core.management import BaseCommand
+
+from social.changelog import COMPACTION_BATCH_SIZE, compact
+
+
+class Command(BaseCommand):
+    """Deletes expired and superseded change log entries in batches"""
+
+    help = "Compact the sync change log, once or continuously with --loop"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=COMPACTION_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and compact periodically",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=300,
+            help="Seconds to wait between runs in --loop mode",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = 0
+            while True:
+                batch = compact(options["batch_size"])
+                deleted += batch
+                if batch < options["batch_size"]:
+                    break
+            if deleted:
+                self.stdout.write(f"Deleted {deleted} change log entries")
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,131 @@
+import json
+from datetime import datetime, timezone
+
+from django.core.management import BaseCommand, CommandError
+
+from social.loadtest import (
+    DEFAULT_MIX,
+    compare,
+    create_load_users,
+    parse_mix,
+    recorded_requests,
+    run,
+    synthetic_requests,
+)
+
+
+class Command(BaseCommand):
+    """Replays a request mix against a running instance.
+
+    Load test accounts are created in the database of these settings
+    and get tokens signed with its SECRET_KEY, so the instance has to
+    share both."""
+
+    help = "Load test a running instance with a recorded or synthetic mix"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            default="http://localhost:8000",
+            help="Base URL of the instance",
+        )
+        parser.add_argument(
+            "--rps", type=float, default=50, help="Requests per second"
+        )
+        parser.add_argument(
+            "--duration", type=float, default=30, help="Seconds to run"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=20,
+            help="Number of clients, each with an account of its own",
+        )
+        parser.add_argument(
+            "--mix",
+            type=parse_mix,
+            default=DEFAULT_MIX,
+            help="Weights of the synthetic mix, e.g. feed=50,follow=10",
+        )
+        parser.add_argument(
+            "--replay", help="JSON lines file of recorded requests"
+        )
+        parser.add_argument("--seed", type=int, help="Seed of the mix")
+        parser.add_argument(
+            "--output", help="File to save the results to, as JSON"
+        )
+        parser.add_argument(
+            "--compare", help="Results file of an earlier run to compare"
+        )
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 2:
+            raise CommandError("--concurrency must be at least 2")
+        if options["rps"] <= 0:
+            raise CommandError("--rps must be positive")
+
+        users = create_load_users(options["concurrency"])
+        profile_ids = [profile_id for profile_id, _ in users]
+        tokens = [token for _, token in users]
+
+        if options["replay"]:
+            with open(options["replay"]) as file:
+                lines = file.readlines()
+            requests = recorded_requests(lines)
+        else:
+            requests = synthetic_requests(
+                options["mix"], profile_ids, options["seed"]
+            )
+
+        started_at = datetime.now(timezone.utc).isoformat()
+        summary = run(
+            options["url"],
+            requests,
+            tokens,
+            options["rps"],
+            options["duration"],
+        )
+        results = {
+            "started_at": started_at,
+            "config": {
+                name: options[name]
+                for name in ("url", "rps", "duration", "concurrency", "seed")
+            },
+            "source": options["replay"] or options["mix"],
+            **summary,
+        }
+
+        self._report(results)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(results, file, indent=2)
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                self._report_comparison(compare(json.load(file), results))
+
+    def _report(self, results):
+        self.stdout.write(
+            f"{results['requests']} requests in {results['elapsed']}s: "
+            f"{results['throughput']} req/s, "
+            f"{results['error_rate']:.2%} errors, "
+            f"statuses {results['statuses']}"
+        )
+        rows = [("all", results)] + list(results["operations"].items())
+        for name, summary in rows:
+            latency = summary["latency"]
+            self.stdout.write(
+                f"  {name:<10} {summary['requests']:>7} req "
+                f"{summary['error_rate']:>7.2%} err  "
+                + "  ".join(
+                    f"{key} {value:.1f}ms" for key, value in latency.items()
+                )
+            )
+
+    def _report_comparison(self, rows):
+        self.stdout.write("Against the baseline:")
+        for scope, metric, before, after in rows:
+            change = f"{(after - before) / before:+.1%}" if before else "n/a"
+            self.stdout.write(
+                f"  {scope:<10} {metric:<10} {before:>10} -> "
+                f"{after:<10} {change}"
+            )
@@ -0,0 +1,96 @@
+import time
+
+from django.core.management import BaseCommand, CommandError
+
+from social.partitions import (
+    ARCHIVE_BATCH_SIZE,
+    DEFAULT_PARTITION,
+    PARTITIONS_AHEAD,
+    archive_partitions,
+    create_partitions,
+    has_stray_posts,
+    is_partitioned,
+)
+from social.sharding import is_sharded, shards
+
+
+class Command(BaseCommand):
+    """Creates upcoming post partitions and archives old ones"""
+
+    help = (
+        "Create future monthly post partitions and archive old ones, "
+        "once or continuously with --loop"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=PARTITIONS_AHEAD,
+            help="Months to create partitions for in advance",
+        )
+        parser.add_argument(
+            "--keep-months",
+            type=int,
+            help="Months of posts to keep, older partitions are archived",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            help="Directory of the archives, POST_ARCHIVE_DIR by default",
+        )
+        parser.add_argument(
+            "--detach-only",
+            action="store_true",
+            help="Keep old partitions as detached tables, not archives",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=ARCHIVE_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and manage partitions periodically",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=24 * 60 * 60,
+            help="Seconds to wait between runs in --loop mode",
+        )
+
+    def handle(self, *args, **options):
+        if not all(is_partitioned(alias) for alias in shards()):
+            raise CommandError("The post table isn't partitioned")
+        if options["keep_months"] is not None and options["keep_months"] < 1:
+            raise CommandError("--keep-months must be at least 1")
+
+        while True:
+            for alias in shards():
+                self.manage(alias, options)
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+    def manage(self, alias: str, options: dict) -> None:
+        where = f" on {alias}" if is_sharded() else ""
+
+        for name in create_partitions(options["ahead"], using=alias):
+            self.stdout.write(f"Created {name}{where}")
+
+        if options["keep_months"]:
+            archived = archive_partitions(
+                options["keep_months"],
+                using=alias,
+                directory=options["archive_dir"],
+                detach_only=options["detach_only"],
+                batch_size=options["batch_size"],
+            )
+            for name in archived:
+                self.stdout.write(f"Archived {name}{where}")
+
+        if has_stray_posts(alias):
+            self.stderr.write(
+                f"{DEFAULT_PARTITION}{where} has posts, move them before "
+                "creating partitions for their months"
+            )
@@ -0,0 +1,24 @@
+from django.core.management import BaseCommand, call_command
+from django.db import DEFAULT_DB_ALIAS
+
+from social.sharding import shards
+
+
+class Command(BaseCommand):
+    """Applies the migrations to the shards besides default, which
+    `manage.py migrate` already covers"""
+
+    help = "Migrate every shard database of SHARDS"
+
+    def handle(self, *args, **options):
+        for alias in shards():
+            if alias == DEFAULT_DB_ALIAS:
+                continue
+            self.stdout.write(f"Migrating {alias}")
+            call_command(
+                "migrate",
+                database=alias,
+                interactive=False,
+                verbosity=options["verbosity"],
+                stdout=self.stdout,
+            )
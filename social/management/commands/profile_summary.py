@@ -0,0 +1,68 @@
+import io
+import pstats
+from collections import defaultdict
+from pathlib import Path
+
+from django.core.management import BaseCommand, CommandError
+
+from social_media_api.profiling import (
+    DUMP_SUFFIX,
+    dump_view_name,
+    profiling_dir,
+)
+
+
+class Command(BaseCommand):
+    """Summarizes the request profiles of ProfilingMiddleware.
+
+    Dumps of the same view are added up, so the hottest functions show
+    over many requests instead of a single, possibly unusual one."""
+
+    help = "List request profiles and show their hottest functions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dir", help="Directory of the dumps, PROFILING_DIR by default"
+        )
+        parser.add_argument(
+            "--view",
+            help="Only dumps of this view, e.g. social:post-feed",
+        )
+        parser.add_argument(
+            "--sort",
+            choices=("cumulative", "tottime", "ncalls"),
+            default="cumulative",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=20, help="Number of functions"
+        )
+        parser.add_argument(
+            "--list",
+            action="store_true",
+            help="Only list the dumps per view",
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(options["dir"]) if options["dir"] else profiling_dir()
+        dumps = defaultdict(list)
+        for path in sorted(directory.glob(f"*{DUMP_SUFFIX}")):
+            dumps[dump_view_name(path)].append(path)
+
+        if options["view"]:
+            view = options["view"].replace(":", ".")
+            dumps = {view: dumps[view]} if view in dumps else {}
+        if not dumps:
+            raise CommandError(f"No profiles in {directory}")
+
+        for view, paths in sorted(dumps.items()):
+            self.stdout.write(f"{view}: {len(paths)} profiles")
+            if options["list"]:
+                for path in paths:
+                    self.stdout.write(f"  {path.name}")
+                continue
+
+            report = io.StringIO()
+            stats = pstats.Stats(*map(str, paths), stream=report)
+            stats.strip_dirs().sort_stats(options["sort"])
+            stats.print_stats(options["limit"])
+            self.stdout.write(report.getvalue())
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management import BaseCommand
+
+from social.scheduler import PUBLISH_BATCH_SIZE, publish_due_posts
+
+
+class Command(BaseCommand):
+    """Publishes scheduled posts whose publish_at has passed"""
+
+    help = "Publish due scheduled posts, once or continuously with --loop"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=PUBLISH_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and poll for due posts",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait between polls in --loop mode",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            published = self._publish_all(options["batch_size"])
+            if published:
+                self.stdout.write(f"Published {published} posts")
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+    @staticmethod
+    def _publish_all(batch_size):
+        total = 0
+        while True:
+            published = publish_due_posts(batch_size)
+            total += published
+            if published < batch_size:
+                return total
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management import BaseCommand
+
+from social.deletion import DELETION_BATCH_SIZE, purge_next_batch
+
+
+class Command(BaseCommand):
+    """Deletes the data of deleted profiles in batches"""
+
+    help = "Purge deleted profiles, once or continuously with --loop"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=DELETION_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and poll for deleted profiles",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait between polls in --loop mode",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            batches = 0
+            while purge_next_batch(options["batch_size"]):
+                batches += 1
+            if batches:
+                self.stdout.write(f"Purged {batches} batches")
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,26 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from social import ranking
+from social.models import FeedItem, Follow
+
+
+class Command(BaseCommand):
+    """Recomputes ranked feed items from follows and recent posts"""
+
+    help = "Rebuild FeedItem scores used by the ranked feed"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            FeedItem.objects.all().delete()
+            follows = Follow.objects.only(
+                "follower_id", "following_id", "interactions"
+            )
+            for follow in follows.iterator():
+                ranking.backfill_follow(follow)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Feed rebuilt: {FeedItem.objects.count()} items"
+            )
+        )
@@ -0,0 +1,74 @@
+from django.core.management import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Case, Count, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from social.models import Like, Post
+from social.sharding import shards
+
+RECONCILE_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    """Recounts Post.like_count from the Like table"""
+
+    help = "Fix like counters that drifted from the stored likes"
+
+    def handle(self, *args, **options):
+        updated = 0
+        for alias in shards():
+            if alias == DEFAULT_DB_ALIAS:
+                updated += self.reconcile_default()
+            else:
+                updated += self.reconcile_shard(alias)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Like counts fixed for {updated} posts")
+        )
+
+    def reconcile_default(self) -> int:
+        likes = (
+            Like.objects.filter(post=OuterRef("pk"))
+            .order_by()
+            .values("post")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        return (
+            Post.objects.using(DEFAULT_DB_ALIAS)
+            .exclude(like_count=Coalesce(Subquery(likes), 0))
+            .update(like_count=Coalesce(Subquery(likes), 0))
+        )
+
+    def reconcile_shard(self, alias: str) -> int:
+        """Posts of a shard, whose likes are on default, in batches"""
+        posts = Post.objects.using(alias).order_by("pk")
+        updated, last = 0, 0
+        while batch := dict(
+            posts.filter(pk__gt=last).values_list("pk", "like_count")[
+                :RECONCILE_BATCH_SIZE
+            ]
+        ):
+            counts = dict(
+                Like.objects.filter(post__in=batch)
+                .order_by()
+                .values("post")
+                .annotate(count=Count("id"))
+                .values_list("post", "count")
+            )
+            drifted = {
+                pk: counts.get(pk, 0)
+                for pk, like_count in batch.items()
+                if counts.get(pk, 0) != like_count
+            }
+            if drifted:
+                updated += posts.filter(pk__in=drifted).update(
+                    like_count=Case(
+                        *(
+                            When(pk=pk, then=Value(count))
+                            for pk, count in drifted.items()
+                        )
+                    )
+                )
+            last = max(batch)
+        return updated
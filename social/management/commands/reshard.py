@@ -0,0 +1,40 @@
+from django.core.management import BaseCommand
+
+from social.sharding import (
+    RESHARD_BATCH_SIZE,
+    move_misplaced,
+    sharded_models,
+    shards,
+    sync_id_sequences,
+)
+
+
+class Command(BaseCommand):
+    """Moves posts and follows to their shards after SHARDS grew.
+
+    Run it right after deploying the new shard list, the rows of the
+    profiles that moved are missing from their queries until then."""
+
+    help = "Move sharded rows to the shards their profiles map to"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=RESHARD_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the rows to move",
+        )
+
+    def handle(self, *args, **options):
+        verb = "Would move" if options["dry_run"] else "Moved"
+        for model in sharded_models():
+            name = model._meta.verbose_name_plural
+            for alias in shards():
+                moved = move_misplaced(
+                    model, alias, options["batch_size"], options["dry_run"]
+                )
+                self.stdout.write(f"{verb} {moved} {name} from {alias}")
+            if not options["dry_run"]:
+                sync_id_sequences(model)
@@ -0,0 +1,98 @@
+import multiprocessing
+import signal
+import time
+
+from django.core.management import BaseCommand
+from django.db import close_old_connections, connections
+
+from social.jobs import requeue_stale_jobs, run_next_job
+
+
+def work(interval: float) -> None:
+    """Worker process loop, stops after the current job on SIGTERM"""
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    # Ctrl-C reaches the whole process group, the parent stops us
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    while not stopping:
+        try:
+            ran = run_next_job()
+        finally:
+            close_old_connections()
+        if not ran:
+            time.sleep(interval)
+
+
+class Command(BaseCommand):
+    """Runs queued jobs in a pool of worker processes"""
+
+    help = "Run queued jobs with a pool of workers, or once with --once"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of worker processes",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1,
+            help="Seconds an idle worker waits before polling again",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the due jobs in this process and exit",
+        )
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            ran = 0
+            while run_next_job():
+                ran += 1
+            self.stdout.write(f"Ran {ran} jobs")
+            return
+
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+
+        # forked workers must not share the parent's connections
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        workers = []
+        try:
+            while not stopping:
+                # replace workers that crashed
+                workers = [worker for worker in workers if worker.is_alive()]
+                while len(workers) < options["workers"]:
+                    worker = context.Process(
+                        target=work, args=(options["interval"],), daemon=True
+                    )
+                    worker.start()
+                    workers.append(worker)
+
+                requeued = requeue_stale_jobs()
+                connections.close_all()
+                if requeued:
+                    self.stdout.write(f"Requeued {requeued} stale jobs")
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
@@ -0,0 +1,59 @@
+# Generated by Django 5.2 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0003_post"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="follow",
+            name="interactions",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="FeedItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feed_items",
+                        to="social.post",
+                    ),
+                ),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feed_items",
+                        to="social.profile",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["profile", "-score", "-id"],
+                        name="feed_item_ranking_idx",
+                    )
+                ],
+                "unique_together": {("profile", "post")},
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-19 09:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0004_feed_ranking"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="like_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="Like",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="likes",
+                        to="social.post",
+                    ),
+                ),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="likes",
+                        to="social.profile",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-created_at",),
+                "unique_together": {("profile", "post")},
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2 on 2026-10-19 09:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0005_like"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="comment_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="Comment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("path", models.CharField(blank=True, max_length=255)),
+                ("depth", models.PositiveSmallIntegerField(default=0)),
+                ("reply_count", models.PositiveIntegerField(default=0)),
+                ("content", models.TextField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "parent",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="replies",
+                        to="social.comment",
+                    ),
+                ),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="comments",
+                        to="social.post",
+                    ),
+                ),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="comments",
+                        to="social.profile",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("path",),
+                "indexes": [
+                    models.Index(fields=["post", "path"], name="comment_thread_idx")
+                ],
+            },
+        ),
+    ]
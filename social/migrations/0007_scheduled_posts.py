@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-19 09:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0006_comment"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="publish_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="published",
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("published", True)),
+                fields=["-created_at"],
+                name="post_published_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("published", False)),
+                fields=["publish_at"],
+                name="post_scheduled_idx",
+            ),
+        ),
+    ]
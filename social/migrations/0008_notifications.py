@@ -0,0 +1,71 @@
+# Generated by Django 5.2 on 2026-10-19 09:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0007_scheduled_posts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="unread_notifications",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="Notification",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "verb",
+                    models.CharField(
+                        choices=[("follow", "New follower"), ("post", "New post")],
+                        max_length=16,
+                    ),
+                ),
+                ("window_start", models.DateTimeField()),
+                ("event_count", models.PositiveIntegerField(default=0)),
+                ("read", models.BooleanField(default=False)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "last_actor",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="social.profile",
+                    ),
+                ),
+                (
+                    "recipient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="notifications",
+                        to="social.profile",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-updated_at",),
+                "indexes": [
+                    models.Index(
+                        fields=["recipient", "-updated_at"],
+                        name="notification_inbox_idx",
+                    )
+                ],
+                "unique_together": {("recipient", "verb", "window_start")},
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2 on 2026-10-19 09:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0008_notifications"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="ProfileDeletion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("delete_user", models.BooleanField(default=False)),
+                ("phase", models.CharField(max_length=32)),
+                ("deleted_rows", models.PositiveBigIntegerField(default=0)),
+                ("deleted_files", models.PositiveIntegerField(default=0)),
+                ("requested_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "profile",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="deletion",
+                        to="social.profile",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("requested_at",),
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-19 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0009_profile_deletion"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["title"],
+                name="post_title_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2 on 2026-10-19 09:37
+
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def normalize_name(name):
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    )
+    return " ".join(stripped.casefold().split())
+
+
+def fill_profiles(apps, schema_editor):
+    Profile = apps.get_model("social", "Profile")
+    Follow = apps.get_model("social", "Follow")
+    alias = schema_editor.connection.alias
+
+    profiles = (
+        Profile.objects.using(alias)
+        .select_related("user")
+        .only("id", "user__first_name", "user__last_name")
+    )
+    for profile in profiles.iterator():
+        profile.search_name = normalize_name(
+            f"{profile.user.first_name} {profile.user.last_name}"
+        )
+        profile.save(update_fields=["search_name"], using=alias)
+
+    followers = (
+        Follow.objects.filter(following=OuterRef("pk"))
+        .order_by()
+        .values("following")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Profile.objects.using(alias).update(
+        follower_count=Coalesce(Subquery(followers), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0010_prefix_search_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="follower_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="search_name",
+            field=models.CharField(blank=True, max_length=301),
+        ),
+        migrations.AddIndex(
+            model_name="profile",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["search_name"],
+                name="profile_search_name_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="profile",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["-follower_count"],
+                name="profile_popularity_idx",
+            ),
+        ),
+        migrations.RunPython(fill_profiles, migrations.RunPython.noop),
+    ]
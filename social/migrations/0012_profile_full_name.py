@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-19 09:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_full_names(apps, schema_editor):
+    Profile = apps.get_model("social", "Profile")
+    alias = schema_editor.connection.alias
+
+    profiles = (
+        Profile.objects.using(alias)
+        .select_related("user")
+        .only("id", "user__first_name", "user__last_name")
+    )
+    for profile in profiles.iterator():
+        profile.full_name = " ".join(
+            f"{profile.user.first_name} {profile.user.last_name}".split()
+        )
+        profile.save(update_fields=["full_name"], using=alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0011_profile_autocomplete"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="full_name",
+            field=models.CharField(blank=True, max_length=301),
+        ),
+        migrations.AddIndex(
+            model_name="profile",
+            index=models.Index(fields=["full_name"], name="profile_full_name_idx"),
+        ),
+        migrations.RunPython(fill_full_names, migrations.RunPython.noop),
+    ]
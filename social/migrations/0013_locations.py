@@ -0,0 +1,283 @@
+# Generated by Django 5.2 on 2026-10-19 09:46
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# canonical names of common countries
+COUNTRIES = [
+    "Afghanistan", "Albania", "Algeria", "Andorra", "Angola",
+    "Antigua and Barbuda", "Argentina", "Armenia", "Australia", "Austria",
+    "Azerbaijan", "Bahamas", "Bahrain", "Bangladesh", "Barbados", "Belarus",
+    "Belgium", "Belize", "Benin", "Bhutan", "Bolivia",
+    "Bosnia and Herzegovina", "Botswana", "Brazil", "Brunei", "Bulgaria",
+    "Burkina Faso", "Burundi", "Cabo Verde", "Cambodia", "Cameroon",
+    "Canada", "Central African Republic", "Chad", "Chile", "China",
+    "Colombia", "Comoros", "Congo", "Costa Rica", "Croatia", "Cuba",
+    "Cyprus", "Czechia", "Democratic Republic of the Congo", "Denmark",
+    "Djibouti", "Dominica", "Dominican Republic", "Ecuador", "Egypt",
+    "El Salvador", "Equatorial Guinea", "Eritrea", "Estonia", "Eswatini",
+    "Ethiopia", "Fiji", "Finland", "France", "Gabon", "Gambia", "Georgia",
+    "Germany", "Ghana", "Greece", "Grenada", "Guatemala", "Guinea",
+    "Guinea-Bissau", "Guyana", "Haiti", "Honduras", "Hong Kong", "Hungary",
+    "Iceland", "India", "Indonesia", "Iran", "Iraq", "Ireland", "Israel",
+    "Italy", "Ivory Coast", "Jamaica", "Japan", "Jordan", "Kazakhstan",
+    "Kenya", "Kiribati", "Kosovo", "Kuwait", "Kyrgyzstan", "Laos", "Latvia",
+    "Lebanon", "Lesotho", "Liberia", "Libya", "Liechtenstein", "Lithuania",
+    "Luxembourg", "Madagascar", "Malawi", "Malaysia", "Maldives", "Mali",
+    "Malta", "Marshall Islands", "Mauritania", "Mauritius", "Mexico",
+    "Micronesia", "Moldova", "Monaco", "Mongolia", "Montenegro", "Morocco",
+    "Mozambique", "Myanmar", "Namibia", "Nauru", "Nepal", "Netherlands",
+    "New Zealand", "Nicaragua", "Niger", "Nigeria", "North Korea",
+    "North Macedonia", "Norway", "Oman", "Pakistan", "Palau", "Palestine",
+    "Panama", "Papua New Guinea", "Paraguay", "Peru", "Philippines",
+    "Poland", "Portugal", "Qatar", "Romania", "Russia", "Rwanda",
+    "Saint Kitts and Nevis", "Saint Lucia",
+    "Saint Vincent and the Grenadines", "Samoa", "San Marino",
+    "Sao Tome and Principe", "Saudi Arabia", "Senegal", "Serbia",
+    "Seychelles", "Sierra Leone", "Singapore", "Slovakia", "Slovenia",
+    "Solomon Islands", "Somalia", "South Africa", "South Korea",
+    "South Sudan", "Spain", "Sri Lanka", "Sudan", "Suriname", "Sweden",
+    "Switzerland", "Syria", "Taiwan", "Tajikistan", "Tanzania", "Thailand",
+    "Timor-Leste", "Togo", "Tonga", "Trinidad and Tobago", "Tunisia",
+    "Turkey", "Turkmenistan", "Tuvalu", "Uganda", "Ukraine",
+    "United Arab Emirates", "United Kingdom", "United States", "Uruguay",
+    "Uzbekistan", "Vanuatu", "Vatican City", "Venezuela", "Vietnam",
+    "Yemen", "Zambia", "Zimbabwe",
+]
+
+# other spellings of them profiles use
+ALIASES = {
+    "Cabo Verde": ["Cape Verde"],
+    "Czechia": ["Czech Republic"],
+    "Democratic Republic of the Congo": ["DRC", "DR Congo"],
+    "Eswatini": ["Swaziland"],
+    "Germany": ["Deutschland"],
+    "Ivory Coast": ["Cote d'Ivoire"],
+    "Myanmar": ["Burma"],
+    "Netherlands": ["Holland", "The Netherlands"],
+    "North Macedonia": ["Macedonia"],
+    "Russia": ["Russian Federation"],
+    "South Korea": ["Korea", "Republic of Korea"],
+    "Spain": ["Espana"],
+    "Turkey": ["Turkiye"],
+    "Ukraine": ["Ukraina"],
+    "United Arab Emirates": ["UAE"],
+    "United Kingdom": [
+        "UK", "U.K.", "GB", "Great Britain", "Britain", "England",
+        "Scotland", "Wales", "Northern Ireland",
+    ],
+    "United States": [
+        "US", "U.S.", "USA", "U.S.A.", "America",
+        "United States of America",
+    ],
+    "Vatican City": ["Vatican", "Holy See"],
+    "Vietnam": ["Viet Nam"],
+}
+
+
+def normalize_name(name):
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+def seed_countries(apps, schema_editor):
+    Country = apps.get_model("social", "Country")
+    CountryAlias = apps.get_model("social", "CountryAlias")
+    alias = schema_editor.connection.alias
+
+    countries = {
+        name: Country(name=name, key=normalize_name(name))
+        for name in COUNTRIES
+    }
+    Country.objects.using(alias).bulk_create(countries.values())
+    CountryAlias.objects.using(alias).bulk_create(
+        CountryAlias(country=countries[name], key=normalize_name(spelling))
+        for name, spellings in ALIASES.items()
+        for spelling in spellings
+    )
+
+
+def fill_locations(apps, schema_editor):
+    Profile = apps.get_model("social", "Profile")
+    Country = apps.get_model("social", "Country")
+    City = apps.get_model("social", "City")
+    CountryAlias = apps.get_model("social", "CountryAlias")
+    alias = schema_editor.connection.alias
+    all_profiles = Profile.objects.using(alias)
+    all_countries = Country.objects.using(alias)
+    all_cities = City.objects.using(alias)
+
+    # profiles spelling a seeded country another way are filed under it
+    countries = {
+        row.key: row.country
+        for row in CountryAlias.objects.using(alias).select_related("country")
+    }
+    cities = {}
+    profiles = all_profiles.only("id", "country_name", "city_name")
+    for profile in profiles.iterator():
+        country_key = normalize_name(profile.country_name)
+        if not country_key:
+            continue
+        if country_key not in countries:
+            countries[country_key], _ = all_countries.get_or_create(
+                key=country_key,
+                defaults={"name": " ".join(profile.country_name.split())},
+            )
+        profile.country = countries[country_key]
+
+        city_key = normalize_name(profile.city_name)
+        if city_key:
+            if (country_key, city_key) not in cities:
+                cities[country_key, city_key], _ = all_cities.get_or_create(
+                    country=profile.country,
+                    key=city_key,
+                    defaults={"name": " ".join(profile.city_name.split())},
+                )
+            profile.city = cities[country_key, city_key]
+        profile.save(update_fields=["country", "city"], using=alias)
+
+    active = all_profiles.filter(deleted_at__isnull=True).order_by()
+    for rows, field in ((all_countries, "country"), (all_cities, "city")):
+        counts = (
+            active.filter(**{f"{field}__isnull": False})
+            .values(field)
+            .annotate(count=Count("id"))
+        )
+        for row in counts:
+            rows.filter(pk=row[field]).update(profile_count=row["count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0012_profile_full_name"),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name="profile", old_name="country", new_name="country_name"
+        ),
+        migrations.RenameField(
+            model_name="profile", old_name="city", new_name="city_name"
+        ),
+        migrations.CreateModel(
+            name="City",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255)),
+                ("key", models.CharField(max_length=255)),
+                ("profile_count", models.IntegerField(default=0)),
+            ],
+            options={
+                "verbose_name_plural": "cities",
+            },
+        ),
+        migrations.CreateModel(
+            name="Country",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255)),
+                ("key", models.CharField(max_length=255, unique=True)),
+                ("profile_count", models.IntegerField(default=0)),
+            ],
+            options={
+                "verbose_name_plural": "countries",
+            },
+        ),
+        migrations.AddField(
+            model_name="city",
+            name="country",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="cities",
+                to="social.country",
+            ),
+        ),
+        migrations.CreateModel(
+            name="CountryAlias",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=255, unique=True)),
+                (
+                    "country",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="aliases",
+                        to="social.country",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "country aliases",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="city",
+            index=models.Index(fields=["key"], name="city_key_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="city",
+            index=models.Index(
+                fields=["country", "-profile_count"], name="city_popularity_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="city",
+            constraint=models.UniqueConstraint(
+                fields=("country", "key"), name="unique_city_per_country"
+            ),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="country",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="profiles",
+                to="social.country",
+            ),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="city",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="profiles",
+                to="social.city",
+            ),
+        ),
+        migrations.RunPython(seed_countries, migrations.RunPython.noop),
+        migrations.RunPython(fill_locations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,15 @@
+# Generated by Django 5.2 on 2026-10-19 09:52
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0013_locations"),
+    ]
+
+    operations = [
+        migrations.RemoveField(model_name="profile", name="country_name"),
+        migrations.RemoveField(model_name="profile", name="city_name"),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2 on 2026-10-19 09:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0014_remove_profile_location_names"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeLogEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "model",
+                    models.CharField(
+                        choices=[
+                            ("post", "Post"),
+                            ("follow", "Follow"),
+                            ("profile", "Profile"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("create", "Create"),
+                            ("update", "Update"),
+                            ("delete", "Delete"),
+                        ],
+                        max_length=8,
+                    ),
+                ),
+                ("owner_id", models.BigIntegerField()),
+                ("target_id", models.BigIntegerField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name_plural": "change log entries",
+                "indexes": [
+                    models.Index(fields=["owner_id", "id"], name="changelog_owner_idx"),
+                    models.Index(
+                        condition=models.Q(("target_id__isnull", False)),
+                        fields=["target_id", "id"],
+                        name="changelog_target_idx",
+                    ),
+                    models.Index(
+                        fields=["model", "object_id", "id"], name="changelog_object_idx"
+                    ),
+                    models.Index(fields=["created_at"], name="changelog_created_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,151 @@
+# Generated by Django 5.2 on 2026-10-19 10:16
+
+import re
+from datetime import datetime, timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+PARTITIONS_AHEAD = 3
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def rebuild_posts(cursor, partitioned):
+    """Copy social_post into a new partitioned or plain table in its
+    place, with the same sequence, foreign keys and indexes"""
+    old = "social_post_plain" if partitioned else "social_post_partitioned"
+    cursor.execute(f"ALTER TABLE social_post RENAME TO {old}")
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE tablename = %s "
+        "AND indexname <> 'social_post_pkey'",
+        [old],
+    )
+    indexes = [
+        re.sub(rf" ON (ONLY )?(\S+\.)?{old} ", " ON social_post ", indexdef)
+        for (indexdef,) in cursor.fetchall()
+    ]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [old],
+    )
+    foreign_keys = cursor.fetchall()
+
+    cursor.execute(
+        f"CREATE TABLE social_post (LIKE {old} INCLUDING DEFAULTS "
+        "INCLUDING CONSTRAINTS INCLUDING STORAGE)"
+        + (" PARTITION BY RANGE (created_at)" if partitioned else "")
+    )
+    if partitioned:
+        # identity columns of partitioned tables need PostgreSQL 17
+        cursor.execute("CREATE SEQUENCE social_post_new_id_seq")
+        cursor.execute(
+            "ALTER TABLE social_post ALTER COLUMN id "
+            "SET DEFAULT nextval('social_post_new_id_seq')"
+        )
+        cursor.execute("ALTER SEQUENCE social_post_new_id_seq OWNED BY social_post.id")
+        cursor.execute(
+            "ALTER TABLE social_post ADD CONSTRAINT social_post_new_pkey "
+            "PRIMARY KEY (id, created_at)"
+        )
+        cursor.execute(f"SELECT min(created_at) FROM {old}")
+        oldest = cursor.fetchone()[0] or datetime.now(timezone.utc)
+        oldest = oldest.astimezone(timezone.utc)
+        month = datetime(oldest.year, oldest.month, 1, tzinfo=timezone.utc)
+        now = datetime.now(timezone.utc)
+        last = add_months(
+            datetime(now.year, now.month, 1, tzinfo=timezone.utc), PARTITIONS_AHEAD
+        )
+        while month <= last:
+            cursor.execute(
+                f"CREATE TABLE social_post_{month:%Y_%m} "
+                "PARTITION OF social_post FOR VALUES FROM (%s) TO (%s)",
+                [month, add_months(month, 1)],
+            )
+            month = add_months(month, 1)
+        cursor.execute(
+            "CREATE TABLE social_post_default PARTITION OF social_post DEFAULT"
+        )
+    else:
+        # the sequence of the partitioned table, dropped with its owner
+        cursor.execute("ALTER SEQUENCE social_post_id_seq OWNED BY social_post.id")
+        cursor.execute(
+            "ALTER SEQUENCE social_post_id_seq RENAME TO social_post_new_id_seq"
+        )
+        cursor.execute(
+            "ALTER TABLE social_post ADD CONSTRAINT social_post_new_pkey "
+            "PRIMARY KEY (id)"
+        )
+
+    cursor.execute(f"INSERT INTO social_post SELECT * FROM {old}")
+    cursor.execute(
+        "SELECT setval('social_post_new_id_seq', "
+        "COALESCE(max(id), 0) + 1, false) FROM social_post"
+    )
+    cursor.execute(f"DROP TABLE {old}")
+    cursor.execute("ALTER SEQUENCE social_post_new_id_seq RENAME TO social_post_id_seq")
+    cursor.execute(
+        "ALTER TABLE social_post RENAME CONSTRAINT social_post_new_pkey "
+        "TO social_post_pkey"
+    )
+    for name, definition in foreign_keys:
+        cursor.execute(f"ALTER TABLE social_post ADD CONSTRAINT {name} {definition}")
+    for indexdef in indexes:
+        cursor.execute(indexdef)
+
+
+def partition_posts(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        with schema_editor.connection.cursor() as cursor:
+            rebuild_posts(cursor, partitioned=True)
+
+
+def unpartition_posts(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        with schema_editor.connection.cursor() as cursor:
+            rebuild_posts(cursor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0016_jobs"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="comment",
+            name="post",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="comments",
+                to="social.post",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="feeditem",
+            name="post",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="feed_items",
+                to="social.post",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="like",
+            name="post",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="likes",
+                to="social.post",
+            ),
+        ),
+        migrations.RunPython(partition_posts, unpartition_posts),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 5.2 on 2026-10-19 10:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef, Subquery
+
+
+def fill_feed_item_authors(apps, schema_editor):
+    FeedItem = apps.get_model("social", "FeedItem")
+    Post = apps.get_model("social", "Post")
+    alias = schema_editor.connection.alias
+
+    posts = Post.objects.using(alias).filter(pk=OuterRef("post"))
+    feed_items = FeedItem.objects.using(alias)
+    feed_items.exclude(Exists(posts)).delete()
+    feed_items.update(author=Subquery(posts.values("profile")[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0017_partition_posts"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdSequence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("next_value", models.BigIntegerField()),
+            ],
+        ),
+        migrations.AlterModelOptions(
+            name="follow",
+            options={"base_manager_name": "objects", "ordering": ("-created_at",)},
+        ),
+        migrations.AlterModelOptions(
+            name="post",
+            options={"base_manager_name": "objects", "ordering": ("-created_at",)},
+        ),
+        migrations.AddField(
+            model_name="feeditem",
+            name="author",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="social.profile",
+            ),
+        ),
+        migrations.RunPython(fill_feed_item_authors, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="follow",
+            name="follower",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="following",
+                to="social.profile",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="follow",
+            name="following",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="followers",
+                to="social.profile",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="post",
+            name="profile",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="posts",
+                to="social.profile",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="feeditem",
+            index=models.Index(
+                fields=["profile", "author"], name="feed_item_author_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="profile",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", False)),
+                fields=["deleted_at"],
+                name="profile_deleted_idx",
+            ),
+        ),
+    ]
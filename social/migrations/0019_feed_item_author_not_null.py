@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 10:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0018_shard_posts_follows"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="feeditem",
+            name="author",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="social.profile",
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-19 11:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0019_feed_item_author_not_null"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="profile",
+            name="profile_full_name_idx",
+        ),
+        migrations.AddIndex(
+            model_name="profile",
+            index=models.Index(
+                fields=["full_name"],
+                name="profile_full_name_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+    ]
@@ -2,9 +2,11 @@ import os
 import uuid
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.utils.text import slugify
 
+from social.sharding import ShardedModel, ShardedQuerySet, is_sharded
+
 
 def profile_image_file_path(instance: "Profile", filename: str) -> str:
     _, extension = os.path.splitext(filename)
@@ -13,37 +15,184 @@ def profile_image_file_path(instance: "Profile", filename: str) -> str:
     return os.path.join("uploads/profiles/", filename)
 
 
-class Profile(models.Model):
+class ChangeLoggedModel(models.Model):
+    """Saves in one transaction with the post_save receivers, which
+    write the change log, so a row never commits without its entry.
+    Deletes already send post_delete inside their transaction.
+
+    A row saved on another shard than default commits right before its
+    entry, see social.sharding."""
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(savepoint=False), transaction.atomic(
+            using=kwargs.get("using"), savepoint=False
+        ):
+            super().save(*args, **kwargs)
+
+
+class Country(models.Model):
+    name = models.CharField(max_length=255)
+    key = models.CharField(max_length=255, unique=True)
+    profile_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "countries"
+
+    def __str__(self):
+        return self.name
+
+
+class CountryAlias(models.Model):
+    """Another spelling of a country name, e.g. "USA" for United States"""
+
+    country = models.ForeignKey(
+        Country, on_delete=models.CASCADE, related_name="aliases"
+    )
+    key = models.CharField(max_length=255, unique=True)
+
+    class Meta:
+        verbose_name_plural = "country aliases"
+
+    def __str__(self):
+        return self.key
+
+
+class City(models.Model):
+    country = models.ForeignKey(
+        Country, on_delete=models.CASCADE, related_name="cities"
+    )
+    name = models.CharField(max_length=255)
+    key = models.CharField(max_length=255)
+    profile_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "cities"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["country", "key"], name="unique_city_per_country"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["key"], name="city_key_idx"),
+            models.Index(
+                fields=["country", "-profile_count"],
+                name="city_popularity_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ProfileQuerySet(models.QuerySet):
+    def active(self):
+        """Profiles not waiting to be deleted"""
+        return self.filter(deleted_at__isnull=True)
+
+    def deleted(self):
+        """Profiles waiting to be deleted"""
+        return self.filter(deleted_at__isnull=False)
+
+
+def exclude_deleted_profiles(queryset, field: str):
+    """Rows of a queryset whose profile `field` isn't waiting to be
+    deleted, by id on sharded models, which can't join the profiles"""
+    if is_sharded():
+        deleted = Profile.objects.deleted().values_list("pk", flat=True)
+        return queryset.exclude(**{f"{field}__in": list(deleted)})
+    return queryset.filter(**{f"{field}__deleted_at__isnull": True})
+
+
+class Profile(ChangeLoggedModel):
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE
     )
     bio = models.TextField(blank=True)
-    country = models.CharField(max_length=255, blank=True)
-    city = models.CharField(max_length=255, blank=True)
+    country = models.ForeignKey(
+        Country,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="profiles",
+    )
+    city = models.ForeignKey(
+        City,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="profiles",
+    )
     image = models.ImageField(
         upload_to=profile_image_file_path, null=True, blank=True
     )
+    unread_notifications = models.IntegerField(default=0)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    full_name = models.CharField(max_length=301, blank=True)
+    search_name = models.CharField(max_length=301, blank=True)
+    follower_count = models.IntegerField(default=0)
 
-    @property
-    def full_name(self) -> str:
-        return f"{self.user.first_name} {self.user.last_name}"
+    objects = ProfileQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # prefix searches (LIKE 'x%') of the admin
+            models.Index(
+                fields=["full_name"],
+                name="profile_full_name_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+            models.Index(
+                fields=["search_name"],
+                name="profile_search_name_idx",
+                opclasses=["varchar_pattern_ops"],
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=["-follower_count"],
+                name="profile_popularity_idx",
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=["deleted_at"],
+                name="profile_deleted_idx",
+                condition=models.Q(deleted_at__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return self.full_name
 
 
-class Follow(models.Model):
+class Follow(ShardedModel, ChangeLoggedModel):
+    """Stored on the shard of the follower, see social.sharding"""
+
+    shard_key = "follower"
+
+    # profiles are on default, not on every shard
     follower = models.ForeignKey(
-        Profile, on_delete=models.CASCADE, related_name="following"
+        Profile,
+        on_delete=models.CASCADE,
+        related_name="following",
+        db_constraint=False,
     )
     following = models.ForeignKey(
-        Profile, on_delete=models.CASCADE, related_name="followers"
+        Profile,
+        on_delete=models.CASCADE,
+        related_name="followers",
+        db_constraint=False,
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    interactions = models.PositiveIntegerField(default=0)
+
+    objects = ShardedQuerySet.as_manager()
 
     class Meta:
         unique_together = ("follower", "following")
         ordering = ("-created_at",)
+        base_manager_name = "objects"
 
     def __str__(self):
         return f"{self.follower.full_name} follows {self.following.full_name}"
@@ -56,9 +205,31 @@ def post_media_file_path(instance: "Post", filename: str) -> str:
     return os.path.join("uploads/posts/", filename)
 
 
-class Post(models.Model):
+class PostQuerySet(ShardedQuerySet):
+    def visible(self):
+        """Posts of profiles not waiting to be deleted"""
+        return exclude_deleted_profiles(self, "profile")
+
+    def published(self):
+        return self.visible().filter(published=True)
+
+    def due(self, now):
+        """Scheduled posts whose publish time has come"""
+        return self.visible().filter(published=False, publish_at__lte=now)
+
+
+class Post(ShardedModel, ChangeLoggedModel):
+    """Partitioned by created_at month on PostgreSQL, see
+    social.partitions, and stored on the shard of the profile, see
+    social.sharding"""
+
+    shard_key = "profile"
+
     profile = models.ForeignKey(
-        Profile, on_delete=models.CASCADE, related_name="posts"
+        Profile,
+        on_delete=models.CASCADE,
+        related_name="posts",
+        db_constraint=False,
     )
     title = models.CharField(max_length=100)
     content = models.TextField()
@@ -66,6 +237,12 @@ class Post(models.Model):
         upload_to=post_media_file_path, null=True, blank=True
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    publish_at = models.DateTimeField(null=True, blank=True)
+    published = models.BooleanField(default=True)
+    like_count = models.IntegerField(default=0)
+    comment_count = models.IntegerField(default=0)
+
+    objects = PostQuerySet.as_manager()
 
     @property
     def user(self):
@@ -74,6 +251,293 @@ class Post(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        base_manager_name = "objects"
+        indexes = [
+            models.Index(
+                fields=["-created_at"],
+                name="post_published_idx",
+                condition=models.Q(published=True),
+            ),
+            models.Index(
+                fields=["publish_at"],
+                name="post_scheduled_idx",
+                condition=models.Q(published=False),
+            ),
+            models.Index(
+                fields=["title"],
+                name="post_title_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
 
     def __str__(self):
         return f"{self.profile.full_name} - {self.title}"
+
+
+class Like(models.Model):
+    profile = models.ForeignKey(
+        Profile, on_delete=models.CASCADE, related_name="likes"
+    )
+    # not enforced by the partitioned post table, see social.partitions
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="likes",
+        db_constraint=False,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("profile", "post")
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.profile.full_name} likes {self.post.title}"
+
+
+class CommentQuerySet(models.QuerySet):
+    def visible(self):
+        """Comments of profiles not waiting to be deleted"""
+        return self.filter(profile__deleted_at__isnull=True)
+
+
+class Comment(models.Model):
+    """Threaded comment stored with a materialized path.
+
+    path is the chain of ancestor ids (own id last), each written as a
+    fixed-width hex segment, so ordering by path walks the thread depth
+    first and a subtree is one contiguous range of the (post, path)
+    index."""
+
+    # not enforced by the partitioned post table, see social.partitions
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="comments",
+        db_constraint=False,
+    )
+    profile = models.ForeignKey(
+        Profile, on_delete=models.CASCADE, related_name="comments"
+    )
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="replies",
+    )
+    path = models.CharField(max_length=255, blank=True)
+    depth = models.PositiveSmallIntegerField(default=0)
+    reply_count = models.PositiveIntegerField(default=0)
+    content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = CommentQuerySet.as_manager()
+
+    @property
+    def user(self):
+        """Get user for permissions"""
+        return self.profile.user
+
+    class Meta:
+        ordering = ("path",)
+        indexes = [
+            models.Index(fields=["post", "path"], name="comment_thread_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.profile.full_name} on {self.post.title}"
+
+
+class Notification(models.Model):
+    """Digest of the same kind of events for a recipient in a time window"""
+
+    FOLLOW = "follow"
+    POST = "post"
+    VERB_CHOICES = ((FOLLOW, "New follower"), (POST, "New post"))
+
+    recipient = models.ForeignKey(
+        Profile, on_delete=models.CASCADE, related_name="notifications"
+    )
+    verb = models.CharField(max_length=16, choices=VERB_CHOICES)
+    window_start = models.DateTimeField()
+    last_actor = models.ForeignKey(
+        Profile, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    event_count = models.PositiveIntegerField(default=0)
+    read = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("recipient", "verb", "window_start")
+        ordering = ("-updated_at",)
+        indexes = [
+            models.Index(
+                fields=["recipient", "-updated_at"],
+                name="notification_inbox_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.verb} digest for {self.recipient}"
+
+
+class FeedItem(models.Model):
+    """Precomputed ranking of a post in a follower's feed"""
+
+    profile = models.ForeignKey(
+        Profile, on_delete=models.CASCADE, related_name="feed_items"
+    )
+    # not enforced by the partitioned post table, see social.partitions
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="feed_items",
+        db_constraint=False,
+    )
+    # author of the post, so feeds are filtered without joining posts,
+    # which can be on another shard
+    author = models.ForeignKey(
+        Profile, on_delete=models.CASCADE, related_name="+"
+    )
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ("profile", "post")
+        indexes = [
+            models.Index(
+                fields=["profile", "-score", "-id"],
+                name="feed_item_ranking_idx",
+            ),
+            models.Index(
+                fields=["profile", "author"], name="feed_item_author_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.post} in feed of {self.profile} ({self.score:.2f})"
+
+
+class ProfileDeletion(models.Model):
+    """Progress of a profile deleted in the background"""
+
+    profile = models.OneToOneField(
+        Profile,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="deletion",
+    )
+    delete_user = models.BooleanField(default=False)
+    phase = models.CharField(max_length=32)
+    deleted_rows = models.PositiveBigIntegerField(default=0)
+    deleted_files = models.PositiveIntegerField(default=0)
+    requested_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("requested_at",)
+
+    def __str__(self):
+        return f"Deletion of profile {self.profile_id} ({self.phase})"
+
+
+class ChangeLogEntry(models.Model):
+    """Append-only record of a create, update or delete, read by sync"""
+
+    MODEL_CHOICES = (
+        ("post", "Post"),
+        ("follow", "Follow"),
+        ("profile", "Profile"),
+    )
+    ACTION_CHOICES = (
+        ("create", "Create"),
+        ("update", "Update"),
+        ("delete", "Delete"),
+    )
+
+    model = models.CharField(max_length=16, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=8, choices=ACTION_CHOICES)
+    # plain ids, entries outlive the rows they describe
+    owner_id = models.BigIntegerField()
+    target_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "change log entries"
+        indexes = [
+            models.Index(
+                fields=["owner_id", "id"], name="changelog_owner_idx"
+            ),
+            models.Index(
+                fields=["target_id", "id"],
+                name="changelog_target_idx",
+                condition=models.Q(target_id__isnull=False),
+            ),
+            models.Index(
+                fields=["model", "object_id", "id"],
+                name="changelog_object_idx",
+            ),
+            models.Index(fields=["created_at"], name="changelog_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.model} {self.object_id}"
+
+
+class Job(models.Model):
+    """Unit of background work in the queue read by run_workers.
+
+    Finished jobs are deleted, jobs out of attempts stay as failed."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATE_CHOICES = (
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (FAILED, "Failed"),
+    )
+
+    name = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, blank=True)
+    # higher runs first
+    priority = models.SmallIntegerField(default=0)
+    state = models.CharField(
+        max_length=8, choices=STATE_CHOICES, default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField()
+    started_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-priority", "run_at"],
+                name="job_ready_idx",
+                condition=models.Q(state="queued"),
+            ),
+            models.Index(
+                fields=["started_at"],
+                name="job_running_idx",
+                condition=models.Q(state="running"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.state})"
+
+
+class IdSequence(models.Model):
+    """Next id of a sharded model, handed out in blocks by
+    social.sharding so ids are unique across shards"""
+
+    name = models.CharField(max_length=100, unique=True)
+    next_value = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
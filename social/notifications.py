@@ -0,0 +1,157 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from social.counters import WriteBuffer
+from social.models import Follow, Notification, Profile
+
+NOTIFICATION_WINDOW = timedelta(hours=1)
+UPSERT_BATCH_SIZE = 1000
+
+
+def window_start(moment: datetime) -> datetime:
+    seconds = NOTIFICATION_WINDOW.total_seconds()
+    return datetime.fromtimestamp(
+        moment.timestamp() // seconds * seconds, tz=dt_timezone.utc
+    )
+
+
+class NotificationBuffer(WriteBuffer):
+    """Buffers follow and post events and writes them as digests.
+
+    Items are keyed by (verb, profile, window) and hold the event count
+    with the latest actor. Follows are keyed by the followed profile,
+    posts by their author, so a popular author's post stays one item and
+    the followers it reaches are resolved at flush time."""
+
+    name = "notifications"
+
+    def merge(self, current, value):
+        count, _ = current
+        new_count, actor_id = value
+        return count + new_count, actor_id
+
+    def follow(self, follower_id: int, following_id: int) -> None:
+        key = (Notification.FOLLOW, following_id, window_start(timezone.now()))
+        self.add(key, (1, follower_id))
+
+    def post(self, author_id: int) -> None:
+        key = (Notification.POST, author_id, window_start(timezone.now()))
+        self.add(key, (1, author_id))
+
+    def write(self, pending: dict) -> None:
+        digests = defaultdict(dict)
+
+        for (verb, profile_id, window), (count, actor_id) in pending.items():
+            if verb == Notification.FOLLOW:
+                recipients = [profile_id]
+            else:
+                recipients = (
+                    Follow.objects.filter(following=profile_id)
+                    .values_list("follower_id", flat=True)
+                    .iterator()
+                )
+
+            digest = digests[(verb, window)]
+            for recipient_id in recipients:
+                previous = digest.get(recipient_id, (0, actor_id))[0]
+                digest[recipient_id] = (previous + count, actor_id)
+
+        # all or nothing, a failed flush queues the events again
+        with transaction.atomic():
+            for (verb, window), digest in digests.items():
+                recipients = list(digest.items())
+                for start in range(0, len(recipients), UPSERT_BATCH_SIZE):
+                    upsert_digests(
+                        verb,
+                        window,
+                        dict(recipients[start : start + UPSERT_BATCH_SIZE]),
+                    )
+
+
+def upsert_digests(verb: str, window: datetime, digest: dict) -> None:
+    """Add event counts to the recipients' digests of one window.
+
+    Both statements change each row atomically, so processes flushing
+    the same digests at once add their counts up, and only one of them
+    finds a digest newly unread."""
+    opts = Notification._meta
+    quote = connection.ops.quote_name
+    table = quote(opts.db_table)
+    columns = {
+        name: quote(opts.get_field(name).column)
+        for name in (
+            "recipient",
+            "verb",
+            "window_start",
+            "last_actor",
+            "event_count",
+            "read",
+            "updated_at",
+        )
+    }
+    window = opts.get_field("window_start").get_db_prep_value(
+        window, connection
+    )
+    now = opts.get_field("updated_at").get_db_prep_value(
+        timezone.now(), connection
+    )
+    recipients = list(digest)
+    placeholders = ", ".join(["%s"] * len(recipients))
+    rows = ", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(recipients))
+
+    with connection.cursor() as cursor:
+        # digests read since their last events become unread again
+        cursor.execute(
+            f"UPDATE {table} SET {columns['read']} = %s "
+            f"WHERE {columns['verb']} = %s "
+            f"AND {columns['window_start']} = %s "
+            f"AND {columns['recipient']} IN ({placeholders}) "
+            f"AND {columns['read']} "
+            f"RETURNING {columns['recipient']}",
+            [False, verb, window, *recipients],
+        )
+        newly_unread = [recipient_id for recipient_id, in cursor.fetchall()]
+
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns.values())}) "
+            f"VALUES {rows} "
+            f"ON CONFLICT ({columns['recipient']}, {columns['verb']}, "
+            f"{columns['window_start']}) DO UPDATE SET "
+            f"{columns['event_count']} = {table}.{columns['event_count']}"
+            f" + EXCLUDED.{columns['event_count']}, "
+            f"{columns['last_actor']} = EXCLUDED.{columns['last_actor']}, "
+            f"{columns['read']} = EXCLUDED.{columns['read']}, "
+            f"{columns['updated_at']} = EXCLUDED.{columns['updated_at']} "
+            f"RETURNING {columns['recipient']}, {columns['event_count']}",
+            [
+                value
+                for recipient_id, (count, actor_id) in digest.items()
+                for value in (
+                    recipient_id,
+                    verb,
+                    window,
+                    actor_id,
+                    count,
+                    False,
+                    now,
+                )
+            ],
+        )
+        # a digest holding only these events was just inserted
+        newly_unread += [
+            recipient_id
+            for recipient_id, event_count in cursor.fetchall()
+            if event_count == digest[recipient_id][0]
+        ]
+
+    # a digest counts as unread once, until it is read again
+    Profile.objects.filter(pk__in=newly_unread).update(
+        unread_notifications=F("unread_notifications") + 1
+    )
+
+
+notification_buffer = NotificationBuffer()
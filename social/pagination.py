@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class RankedFeedPagination(CursorPagination):
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    ordering = ("-score", "-id")
+
+
+class CommentThreadPagination(CursorPagination):
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    ordering = ("path",)
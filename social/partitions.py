@@ -0,0 +1,212 @@
+"""Monthly range partitions of the post table on PostgreSQL.
+
+Since migration 0017 social_post is partitioned by created_at month
+into social_post_YYYY_MM tables, so old months can be detached instead
+of deleted row by row. social_post_default takes rows outside of all
+partitions and should stay empty: manage_post_partitions creates the
+partitions PARTITIONS_AHEAD months in advance, and a month can't be
+created while the default partition holds rows of it.
+
+PostgreSQL needs the partition key in every unique constraint, so the
+primary key is (id, created_at) in the database and ids stay unique
+through the sequence. Foreign keys to posts can't be enforced by the
+database (db_constraint=False), Django's on_delete still cascades.
+
+Queries ordered by created_at with a limit, like the post lists and
+the feed, read the partition indexes in a Merge Append that stops in
+the newest partitions. Queries bounded on created_at skip the other
+partitions in planning. Lookups by id probe the index of each
+partition, which archiving keeps few.
+
+Archiving a month deletes the likes, comments and feed items of its
+posts, detaches the partition, saves it as gzipped CSV and drops it,
+or keeps it as a plain table with detach_only. Each shard of
+social.sharding has its own partitions, the functions take its alias.
+"""
+
+import gzip
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Exists, OuterRef
+
+from social.deletion import delete_batch
+from social.models import Post
+
+POST_TABLE = Post._meta.db_table
+DEFAULT_PARTITION = f"{POST_TABLE}_default"
+PARTITIONS_AHEAD = 3
+ARCHIVE_BATCH_SIZE = 1000
+
+PARTITION_NAME = re.compile(rf"^{POST_TABLE}_(\d{{4}})_(\d{{2}})$")
+
+
+def month_start(moment: datetime) -> datetime:
+    """First moment of the UTC month of moment"""
+    moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{POST_TABLE}_{month:%Y_%m}"
+
+
+def partition_month(name: str):
+    """Month of a partition name, None for other tables"""
+    match = PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    year, month = map(int, match.groups())
+    return datetime(year, month, 1, tzinfo=timezone.utc)
+
+
+def is_partitioned(using: str = DEFAULT_DB_ALIAS) -> bool:
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+            [POST_TABLE],
+        )
+        row = cursor.fetchone()
+    return row is not None and row[0] == "p"
+
+
+def partitions(using: str = DEFAULT_DB_ALIAS) -> list:
+    """Months of the attached month partitions, oldest first"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(%s)",
+            [POST_TABLE],
+        )
+        names = [name for (name,) in cursor.fetchall()]
+    return sorted(filter(None, map(partition_month, names)))
+
+
+def has_stray_posts(using: str = DEFAULT_DB_ALIAS) -> bool:
+    """Whether posts landed in the default partition"""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM "
+            f"{connection.ops.quote_name(DEFAULT_PARTITION)})"
+        )
+        return cursor.fetchone()[0]
+
+
+def create_partition(month: datetime, using: str = DEFAULT_DB_ALIAS) -> None:
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {quote(partition_name(month))} "
+            f"PARTITION OF {quote(POST_TABLE)} "
+            "FOR VALUES FROM (%s) TO (%s)",
+            [month, add_months(month, 1)],
+        )
+
+
+def create_partitions(
+    ahead: int = PARTITIONS_AHEAD, now=None, using: str = DEFAULT_DB_ALIAS
+) -> list:
+    """Create the missing partitions from the current month to ahead
+    months later, returns their names"""
+    current = month_start(now or datetime.now(timezone.utc))
+    existing = set(partitions(using))
+    created = []
+    for offset in range(ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            create_partition(month, using)
+            created.append(partition_name(month))
+    return created
+
+
+def archive_partition(
+    month: datetime,
+    directory: Path = None,
+    detach_only: bool = False,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    using: str = DEFAULT_DB_ALIAS,
+):
+    """Take the posts of a month out of the post table.
+
+    The rows referencing them are deleted in batches, then the
+    partition is detached, saved to directory as <name>.csv.gz, or
+    <name>.<alias>.csv.gz for other shards than default, and
+    dropped. Returns the path of the archive, None with detach_only,
+    which keeps the detached table instead. A failed archive leaves the
+    table detached."""
+    name = partition_name(month)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+
+    posts = Post.objects.using(using).filter(
+        created_at__gte=month, created_at__lt=add_months(month, 1)
+    )
+    if using == DEFAULT_DB_ALIAS:
+        for relation in Post._meta.related_objects:
+            related = relation.related_model.objects.filter(
+                Exists(posts.filter(pk=OuterRef(relation.field.attname)))
+            )
+            while delete_batch(related, batch_size):
+                pass
+    else:
+        # the related rows are on default, found by the post ids
+        post_ids = posts.order_by("pk").values_list("pk", flat=True)
+        last = 0
+        while batch := list(post_ids.filter(pk__gt=last)[:batch_size]):
+            for relation in Post._meta.related_objects:
+                related = relation.related_model.objects.filter(
+                    **{f"{relation.field.attname}__in": batch}
+                )
+                while delete_batch(related, batch_size):
+                    pass
+            last = batch[-1]
+
+    with connection.cursor() as cursor:
+        # nothing writes to the table once detached, the copy is complete
+        cursor.execute(
+            f"ALTER TABLE {quote(POST_TABLE)} DETACH PARTITION {quote(name)}"
+        )
+        if detach_only:
+            return None
+
+        directory = Path(directory or settings.POST_ARCHIVE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        suffix = "" if using == DEFAULT_DB_ALIAS else f".{using}"
+        path = directory / f"{name}{suffix}.csv.gz"
+        with gzip.open(path, "wt", encoding="utf-8") as archive:
+            cursor.copy_expert(
+                f"COPY {quote(name)} TO STDOUT WITH (FORMAT csv, HEADER)",
+                archive,
+            )
+        cursor.execute(f"DROP TABLE {quote(name)}")
+    return path
+
+
+def archive_partitions(
+    keep_months: int, now=None, using: str = DEFAULT_DB_ALIAS, **options
+) -> list:
+    """Archive the partitions older than the keep_months latest months
+    up to now, returns the names of the archived partitions"""
+    oldest_kept = add_months(
+        month_start(now or datetime.now(timezone.utc)), 1 - keep_months
+    )
+    archived = []
+    for month in partitions(using):
+        if month < oldest_kept:
+            archive_partition(month, using=using, **options)
+            archived.append(partition_name(month))
+    return archived
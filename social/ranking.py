@@ -0,0 +1,158 @@
+"""Feed ranking for ?ranking=top.
+
+Every post gets a FeedItem per follower whose score is the sum of three
+terms, so each one can be updated on its own with a single UPDATE:
+
+* recency: seconds since RANKING_EPOCH / RECENCY_SECONDS. Newer posts
+  get a bigger constant bonus, so older posts decay without rescoring.
+* affinity: log2 of the follower's interactions with the author.
+* engagement: log10 of the post's engagement counters.
+"""
+
+import math
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.db.models import F
+
+from social.jobs import job
+from social.models import FeedItem, Follow, Post
+
+RANKING_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+RECENCY_SECONDS = 12 * 60 * 60
+AFFINITY_WEIGHT = 1.0
+ENGAGEMENT_WEIGHT = 1.0
+BACKFILL_POSTS = 50
+
+# Post counters that add to the engagement term
+ENGAGEMENT_FIELDS = ("like_count", "comment_count")
+
+
+def recency_score(created_at: datetime) -> float:
+    return (created_at - RANKING_EPOCH).total_seconds() / RECENCY_SECONDS
+
+
+def affinity_score(interactions: int) -> float:
+    return AFFINITY_WEIGHT * math.log2(1 + interactions)
+
+
+def engagement_score(engagement: int) -> float:
+    return ENGAGEMENT_WEIGHT * math.log10(1 + engagement)
+
+
+def post_engagement(post: Post) -> int:
+    return sum(getattr(post, field) for field in ENGAGEMENT_FIELDS)
+
+
+def post_score(post: Post, interactions: int = 0) -> float:
+    return (
+        recency_score(post.created_at)
+        + affinity_score(interactions)
+        + engagement_score(post_engagement(post))
+    )
+
+
+def fan_out_post(post: Post) -> None:
+    """Add a new post to the feeds of all the author's followers"""
+    fan_out_posts([post])
+
+
+def fan_out_posts(posts: list) -> None:
+    """Add a batch of posts to their authors' followers' feeds at once"""
+    posts_by_author = defaultdict(list)
+    for post in posts:
+        posts_by_author[post.profile_id].append(
+            (
+                post,
+                recency_score(post.created_at)
+                + engagement_score(post_engagement(post)),
+            )
+        )
+
+    follows = Follow.objects.filter(
+        following__in=posts_by_author
+    ).values_list("following_id", "follower_id", "interactions")
+
+    FeedItem.objects.bulk_create(
+        (
+            FeedItem(
+                profile_id=follower_id,
+                post=post,
+                author_id=post.profile_id,
+                score=base_score + affinity_score(interactions),
+            )
+            for following_id, follower_id, interactions in follows.iterator()
+            for post, base_score in posts_by_author[following_id]
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+@job(priority=10)
+def fan_out_published(post_ids: list) -> None:
+    """Job fanning out posts after they went live, existing feed items
+    are skipped so it can run again"""
+    fan_out_posts(list(Post.objects.published().filter(pk__in=post_ids)))
+
+
+def backfill_follow(follow: Follow) -> None:
+    """Add the followed profile's recent posts to the follower's feed"""
+    posts = Post.objects.published().filter(profile=follow.following_id)[
+        :BACKFILL_POSTS
+    ]
+    FeedItem.objects.bulk_create(
+        (
+            FeedItem(
+                profile_id=follow.follower_id,
+                post=post,
+                author_id=post.profile_id,
+                score=post_score(post, follow.interactions),
+            )
+            for post in posts
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def remove_follow(follow: Follow) -> None:
+    """Drop the unfollowed profile's posts from the follower's feed"""
+    FeedItem.objects.filter(
+        profile=follow.follower_id, author=follow.following_id
+    ).delete()
+
+
+def record_interaction(follower_id: int, following_id: int) -> None:
+    """Count an interaction and lift the author's posts in the feed"""
+    follow = (
+        Follow.objects.filter(follower=follower_id, following=following_id)
+        .only("id", "interactions")
+        .first()
+    )
+    if follow is None:
+        return
+
+    delta = affinity_score(follow.interactions + 1) - affinity_score(
+        follow.interactions
+    )
+    Follow.objects.filter(pk=follow.pk, follower=follower_id).update(
+        interactions=F("interactions") + 1
+    )
+    FeedItem.objects.filter(profile=follower_id, author=following_id).update(
+        score=F("score") + delta
+    )
+
+
+def record_engagement(post_id: int, old: int, new: int) -> None:
+    """Shift a post's score in every feed after its engagement changed"""
+    delta = engagement_score(new) - engagement_score(old)
+    if delta:
+        FeedItem.objects.filter(post=post_id).update(score=F("score") + delta)
+
+
+def record_engagement_deltas(deltas: dict) -> None:
+    """Rescore posts after a batch of engagement counter updates"""
+    posts = Post.objects.filter(pk__in=deltas).only(*ENGAGEMENT_FIELDS)
+    for post in posts:
+        engagement = post_engagement(post)
+        record_engagement(post.pk, engagement - deltas[post.pk], engagement)
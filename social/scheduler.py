@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.utils import timezone
+
+from social.changelog import log_changes
+from social.models import Post
+from social.sharding import shards
+from social.signals import posts_published
+
+PUBLISH_BATCH_SIZE = 500
+
+
+def publish_due_posts(batch_size: int = PUBLISH_BATCH_SIZE) -> int:
+    """Publish one batch of due scheduled posts on each shard, returns
+    their number.
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several
+    schedulers can run side by side without publishing a post twice."""
+    now = timezone.now()
+    published = 0
+
+    for alias in shards():
+        with transaction.atomic(using=alias):
+            shard_posts = Post.objects.using(alias)
+            posts = list(
+                shard_posts.due(now)
+                .select_for_update(skip_locked=True)
+                .order_by("publish_at")[:batch_size]
+            )
+            if not posts:
+                continue
+
+            shard_posts.filter(pk__in=[post.pk for post in posts]).update(
+                published=True, created_at=now
+            )
+            for post in posts:
+                post.published = True
+                post.created_at = now
+            # synced clients never saw the post before
+            log_changes("post", posts, "create")
+
+            posts_published.send(sender=Post, posts=posts)
+        published += len(posts)
+
+    return published
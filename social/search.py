@@ -0,0 +1,68 @@
+"""Stored profile names and name autocomplete.
+
+Profiles store full_name, so listing or sorting them by name needs no
+join to the user table, and search_name, the full name lowercased with
+accents and repeated whitespace removed. Both are kept up to date when
+a profile is created or its user renamed.
+
+A varchar_pattern_ops index serves prefix lookups (LIKE 'prefix%') as
+a B-tree range scan, and matches are ranked by the denormalized
+follower_count.
+"""
+
+import unicodedata
+
+from django.db import transaction
+
+from social.changelog import log_changes
+from social.models import Profile
+
+AUTOCOMPLETE_LIMIT = 10
+MAX_AUTOCOMPLETE_LIMIT = 50
+
+
+def normalize_name(name: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    )
+    return " ".join(stripped.casefold().split())
+
+
+def full_name(user) -> str:
+    return " ".join(f"{user.first_name} {user.last_name}".split())
+
+
+def search_name(user) -> str:
+    return normalize_name(full_name(user))
+
+
+def profile_names(user) -> dict:
+    """Values of the name columns a profile of the user stores"""
+    return {"full_name": full_name(user), "search_name": search_name(user)}
+
+
+def sync_profile_names(user) -> None:
+    """Refresh the stored names of the user's profile after a rename,
+    logging the change for synced clients"""
+    with transaction.atomic():
+        profiles = list(Profile.objects.filter(user=user).only("pk"))
+        Profile.objects.filter(
+            pk__in=[profile.pk for profile in profiles]
+        ).update(**profile_names(user))
+        log_changes("profile", profiles, "update")
+
+
+def autocomplete(prefix: str, limit: int = AUTOCOMPLETE_LIMIT):
+    """Most followed profiles whose full name starts with prefix"""
+    key = normalize_name(prefix)
+    if not key:
+        return Profile.objects.none()
+
+    return (
+        Profile.objects.active()
+        .filter(search_name__startswith=key)
+        .order_by("-follower_count", "id")[
+            : min(limit, MAX_AUTOCOMPLETE_LIMIT)
+        ]
+    )
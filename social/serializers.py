@@ -1,9 +1,98 @@
+from django.utils import timezone
 from rest_framework import serializers
 
-from social.models import Profile, Follow, Post
+from social.locations import get_city, get_country
+from social.models import (
+    ChangeLogEntry,
+    City,
+    Country,
+    Profile,
+    Follow,
+    Post,
+    Like,
+    Comment,
+    Notification,
+)
+from social.sharding import is_sharded
+from social_media_api.serializers import (
+    SparseFieldsetMixin,
+    ValuesSerializerMixin,
+)
+from user.serializers import UserSerializer
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+def liked_post_ids(request, post_ids) -> set:
+    """Ids of the given posts liked by the requesting user"""
+    if request is None or not request.user.is_authenticated:
+        return set()
+
+    return set(
+        Like.objects.filter(
+            profile__user=request.user, post__in=post_ids
+        ).values_list("post_id", flat=True)
+    )
+
+
+def profile_image_url_builder(context):
+    """Function turning stored image names into URLs, as ImageField does"""
+    storage = Profile._meta.get_field("image").storage
+    request = context.get("request")
+
+    def image_url(name):
+        if not name:
+            return None
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request else url
+
+    return image_url
+
+
+class ProfileLocationMixin(serializers.Serializer):
+    """Country and city given by name, resolved to their rows on save"""
+
+    country = serializers.CharField(
+        max_length=255, required=False, allow_blank=True
+    )
+    city = serializers.CharField(
+        max_length=255, required=False, allow_blank=True
+    )
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if "country" in attrs:
+            has_country = bool(attrs["country"].strip())
+        else:
+            has_country = bool(self.instance and self.instance.country_id)
+        if attrs.get("city", "").strip() and not has_country:
+            raise serializers.ValidationError(
+                {"city": "Set a country for the city"}
+            )
+        return attrs
+
+    def resolve_location(self, validated_data: dict) -> dict:
+        if "country" in validated_data:
+            validated_data["country"] = get_country(validated_data["country"])
+        country = validated_data.get(
+            "country", getattr(self.instance, "country", None)
+        )
+
+        if "city" in validated_data:
+            validated_data["city"] = get_city(country, validated_data["city"])
+        elif self.instance and self.instance.country != country:
+            # the old city is in another country
+            validated_data["city"] = None
+        return validated_data
+
+    def create(self, validated_data):
+        return super().create(self.resolve_location(validated_data))
+
+    def update(self, instance, validated_data):
+        return super().update(instance, self.resolve_location(validated_data))
+
+
+class ProfileSerializer(
+    ProfileLocationMixin, SparseFieldsetMixin, serializers.ModelSerializer
+):
     followers = serializers.IntegerField(
         read_only=True, source="followers.count"
     )
@@ -25,9 +114,15 @@ class ProfileSerializer(serializers.ModelSerializer):
             "following",
         )
         read_only_fields = ("id", "user", "full_name")
+        sparse_sources = {
+            "country": ("country__name",),
+            "city": ("city__name",),
+        }
 
 
-class ProfileCreateSerializer(serializers.ModelSerializer):
+class ProfileCreateSerializer(
+    ProfileLocationMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Profile
         fields = ("id", "bio", "country", "city", "image")
@@ -36,14 +131,86 @@ class ProfileCreateSerializer(serializers.ModelSerializer):
         user = validated_data["user"]
         if Profile.objects.filter(user=user.id).exists():
             raise serializers.ValidationError("You already have a profile")
-        profile = Profile.objects.create(**validated_data)
-        return profile
+        return super().create(validated_data)
+
 
+class ProfileListSerializer(
+    ValuesSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer
+):
+    country = serializers.CharField(read_only=True)
+    city = serializers.CharField(read_only=True)
 
-class ProfileListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Profile
         fields = ("id", "full_name", "country", "city", "image")
+        sparse_sources = {
+            "country": ("country__name",),
+            "city": ("city__name",),
+        }
+        values_lookups = (
+            "id",
+            "full_name",
+            "country__name",
+            "city__name",
+            "image",
+        )
+
+    @classmethod
+    def represent_values(cls, rows, context):
+        image_url = profile_image_url_builder(context)
+        return [
+            {
+                "id": row["id"],
+                "full_name": row["full_name"],
+                "country": row["country__name"],
+                "city": row["city__name"],
+                "image": image_url(row["image"]),
+            }
+            for row in rows
+        ]
+
+
+class ProfileAutocompleteSerializer(
+    ValuesSerializerMixin, serializers.ModelSerializer
+):
+    class Meta:
+        model = Profile
+        fields = ("id", "full_name", "image", "follower_count")
+        values_lookups = ("id", "full_name", "image", "follower_count")
+
+    @classmethod
+    def represent_values(cls, rows, context):
+        image_url = profile_image_url_builder(context)
+        return [
+            {
+                "id": row["id"],
+                "full_name": row["full_name"],
+                "image": image_url(row["image"]),
+                "follower_count": row["follower_count"],
+            }
+            for row in rows
+        ]
+
+
+class CountryFacetSerializer(serializers.ModelSerializer):
+    count = serializers.IntegerField(source="profile_count")
+
+    class Meta:
+        model = Country
+        fields = ("id", "name", "count")
+
+
+class CityFacetSerializer(serializers.ModelSerializer):
+    count = serializers.IntegerField(source="profile_count")
+
+    class Meta:
+        model = City
+        fields = ("id", "name", "country", "count")
+
+
+class ProfileFacetsSerializer(serializers.Serializer):
+    countries = CountryFacetSerializer(many=True)
+    cities = CityFacetSerializer(many=True)
 
 
 class FollowUnfollowSerializer(serializers.ModelSerializer):
@@ -53,7 +220,7 @@ class FollowUnfollowSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "follower", "following", "created_at")
 
 
-class FollowersSerializer(serializers.ModelSerializer):
+class FollowersSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     name = serializers.CharField(source="follower.full_name", read_only=True)
 
     class Meta:
@@ -61,7 +228,7 @@ class FollowersSerializer(serializers.ModelSerializer):
         fields = ("id", "name")
 
 
-class FollowingSerializer(serializers.ModelSerializer):
+class FollowingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     name = serializers.CharField(source="following.full_name", read_only=True)
 
     class Meta:
@@ -69,21 +236,251 @@ class FollowingSerializer(serializers.ModelSerializer):
         fields = ("id", "name")
 
 
-class PostSerializer(serializers.ModelSerializer):
+class LikedPostsListSerializer(serializers.ListSerializer):
+    """Resolves liked_by_me for the whole page with one query"""
+
+    def to_representation(self, data):
+        posts = list(data.all() if hasattr(data, "all") else data)
+        if "liked_by_me" in self.child.fields:
+            self.context["liked_post_ids"] = liked_post_ids(
+                self.context.get("request"), [post.pk for post in posts]
+            )
+        return super().to_representation(posts)
+
+
+class LikedByMeMixin(serializers.Serializer):
+    liked_by_me = serializers.SerializerMethodField()
+
+    def get_liked_by_me(self, post) -> bool:
+        liked = self.context.get("liked_post_ids")
+        if liked is None:
+            liked = liked_post_ids(self.context.get("request"), [post.pk])
+        return post.pk in liked
+
+
+class PostSerializer(
+    LikedByMeMixin, SparseFieldsetMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Post
-        fields = ("id", "profile", "title", "content", "media", "created_at")
+        fields = (
+            "id",
+            "profile",
+            "title",
+            "content",
+            "media",
+            "created_at",
+            "publish_at",
+            "like_count",
+            "comment_count",
+            "liked_by_me",
+        )
+        read_only_fields = ("like_count", "comment_count")
+        list_serializer_class = LikedPostsListSerializer
+        sparse_sources = {"liked_by_me": ()}
 
 
 class PostCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Post
-        fields = ("id", "title", "content", "media")
+        fields = ("id", "title", "content", "media", "publish_at")
+
+    def validate_publish_at(self, value):
+        if self.instance and self.instance.published:
+            raise serializers.ValidationError("Post is already published")
+        if value and value <= timezone.now():
+            raise serializers.ValidationError(
+                "Publish time must be in the future"
+            )
+        return value
+
+    def create(self, validated_data):
+        validated_data["published"] = not validated_data.get("publish_at")
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        if not instance.published and "publish_at" in validated_data:
+            # unscheduling hands the post to the scheduler right away
+            validated_data["publish_at"] = (
+                validated_data["publish_at"] or timezone.now()
+            )
+        return super().update(instance, validated_data)
 
 
-class PostListSerializer(serializers.ModelSerializer):
+class PostListSerializer(
+    LikedByMeMixin,
+    ValuesSerializerMixin,
+    SparseFieldsetMixin,
+    serializers.ModelSerializer,
+):
     user = serializers.CharField(source="profile.full_name", read_only=True)
 
     class Meta:
         model = Post
-        fields = ("id", "user", "title", "created_at")
+        fields = (
+            "id",
+            "user",
+            "title",
+            "created_at",
+            "like_count",
+            "comment_count",
+            "liked_by_me",
+        )
+        list_serializer_class = LikedPostsListSerializer
+        sparse_sources = {"liked_by_me": ()}
+        values_lookups = (
+            "id",
+            "profile__full_name",
+            "title",
+            "created_at",
+            "like_count",
+            "comment_count",
+        )
+
+    @classmethod
+    def serialize_values(cls, queryset, context):
+        if not is_sharded():
+            return super().serialize_values(queryset, context)
+
+        # shards can't join the profiles, names are read from default
+        lookups = [
+            lookup
+            for lookup in cls.Meta.values_lookups
+            if lookup != "profile__full_name"
+        ]
+        rows = list(queryset.values(*lookups, "profile"))
+        names = dict(
+            Profile.objects.filter(
+                pk__in={row["profile"] for row in rows}
+            ).values_list("pk", "full_name")
+        )
+        for row in rows:
+            row["profile__full_name"] = names.get(row.pop("profile"))
+        return cls.represent_values(rows, context)
+
+    @classmethod
+    def represent_values(cls, rows, context):
+        created_at = serializers.DateTimeField().to_representation
+        rows = list(rows)
+        liked = liked_post_ids(
+            context.get("request"), [row["id"] for row in rows]
+        )
+
+        return [
+            {
+                "id": row["id"],
+                "user": row["profile__full_name"],
+                "title": row["title"],
+                "created_at": created_at(row["created_at"]),
+                "like_count": row["like_count"],
+                "comment_count": row["comment_count"],
+                "liked_by_me": row["id"] in liked,
+            }
+            for row in rows
+        ]
+
+
+class LikeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Like
+        fields = ("id", "profile", "post", "created_at")
+        read_only_fields = ("id", "profile", "post", "created_at")
+
+
+class CommentSerializer(serializers.ModelSerializer):
+    user = serializers.CharField(source="profile.full_name", read_only=True)
+    replies = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Comment
+        fields = (
+            "id",
+            "user",
+            "parent",
+            "content",
+            "created_at",
+            "depth",
+            "reply_count",
+            "replies",
+        )
+        read_only_fields = ("id", "created_at", "depth", "reply_count")
+
+    def get_replies(self, comment) -> list:
+        """Replies preloaded by the view into context["replies"]"""
+        replies = self.context.get("replies", {}).get(comment.pk, [])
+        return CommentSerializer(replies, many=True, context=self.context).data
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    message = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Notification
+        fields = (
+            "id",
+            "verb",
+            "message",
+            "last_actor",
+            "event_count",
+            "read",
+            "updated_at",
+        )
+
+    def get_message(self, notification) -> str:
+        actor = (
+            notification.last_actor.full_name
+            if notification.last_actor
+            else "Someone"
+        )
+        count = notification.event_count
+
+        if notification.verb == Notification.FOLLOW:
+            if count == 1:
+                return f"{actor} followed you"
+            return f"{actor} and {count - 1} others followed you"
+
+        if count == 1:
+            return f"{actor} published a new post"
+        return f"{count} new posts from people you follow, latest by {actor}"
+
+
+class BootstrapProfileSerializer(ProfileSerializer):
+    """Profile with follow counts annotated on the queryset"""
+
+    followers = serializers.IntegerField(
+        read_only=True, source="followers_total"
+    )
+    following = serializers.IntegerField(
+        read_only=True, source="following_total"
+    )
+
+
+class BootstrapSerializer(serializers.Serializer):
+    user = UserSerializer()
+    profile = BootstrapProfileSerializer(allow_null=True)
+    feed = PostSerializer(many=True)
+    following = serializers.ListField(child=serializers.IntegerField())
+
+
+class ChangeSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="object_id")
+
+    class Meta:
+        model = ChangeLogEntry
+        fields = ("model", "id", "action")
+
+
+class SyncSerializer(serializers.Serializer):
+    changes = ChangeSerializer(many=True)
+    cursor = serializers.CharField()
+    has_more = serializers.BooleanField()
+    reset = serializers.BooleanField()
+
+
+class JobMetricsSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    queued = serializers.IntegerField()
+    scheduled = serializers.IntegerField()
+    running = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    latency = serializers.FloatField()
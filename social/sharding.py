@@ -0,0 +1,607 @@
+"""Horizontal sharding of posts and follows by profile id.
+
+SHARDS lists the database aliases holding the rows of ShardedModel
+subclasses: a post lives on the shard of its profile, a follow on the
+shard of its follower. Every other table stays on default, which is also
+the first shard. Each shard has the whole schema, `manage.py
+migrate_shards` migrates them.
+
+shard_for() maps a profile id to a shard by jump consistent hashing.
+Appending a shard to SHARDS moves 1 / n of the profiles, all of them to
+the new shard, and `manage.py reshard` moves their rows. Shards can only
+be added at the end of the list.
+
+ShardedQuerySet sends a query filtered on the shard key to the shards
+of the keys. Any other query goes to every shard and the results are
+merged in the queryset's ordering (scatter-gather). A shard can't join
+the tables on default: select_related() runs as prefetch_related(),
+filters take the ids of other models from subquery(), and a join or
+subquery left in a sharded query raises NotSupportedError instead of
+silently finding nothing. Ids come from blocks reserved on default, so
+they stay unique across shards and through resharding.
+
+A sharded row commits on its shard right before its change log entry
+on default, a crash in between loses the entry. With a single shard
+none of this applies and the ORM works as usual.
+"""
+
+import os
+import threading
+from collections import Counter, defaultdict
+from operator import attrgetter, itemgetter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.color import no_style
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    NotSupportedError,
+    connections,
+    models,
+    transaction,
+)
+from django.db.models import Max
+from django.db.models.constants import OnConflict
+from django.db.models.lookups import Exact, In
+from django.db.models.query import (
+    FlatValuesListIterable,
+    ModelIterable,
+    NamedValuesListIterable,
+    ValuesIterable,
+)
+from django.db.models.sql.query import Query
+from django.db.models.sql.where import AND
+
+ID_BLOCK_SIZE = 100
+RESHARD_BATCH_SIZE = 1000
+ITERATOR_CHUNK_SIZE = 2000
+
+
+def shards() -> list:
+    return list(getattr(settings, "SHARDS", [DEFAULT_DB_ALIAS]))
+
+
+def is_sharded() -> bool:
+    return len(shards()) > 1
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Jump consistent hash (Lamping and Veach): going from n to n + 1
+    buckets moves 1 / (n + 1) of the keys, all to the new bucket"""
+    bucket, jump = -1, 0
+    while jump < buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) % 2**64
+        jump = int((bucket + 1) * (2**31 / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_for(profile_id) -> str:
+    aliases = shards()
+    return aliases[jump_hash(int(profile_id), len(aliases))]
+
+
+def subquery(queryset):
+    """Right side of an __in lookup on the values of another model's
+    queryset, e.g. values_list("pk", flat=True).
+
+    That's the queryset itself, run as a subquery, while all tables
+    share a database. With several shards a query can't reach the other
+    databases, so the values are fetched first."""
+    if is_sharded():
+        return list(queryset)
+    return queryset
+
+
+class IdAllocator:
+    """Hands out ids unique across shards from blocks reserved on
+    default, one write per ID_BLOCK_SIZE ids"""
+
+    def __init__(self):
+        self._reset()
+        # a forked worker must not hand out the parent's ids again
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._blocks = {}
+        self._lock = threading.Lock()
+
+    def allocate(self, model, count: int = 1) -> list:
+        with self._lock:
+            block = self._blocks.get(model, range(0))
+            ids = list(block[:count])
+            block = block[count:]
+            missing = count - len(ids)
+            if missing:
+                reserved = reserve_ids(model, max(missing, ID_BLOCK_SIZE))
+                ids += reserved[:missing]
+                block = reserved[missing:]
+            self._blocks[model] = block
+            return ids
+
+
+def highest_id(model) -> int:
+    return max(
+        model._base_manager.using(alias).aggregate(top=Max("pk"))["top"] or 0
+        for alias in shards()
+    )
+
+
+def reserve_ids(model, count: int) -> range:
+    IdSequence = apps.get_model("social", "IdSequence")
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        sequence, _ = IdSequence.objects.select_for_update().get_or_create(
+            name=model._meta.label_lower,
+            defaults={"next_value": lambda: highest_id(model) + 1},
+        )
+        start = sequence.next_value
+        sequence.next_value = start + count
+        sequence.save(update_fields=["next_value"])
+    return range(start, start + count)
+
+
+def sync_id_sequences(model) -> None:
+    """Move the id sequences past the highest id on any shard: the one
+    of sharded writes, and the database sequence of each shard, used
+    again when SHARDS goes back to a single database"""
+    IdSequence = apps.get_model("social", "IdSequence")
+    top = highest_id(model)
+    IdSequence.objects.filter(
+        name=model._meta.label_lower, next_value__lte=top
+    ).update(next_value=top + 1)
+
+    for alias in shards():
+        connection = connections[alias]
+        statements = connection.ops.sequence_reset_sql(no_style(), [model])
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+id_allocator = IdAllocator()
+
+
+class ShardedModel(models.Model):
+    """Model whose rows live on the shard of shard_key, the name of a
+    foreign key to a profile"""
+
+    shard_key = None
+
+    class Meta:
+        abstract = True
+
+    @property
+    def shard(self) -> str:
+        field = self._meta.get_field(self.shard_key)
+        return shard_for(getattr(self, field.attname))
+
+    def save(self, *args, **kwargs):
+        if is_sharded():
+            # the key decides, whatever database the row was loaded from
+            kwargs["using"] = self.shard
+            if self.pk is None:
+                self.pk = id_allocator.allocate(type(self))[0]
+                kwargs["force_insert"] = True
+        super().save(*args, **kwargs)
+
+
+def shard_keys(query, field):
+    """Values of field the query is filtered on with = or IN, None
+    when it isn't filtered on it"""
+    where = query.where
+    if where.connector != AND or where.negated:
+        return None
+
+    keys = None
+    for lookup in where.children:
+        if (
+            not isinstance(lookup, (Exact, In))
+            or getattr(lookup.lhs, "target", None) != field
+            or hasattr(lookup.rhs, "resolve_expression")
+        ):
+            continue
+        values = {lookup.rhs} if isinstance(lookup, Exact) else lookup.rhs
+        values = {value for value in values if value is not None}
+        keys = values if keys is None else keys & values
+    return keys
+
+
+def check_local(query, *expressions) -> None:
+    """Raise NotSupportedError for joins and subqueries into other
+    tables, which a shard doesn't have the rows of"""
+    # trimmed joins stay in alias_map, unreferenced
+    tables = {
+        join.table_name
+        for alias, join in query.alias_map.items()
+        if query.alias_refcount[alias]
+    }
+    nodes = [query.where, *query.annotations.values(), *expressions]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, Query):
+            tables.add(node.model._meta.db_table)
+        elif hasattr(node, "get_source_expressions"):
+            nodes.extend(node.get_source_expressions())
+
+    foreign = tables - {query.model._meta.db_table}
+    if foreign:
+        raise NotSupportedError(
+            f"{query.model.__name__} queries can't reach "
+            f"{', '.join(sorted(foreign))} across shards"
+        )
+
+
+def related_lookups(queryset) -> tuple:
+    """select_related() of a model queryset as prefetch lookups"""
+    if queryset._iterable_class is not ModelIterable:
+        return ()
+
+    selected = queryset.query.select_related
+    if selected is True:
+        return tuple(
+            field.name
+            for field in queryset.model._meta.concrete_fields
+            if field.is_relation
+        )
+
+    def paths(tree, prefix=""):
+        for name, subtree in tree.items():
+            if subtree:
+                yield from paths(subtree, f"{prefix}{name}__")
+            else:
+                yield prefix + name
+
+    return tuple(paths(selected)) if selected else ()
+
+
+class ShardedQuerySet(models.QuerySet):
+    """QuerySet of a ShardedModel, a plain QuerySet with a single shard.
+
+    Explicit using() pins a query to one shard, as is. iterator() goes
+    through the shards one after another, without merging the ordering.
+    Aggregates can't be combined across shards."""
+
+    def shards(self) -> list:
+        """Aliases of the shards the query runs on"""
+        if self._db is not None:
+            return [self._db]
+
+        aliases = shards()
+        field = self.model._meta.get_field(self.model.shard_key)
+        keys = shard_keys(self.query, field)
+        if keys is None:
+            return aliases
+        targets = {shard_for(key) for key in keys}
+        return [alias for alias in aliases if alias in targets]
+
+    @property
+    def db(self):
+        if self._db is not None or not is_sharded():
+            return super().db
+        targets = self.shards()
+        # queries on several shards only run through the methods below
+        return targets[0] if len(targets) == 1 else DEFAULT_DB_ALIAS
+
+    def _scattered(self) -> bool:
+        return self._db is None and is_sharded()
+
+    def _on_shard(self, alias, *expressions):
+        """The query for one shard, its select_related() left to the
+        prefetches of the merged results"""
+        check_local(self.query, *expressions)
+        clone = self.using(alias)
+        clone._prefetch_related_lookups = ()
+        clone.query.select_related = False
+        return clone
+
+    def _fetch_all(self):
+        if self._result_cache is None and self._scattered():
+            self._result_cache = self._gather()
+            self._prefetch_related_lookups += related_lookups(self)
+        super()._fetch_all()
+
+    def _gather(self) -> list:
+        query = self.query
+        if query.group_by is not None or any(
+            getattr(annotation, "contains_aggregate", False)
+            for annotation in query.annotations.values()
+        ):
+            raise NotSupportedError("Can't aggregate across shards")
+
+        aliases = self.shards()
+        if len(aliases) == 1:
+            return list(self._on_shard(aliases[0]))
+
+        ordering = self._ordering()
+        names = (
+            None
+            if self._iterable_class is ModelIterable
+            else (self._row_names())
+        )
+        # ordering fields the values() rows lack, fetched for the merge
+        missing = [
+            item.removeprefix("-")
+            for item in ordering
+            if names is not None
+            and self._row_index(item.removeprefix("-"), names) is None
+        ]
+        if missing and self._iterable_class is NamedValuesListIterable:
+            raise NotSupportedError(
+                f"Can't merge shards ordered by {missing[0]} without its "
+                "values"
+            )
+
+        rows = []
+        for alias in aliases:
+            clone = self._on_shard(alias)
+            # every shard may hold the whole slice
+            clone.query.clear_limits()
+            clone.query.set_limits(high=query.high_mark)
+            if missing:
+                clone = clone.values_list(*names, *missing)
+            elif names is None:
+                # the merge reads the ordering fields of deferred models
+                loaded, defer = clone.query.deferred_loading
+                fields = {item.removeprefix("-") for item in ordering}
+                clone.query.deferred_loading = (
+                    (loaded - fields, True)
+                    if defer
+                    else (loaded | fields, False)
+                )
+            rows += clone
+
+        if query.distinct:
+            rows = list(
+                {
+                    tuple(row.values()) if isinstance(row, dict) else row: row
+                    for row in rows
+                }.values()
+            )
+        self._sort(rows, ordering, names, missing)
+        rows = rows[query.low_mark : query.high_mark]
+        if missing:
+            rows = [self._reshape(row[: len(names)], names) for row in rows]
+        return rows
+
+    def _ordering(self) -> list:
+        query = self.query
+        ordering = query.order_by or (
+            query.default_ordering and self.model._meta.ordering
+        )
+        for item in ordering or ():
+            if not isinstance(item, str) or item == "?":
+                raise NotSupportedError(
+                    f"Can't merge shards ordered by {item}"
+                )
+        return list(ordering or ())
+
+    def _sort(self, rows: list, ordering: list, names, missing) -> None:
+        """Sort the rows of several shards in the queryset's ordering,
+        names being those of values() rows and missing the ordering fields
+        fetched after them"""
+        # stable sorts from the last ordering field to the first
+        for item in reversed(ordering):
+            getter = self._row_getter(item.removeprefix("-"), names, missing)
+            # nulls last in ascending order, as PostgreSQL sorts them
+            rows.sort(
+                key=lambda row: (
+                    (value := getter(row)) is None,
+                    0 if value is None else value,
+                ),
+                reverse=item.startswith("-") == self.query.standard_ordering,
+            )
+
+    def _row_getter(self, name: str, names, missing):
+        """Function reading the field ordered by from a result row"""
+        if names is None:
+            if name in self.query.annotation_select:
+                return attrgetter(name)
+            return attrgetter(self._ordering_field(name).attname)
+
+        if missing:
+            return itemgetter(self._row_index(name, [*names, *missing]))
+        index = self._row_index(name, names)
+        if self._iterable_class is ValuesIterable:
+            return itemgetter(names[index])
+        if self._iterable_class is FlatValuesListIterable:
+            return lambda row: row
+        return itemgetter(index)
+
+    def _row_names(self) -> list:
+        """Names of the values in a values() row, in their order"""
+        query = self.query
+        if not self._fields:
+            return [*query.values_select, *query.annotation_select]
+        return [
+            *self._fields,
+            *(
+                name
+                for name in query.annotation_select
+                if name not in self._fields
+            ),
+        ]
+
+    def _row_index(self, name: str, names: list):
+        """Position of an ordering field among the row names, if there"""
+        if name in names:
+            return names.index(name)
+        field = self._ordering_field(name)
+        aliases = {field.name, field.attname}
+        if field.primary_key:
+            aliases.add("pk")
+        return next(
+            (i for i, row_name in enumerate(names) if row_name in aliases),
+            None,
+        )
+
+    def _ordering_field(self, name: str):
+        opts = self.model._meta
+        try:
+            return opts.pk if name == "pk" else opts.get_field(name)
+        except FieldDoesNotExist:
+            raise NotSupportedError(f"Can't merge shards ordered by {name}")
+
+    def _reshape(self, row: tuple, names: list):
+        """A values() row back from the tuple fetched for the merge"""
+        if self._iterable_class is ValuesIterable:
+            return dict(zip(names, row))
+        if self._iterable_class is FlatValuesListIterable:
+            return row[0]
+        return row
+
+    def iterator(self, chunk_size=None):
+        if not self._scattered():
+            return super().iterator(chunk_size)
+        return self._iterate_shards(chunk_size)
+
+    def _iterate_shards(self, chunk_size):
+        if self.query.is_sliced:
+            yield from self._gather()
+            return
+
+        lookups = self._prefetch_related_lookups + related_lookups(self)
+        if lookups and chunk_size is None:
+            chunk_size = ITERATOR_CHUNK_SIZE
+        for alias in self.shards():
+            clone = self._on_shard(alias)
+            clone._prefetch_related_lookups = lookups
+            yield from clone.iterator(chunk_size)
+
+    def count(self):
+        if self._result_cache is not None or not self._scattered():
+            return super().count()
+        if self.query.is_sliced or self.query.distinct:
+            return len(self)
+        return sum(self._on_shard(alias).count() for alias in self.shards())
+
+    def exists(self):
+        if self._result_cache is not None or not self._scattered():
+            return super().exists()
+        return any(self._on_shard(alias).exists() for alias in self.shards())
+
+    def aggregate(self, *args, **kwargs):
+        if not self._scattered():
+            return super().aggregate(*args, **kwargs)
+        aliases = self.shards()
+        if len(aliases) != 1:
+            raise NotSupportedError("Can't aggregate across shards")
+        return self._on_shard(aliases[0]).aggregate(*args, **kwargs)
+
+    def update(self, **kwargs):
+        if not self._scattered():
+            return super().update(**kwargs)
+        self._result_cache = None
+        return sum(
+            self._on_shard(alias, *kwargs.values()).update(**kwargs)
+            for alias in self.shards()
+        )
+
+    def delete(self):
+        if not self._scattered():
+            return super().delete()
+
+        total, per_model = 0, Counter()
+        for alias in self.shards():
+            deleted, counts = self._on_shard(alias).delete()
+            total += deleted
+            per_model.update(counts)
+        self._result_cache = None
+        return total, dict(per_model)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        if not is_sharded():
+            return super().bulk_create(objs, *args, **kwargs)
+
+        # ids of the database sequences would repeat on other shards
+        objs = list(objs)
+        new = [obj for obj in objs if obj.pk is None]
+        for obj, pk in zip(new, id_allocator.allocate(self.model, len(new))):
+            obj.pk = pk
+        if self._db is not None:
+            return super().bulk_create(objs, *args, **kwargs)
+
+        by_shard = defaultdict(list)
+        for obj in objs:
+            by_shard[obj.shard].append(obj)
+        for alias, group in by_shard.items():
+            self.using(alias).bulk_create(group, *args, **kwargs)
+        return objs
+
+
+def sharded_models() -> list:
+    return [
+        model for model in apps.get_models() if issubclass(model, ShardedModel)
+    ]
+
+
+def copy_rows(model, objs: list, alias: str) -> None:
+    """Insert rows as they are, with their ids and timestamps and
+    without signals, skipping the ones already there"""
+    fields = model._meta.concrete_fields
+    rows = model._base_manager.using(alias)
+    size = connections[alias].ops.bulk_batch_size(fields, objs) or len(objs)
+    for start in range(0, len(objs), size):
+        rows._insert(
+            objs[start : start + size],
+            fields=fields,
+            raw=True,
+            on_conflict=OnConflict.IGNORE,
+        )
+
+
+def move_misplaced(
+    model, alias: str, batch_size: int = RESHARD_BATCH_SIZE, dry_run=False
+) -> int:
+    """Move the rows of a shard whose key maps to another one there,
+    returns their number.
+
+    Each batch is copied before it's deleted from the shard, a failure
+    in between leaves copies the next run skips. Until then queries on
+    the key miss the rows and scattered queries find them twice."""
+    rows = model._base_manager.using(alias).order_by("pk")
+    key = model._meta.get_field(model.shard_key).attname
+    moved, last = 0, 0
+    while batch := list(
+        rows.filter(pk__gt=last).values_list("pk", key)[:batch_size]
+    ):
+        last = batch[-1][0]
+        misplaced = defaultdict(list)
+        for pk, key_value in batch:
+            if shard_for(key_value) != alias:
+                misplaced[shard_for(key_value)].append(pk)
+
+        for target, pks in misplaced.items():
+            moved += len(pks)
+            if dry_run:
+                continue
+            with transaction.atomic(using=alias), transaction.atomic(
+                using=target
+            ):
+                copy_rows(model, list(rows.filter(pk__in=pks)), target)
+                # a plain DELETE, the rows live on without cascades
+                rows.filter(pk__in=pks)._raw_delete(alias)
+    return moved
+
+
+class ShardRouter:
+    """Routes ShardedModel rows to their shard and every other model to
+    default, once SHARDS has several databases"""
+
+    def db_for_read(self, model, **hints):
+        # migrations pass their database to the historical models
+        if not is_sharded() or model._meta.apps is not apps:
+            return None
+        if not issubclass(model, ShardedModel):
+            return DEFAULT_DB_ALIAS
+
+        instance = hints.get("instance")
+        if isinstance(instance, model):
+            return instance.shard
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # rows reference each other by id across the databases
+        return True if is_sharded() else None
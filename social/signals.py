@@ -0,0 +1,195 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from social import changelog, jobs, locations, ranking, search, streaming
+from social.counters import follower_counter
+from social.models import City, Country, CountryAlias, Follow, Post, Profile
+from social.notifications import notification_buffer
+from social.sharding import is_sharded
+
+# sent with posts=[...] when posts go live, on creation or by the scheduler
+posts_published = Signal()
+
+
+@receiver(post_save, sender=Post)
+def publish_new_post(sender, instance, created, **kwargs):
+    if created and instance.published:
+        posts_published.send(sender=Post, posts=[instance])
+
+
+@receiver(posts_published)
+def fan_out_posts(sender, posts, **kwargs):
+    jobs.enqueue(
+        ranking.fan_out_published, post_ids=[post.pk for post in posts]
+    )
+
+
+@receiver(posts_published)
+def stream_posts(sender, posts, **kwargs):
+    streaming.publish_posts(posts)
+
+
+@receiver(posts_published)
+def notify_followers(sender, posts, **kwargs):
+    def notify():
+        for post in posts:
+            notification_buffer.post(post.profile_id)
+
+    transaction.on_commit(notify)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_follow(sender, instance, created, **kwargs):
+    if created:
+        ranking.backfill_follow(instance)
+        transaction.on_commit(
+            lambda: notification_buffer.follow(
+                instance.follower_id, instance.following_id
+            )
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def remove_follow(sender, instance, **kwargs):
+    ranking.remove_follow(instance)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        follower_counter.add(instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    follower_counter.add(instance.following_id, -1)
+
+
+@receiver(pre_save, sender=Profile)
+def set_names(sender, instance, **kwargs):
+    if instance._state.adding and not instance.full_name:
+        for field, value in search.profile_names(instance.user).items():
+            setattr(instance, field, value)
+
+
+@receiver(pre_save, sender=Profile)
+def remember_location(sender, instance, update_fields=None, **kwargs):
+    instance._counted_location = None
+    if instance._state.adding:
+        return
+    if update_fields is not None and not {"country", "city"} & set(
+        update_fields
+    ):
+        return
+    instance._counted_location = (
+        Profile.objects.active()
+        .filter(pk=instance.pk)
+        .values_list("country_id", "city_id")
+        .first()
+    )
+
+
+@receiver(post_save, sender=Profile)
+def count_location(sender, instance, created, **kwargs):
+    if instance.deleted_at is not None:
+        return
+    location = (instance.country_id, instance.city_id)
+    counted = getattr(instance, "_counted_location", None)
+    if created:
+        locations.count_location(*location)
+    elif counted is not None and counted != location:
+        locations.count_location(*counted, delta=-1)
+        locations.count_location(*location)
+
+
+@receiver(post_delete, sender=Profile)
+def uncount_location(sender, instance, **kwargs):
+    # deleted profiles were uncounted when their deletion was requested
+    if instance.deleted_at is None:
+        locations.count_location(
+            instance.country_id, instance.city_id, delta=-1
+        )
+
+
+@receiver(post_delete, sender=Post)
+def delete_post_rows(sender, instance, using, **kwargs):
+    """Likes, comments and feed items of a post deleted on another shard,
+    the cascade only reaches the shard's own tables"""
+    if using == DEFAULT_DB_ALIAS:
+        return
+    for relation in Post._meta.related_objects:
+        relation.related_model.objects.filter(
+            **{relation.field.name: instance.pk}
+        ).delete()
+
+
+@receiver(post_delete, sender=Profile)
+def delete_sharded_rows(sender, instance, **kwargs):
+    """Posts and follows of a deleted profile on the other shards"""
+    if is_sharded():
+        Post.objects.filter(profile=instance.pk).delete()
+        Follow.objects.filter(
+            Q(follower=instance.pk) | Q(following=instance.pk)
+        ).delete()
+
+
+@receiver(pre_save, sender=Country)
+@receiver(pre_save, sender=City)
+def set_location_key(sender, instance, **kwargs):
+    instance.key = search.normalize_name(instance.name)
+
+
+@receiver(pre_save, sender=CountryAlias)
+def set_alias_key(sender, instance, **kwargs):
+    instance.key = search.normalize_name(instance.key)
+
+
+@receiver(post_save, sender=CountryAlias)
+def merge_aliased_country(sender, instance, **kwargs):
+    """A country created for the alias' spelling before the alias"""
+    duplicate = (
+        Country.objects.filter(key=instance.key)
+        .exclude(pk=instance.country_id)
+        .first()
+    )
+    if duplicate is not None:
+        locations.merge_country(instance.country, duplicate)
+
+
+@receiver(post_save, sender=Post)
+def log_post_saved(sender, instance, created, **kwargs):
+    # scheduled posts are logged by the scheduler once published
+    if instance.published:
+        changelog.log_change(
+            "post", instance, "create" if created else "update"
+        )
+
+
+@receiver(post_delete, sender=Post)
+def log_post_deleted(sender, instance, **kwargs):
+    if instance.published:
+        changelog.log_change("post", instance, "delete")
+
+
+@receiver(post_save, sender=Follow)
+def log_follow_saved(sender, instance, created, **kwargs):
+    changelog.log_change("follow", instance, "create" if created else "update")
+
+
+@receiver(post_delete, sender=Follow)
+def log_follow_deleted(sender, instance, **kwargs):
+    changelog.log_change("follow", instance, "delete")
+
+
+@receiver(post_save, sender=Profile)
+def log_profile_saved(sender, instance, created, **kwargs):
+    changelog.log_change(
+        "profile", instance, "create" if created else "update"
+    )
+
+
+@receiver(post_delete, sender=Profile)
+def log_profile_deleted(sender, instance, **kwargs):
+    changelog.log_change("profile", instance, "delete")
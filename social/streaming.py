@@ -0,0 +1,224 @@
+"""Push new feed posts to clients over Server-Sent Events.
+
+The stream is an async iterator, so under ASGI every idle connection
+costs one coroutine and a small queue instead of a worker thread.
+Brokers route post events to the streams of the author's followers:
+InProcessBroker only reaches clients of the same process,
+PostgresBroker relays events between nodes with LISTEN/NOTIFY.
+"""
+
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+from rest_framework.renderers import BaseRenderer
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_SECONDS = 15
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class EventStreamRenderer(BaseRenderer):
+    media_type = "text/event-stream"
+    format = "event-stream"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+class Subscription:
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = set(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def deliver(self, message):
+        """Thread-safe hand-off of a message to the subscriber's loop"""
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # slow client: drop the event, it can catch up from the feed
+            pass
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels) -> Subscription:
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+    def publish(self, channel, message: dict) -> None:
+        self.dispatch(channel, message)
+
+    def dispatch(self, channel, message: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscriptions.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+
+class PostgresBroker(InProcessBroker):
+    """Relays events through PostgreSQL NOTIFY to every node.
+
+    Each process keeps one extra connection that LISTENs in a daemon
+    thread and dispatches notifications to its local subscribers."""
+
+    notify_channel = "social_feed_stream"
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def subscribe(self, channels) -> Subscription:
+        self._start_listener()
+        return super().subscribe(channels)
+
+    def publish(self, channel, message: dict) -> None:
+        payload = json.dumps({"channel": channel, "message": message})
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_notify(%s, %s)", [self.notify_channel, payload]
+            )
+
+    def _start_listener(self):
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = threading.Thread(
+                target=self._listen, name="feed stream listener", daemon=True
+            )
+            self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                self._listen_forever()
+            except Exception:
+                logger.exception("Feed stream listener failed, reconnecting")
+                time.sleep(5)
+
+    def _listen_forever(self):
+        import psycopg2
+
+        db = settings.DATABASES["default"]
+        listen_connection = psycopg2.connect(
+            dbname=db["NAME"],
+            user=db["USER"],
+            password=db["PASSWORD"],
+            host=db["HOST"],
+            port=db["PORT"],
+        )
+        listen_connection.autocommit = True
+        with listen_connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.notify_channel}")
+
+        try:
+            while True:
+                readable, _, _ = select.select(
+                    [listen_connection], [], [], 60
+                )
+                if not readable:
+                    continue
+                listen_connection.poll()
+                while listen_connection.notifies:
+                    self._relay(listen_connection.notifies.pop(0).payload)
+        finally:
+            listen_connection.close()
+
+    def _relay(self, payload):
+        try:
+            event = json.loads(payload)
+            self.dispatch(event["channel"], event["message"])
+        except (ValueError, KeyError):
+            logger.warning("Malformed feed event: %s", payload)
+
+
+@lru_cache
+def get_broker() -> InProcessBroker:
+    return import_string(settings.FEED_STREAM_BROKER)()
+
+
+def profile_channel(profile_id: int) -> str:
+    return f"profile:{profile_id}"
+
+
+def publish_posts(posts) -> None:
+    """Announce published posts to followers once the transaction commits"""
+    events = [
+        (
+            profile_channel(post.profile_id),
+            {
+                "id": post.id,
+                "profile": post.profile_id,
+                "title": post.title,
+                "created_at": post.created_at.isoformat(),
+            },
+        )
+        for post in posts
+    ]
+
+    def send():
+        broker = get_broker()
+        for channel, message in events:
+            broker.publish(channel, message)
+
+    transaction.on_commit(send)
+
+
+def format_event(event: str, data: dict = None, event_id=None) -> bytes:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data or {})}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+async def feed_events(profile_ids):
+    """Stream new posts of the given profiles with periodic heartbeats"""
+    subscription = get_broker().subscribe(
+        profile_channel(profile_id) for profile_id in profile_ids
+    )
+    try:
+        yield format_event("ready")
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    subscription.queue.get(), HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield b": heartbeat\n\n"
+                continue
+            yield format_event("post", message, event_id=message["id"])
+    finally:
+        subscription.close()
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from social.models import Follow, Profile
+
+AUTOCOMPLETE_URL = reverse("social:profile-autocomplete")
+ME_URL = reverse("user:manage")
+
+
+def create_profile(email, first_name, last_name):
+    user = get_user_model().objects.create_user(
+        email=email,
+        password="1qazcde3",
+        first_name=first_name,
+        last_name=last_name,
+    )
+    return Profile.objects.create(user=user)
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=0)
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.joan = create_profile("joan@social.com", "Joan", "Miró")
+        cls.jose = create_profile("jose@social.com", "José", "Garcia")
+        cls.john = create_profile("john@social.com", "John", "Smith")
+        cls.anna = create_profile("anna@social.com", "Anna", "Jones")
+        for follower in (cls.joan, cls.john, cls.anna):
+            Follow.objects.create(follower=follower, following=cls.jose)
+        Follow.objects.create(follower=cls.anna, following=cls.john)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.anna.user)
+
+    def test_autocomplete_ranked_by_followers(self):
+        """Test that prefix matches ignore case and accents and the most
+        followed profiles come first"""
+        res = self.client.get(AUTOCOMPLETE_URL, {"prefix": "  JO"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [profile["id"] for profile in res.data],
+            [self.jose.id, self.john.id, self.joan.id],
+        )
+        self.assertEqual(res.data[0]["full_name"], "José Garcia")
+        self.assertEqual(res.data[0]["follower_count"], 3)
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"prefix": "joan mi"})
+        self.assertEqual([p["id"] for p in res.data], [self.joan.id])
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"prefix": "jo", "limit": 1})
+        self.assertEqual([p["id"] for p in res.data], [self.jose.id])
+
+    def test_autocomplete_follows_changes(self):
+        """Test that renames and unfollows update the index"""
+        Follow.objects.filter(following=self.jose).delete()
+        self.client.force_authenticate(user=self.joan.user)
+        self.client.patch(ME_URL, {"first_name": "Ada"})
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"prefix": "jo"})
+        self.assertEqual(
+            [profile["id"] for profile in res.data],
+            [self.john.id, self.jose.id],
+        )
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"prefix": "ada"})
+        self.assertEqual([p["id"] for p in res.data], [self.joan.id])
+
+    def test_empty_prefix(self):
+        res = self.client.get(AUTOCOMPLETE_URL, {"prefix": " "})
+
+        self.assertEqual(res.data, [])
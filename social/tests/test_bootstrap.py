@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from social.models import Follow, Like, Post, Profile
+
+BOOTSTRAP_URL = reverse("social:bootstrap")
+
+
+def create_profile(email):
+    user = get_user_model().objects.create_user(
+        email=email,
+        password="1qazcde3",
+        first_name="name",
+        last_name="surname",
+    )
+    return Profile.objects.create(user=user)
+
+
+class BootstrapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.profile = create_profile("me@social.com")
+        cls.first = create_profile("first@social.com")
+        cls.second = create_profile("second@social.com")
+        Follow.objects.create(follower=cls.profile, following=cls.first)
+        Follow.objects.create(follower=cls.profile, following=cls.second)
+        Follow.objects.create(follower=cls.first, following=cls.profile)
+        cls.old_post = Post.objects.create(
+            profile=cls.first, title="Old", content="Content"
+        )
+        cls.new_post = Post.objects.create(
+            profile=cls.second, title="New", content="Content"
+        )
+        Like.objects.create(profile=cls.profile, post=cls.old_post)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.profile.user)
+
+    def test_bootstrap_in_one_response(self):
+        """Test that user, profile, feed and following come together"""
+        with self.assertNumQueries(4):
+            res = self.client.get(BOOTSTRAP_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        data = res.json()
+        self.assertEqual(data["user"]["email"], "me@social.com")
+        self.assertEqual(data["profile"]["id"], self.profile.id)
+        self.assertEqual(data["profile"]["followers"], 1)
+        self.assertEqual(data["profile"]["following"], 2)
+        self.assertEqual(
+            [post["id"] for post in data["feed"]],
+            [self.new_post.id, self.old_post.id],
+        )
+        self.assertTrue(data["feed"][1]["liked_by_me"])
+        self.assertEqual(data["following"], [self.second.id, self.first.id])
+
+    def test_conditional_get(self):
+        """Test that an unchanged bootstrap answers 304"""
+        etag = self.client.get(BOOTSTRAP_URL)["ETag"]
+
+        res = self.client.get(BOOTSTRAP_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Post.objects.create(profile=self.first, title="Newer", content="C")
+        res = self.client.get(BOOTSTRAP_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_bootstrap_without_profile(self):
+        user = get_user_model().objects.create_user(
+            email="new@social.com", password="1qazcde3"
+        )
+        self.client.force_authenticate(user=user)
+
+        data = self.client.get(BOOTSTRAP_URL).json()
+
+        self.assertIsNone(data["profile"])
+        self.assertEqual(data["feed"], [])
+        self.assertEqual(data["following"], [])
@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from social.models import Profile, Post, Comment
+
+
+def get_comments_url(post_id):
+    return reverse("social:post-comments", args=[post_id])
+
+
+def get_comment_detail_url(comment_id):
+    return reverse("social:comment-detail", args=[comment_id])
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=0)
+class CommentAPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email="user@social.com",
+            password="1qazcde3",
+            first_name="user_name",
+            last_name="user_surname",
+        )
+        cls.profile = Profile.objects.create(user=cls.user)
+        cls.post = Post.objects.create(
+            profile=cls.profile, title="Post", content="Content"
+        )
+        cls.other_post = Post.objects.create(
+            profile=cls.profile, title="Other", content="Content"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def comment(self, content, parent=None, post=None):
+        payload = {"content": content}
+        if parent:
+            payload["parent"] = parent
+        res = self.client.post(
+            get_comments_url((post or self.post).id), payload
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data["id"]
+
+    def test_comment_thread(self):
+        """Test that a thread page with its replies loads in one query"""
+        first = self.comment("first")
+        reply = self.comment("reply", parent=first)
+        nested = self.comment("nested", parent=reply)
+        second = self.comment("second")
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(get_comments_url(self.post.id) + "?depth=1")
+
+        comment_queries = [
+            query for query in queries if "social_comment" in query["sql"]
+        ]
+        thread = res.data["results"]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(comment_queries), 2)
+        self.assertEqual([comment["id"] for comment in thread], [first, second])
+        self.assertEqual(thread[0]["replies"][0]["id"], reply)
+        self.assertEqual(thread[0]["replies"][0]["reply_count"], 1)
+        self.assertEqual(thread[0]["replies"][0]["replies"], [])
+
+        res = self.client.get(get_comment_detail_url(reply))
+        self.assertEqual(res.data["replies"][0]["id"], nested)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 4)
+
+    def test_delete_subtree(self):
+        """Test that deleting a comment removes its replies"""
+        first = self.comment("first")
+        reply = self.comment("reply", parent=first)
+        self.comment("nested", parent=reply)
+
+        res = self.client.delete(get_comment_detail_url(reply))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            list(Comment.objects.values_list("id", flat=True)), [first]
+        )
+        self.assertEqual(Comment.objects.get(pk=first).reply_count, 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+    def test_reply_to_another_post(self):
+        """Test that replies stay within the post of their parent"""
+        parent = self.comment("first", post=self.other_post)
+
+        res = self.client.post(
+            get_comments_url(self.post.id),
+            {"content": "reply", "parent": parent},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from social.models import Follow, Post, Profile
+from social_media_api.pagination import EstimatedCountPaginator
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser(
+            email="admin@social.com",
+            password="1qazcde3",
+            first_name="admin_name",
+            last_name="admin_surname",
+        )
+        cls.profile = Profile.objects.create(user=cls.admin)
+        other = Profile.objects.create(
+            user=get_user_model().objects.create_user(
+                email="other@social.com",
+                password="1qazcde3",
+                first_name="other_name",
+                last_name="other_surname",
+            )
+        )
+        Follow.objects.create(follower=cls.profile, following=other)
+        for i in range(3):
+            Post.objects.create(
+                profile=cls.profile, title=f"Post {i}", content="Content"
+            )
+
+    def test_exact_count_without_estimate(self):
+        paginator = EstimatedCountPaginator(Post.objects.all(), 2)
+
+        self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.num_pages, 2)
+
+    @mock.patch(
+        "social_media_api.pagination.estimate_count", return_value=50_000
+    )
+    def test_estimate_above_threshold(self, estimate_count):
+        """Test that large tables are counted from the planner estimate"""
+        paginator = EstimatedCountPaginator(Post.objects.all(), 100)
+
+        self.assertEqual(paginator.count, 50_000)
+        self.assertEqual(paginator.num_pages, 500)
+        self.assertEqual(len(paginator.page(1).object_list), 3)
+
+    @mock.patch("social_media_api.pagination.estimate_count", return_value=5)
+    def test_exact_count_below_threshold(self, estimate_count):
+        paginator = EstimatedCountPaginator(Post.objects.all(), 100)
+
+        self.assertEqual(paginator.count, 3)
+
+    def test_admin_changelists(self):
+        """Test that changelists and prefix searches of large tables load"""
+        self.client.force_login(self.admin)
+
+        for url_name, search, result_count in (
+            ("admin:social_post_changelist", "Post", 3),
+            ("admin:social_profile_changelist", "admin", 1),
+            ("admin:social_follow_changelist", "", 1),
+            ("admin:user_user_changelist", "admin@", 1),
+        ):
+            res = self.client.get(reverse(url_name), {"q": search})
+
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(res.context["cl"].result_count, result_count)
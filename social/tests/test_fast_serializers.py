@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import serializers, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+
+from social.locations import get_city, get_country
+from social.models import Profile, Post
+from social.serializers import PostListSerializer, ProfileListSerializer
+from social_media_api.serializers import ValuesSerializerMixin
+
+POSTS_URL = reverse("social:post-list")
+PROFILES_URL = reverse("social:profile-list")
+
+
+class ValuesSerializerParityTests(TestCase):
+    """The .values() fast path must render exactly like the serializers"""
+
+    @classmethod
+    def setUpTestData(cls):
+        country = get_country("Ukraine")
+        city = get_city(country, "Kyiv")
+        for index in range(3):
+            user = get_user_model().objects.create_user(
+                email=f"user_{index}@social.com",
+                password="1qazcde3",
+                first_name=f"name_{index}",
+                last_name=f"surname_{index}",
+            )
+            profile = Profile.objects.create(
+                user=user,
+                country=country,
+                city=city if index else None,
+                image=f"uploads/profiles/{index}.png" if index else None,
+            )
+            for number in range(2):
+                Post.objects.create(
+                    profile=profile,
+                    title=f"Post {index}-{number}",
+                    content="Content #test",
+                )
+        cls.user = user
+
+    def setUp(self):
+        self.context = {"request": Request(APIRequestFactory().get("/"))}
+
+    def assert_same_rendering(self, serializer_class, queryset):
+        expected = serializer_class(
+            queryset, many=True, context=self.context
+        ).data
+        actual = serializer_class.serialize_values(queryset, self.context)
+
+        self.assertEqual(
+            JSONRenderer().render(actual), JSONRenderer().render(expected)
+        )
+
+    def test_post_list_parity(self):
+        self.assert_same_rendering(
+            PostListSerializer, Post.objects.select_related("profile__user")
+        )
+
+    def test_profile_list_parity(self):
+        self.assert_same_rendering(
+            ProfileListSerializer, Profile.objects.select_related("country", "city")
+        )
+
+    def test_list_endpoints_parity(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        for url in (POSTS_URL, PROFILES_URL, POSTS_URL + "?fields=id,user"):
+            with override_settings(FAST_LIST_SERIALIZATION=False):
+                expected = client.get(url)
+            with override_settings(FAST_LIST_SERIALIZATION=True):
+                actual = client.get(url)
+
+            self.assertEqual(actual.status_code, status.HTTP_200_OK)
+            self.assertEqual(actual.content, expected.content)
+
+
+class ValuesSerializerMixinTests(SimpleTestCase):
+    def test_represent_values_required(self):
+        with self.assertRaises(TypeError):
+
+            class IncompleteSerializer(
+                ValuesSerializerMixin, serializers.ModelSerializer
+            ):
+                class Meta:
+                    model = Post
+                    fields = ("id",)
+                    values_lookups = ("id",)
@@ -0,0 +1,72 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from social.models import Profile, Post, Follow
+
+STREAM_URL = reverse("social:post-stream")
+
+
+class FeedStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users = [
+            get_user_model().objects.create_user(
+                email=f"user_{index}@social.com",
+                password="1qazcde3",
+                first_name=f"name_{index}",
+                last_name=f"surname_{index}",
+            )
+            for index in range(3)
+        ]
+        cls.reader, cls.author, cls.stranger = [
+            Profile.objects.create(user=user) for user in users
+        ]
+        Follow.objects.create(follower=cls.reader, following=cls.author)
+        cls.token = str(AccessToken.for_user(cls.reader.user))
+
+    def create_post(self, profile, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(
+                profile=profile, title=title, content="Content"
+            )
+
+    async def test_stream_delivers_followed_posts(self):
+        """Test that only posts of followed profiles are pushed"""
+        res = await AsyncClient().get(
+            STREAM_URL,
+            headers={
+                "Authorization": f"Bearer {self.token}",
+                "Accept": "text/event-stream",
+            },
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+
+        events = aiter(res.streaming_content)
+        self.assertIn(b"event: ready", await anext(events))
+
+        await sync_to_async(self.create_post)(self.stranger, "Hidden")
+        post = await sync_to_async(self.create_post)(self.author, "Visible")
+
+        event = await asyncio.wait_for(anext(events), 5)
+        self.assertIn(b"event: post", event)
+        self.assertIn(f"id: {post.id}".encode(), event)
+        self.assertIn(b'"title": "Visible"', event)
+
+        await events.aclose()
+
+    def test_stream_refused_under_wsgi(self):
+        """Test that a WSGI worker doesn't hold the endless stream"""
+        client = APIClient()
+        client.force_authenticate(user=self.reader.user)
+
+        res = client.get(STREAM_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_501_NOT_IMPLEMENTED)
@@ -0,0 +1,152 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from social import jobs
+from social.models import FeedItem, Follow, Job, Post, Profile
+
+METRICS_URL = reverse("social:job-metrics")
+
+calls = []
+
+
+@jobs.job()
+def record(value):
+    calls.append(value)
+
+
+@jobs.job(max_attempts=2)
+def explode():
+    raise ValueError("boom")
+
+
+def create_profile(email, **extra):
+    user = get_user_model().objects.create_user(
+        email=email,
+        password="1qazcde3",
+        first_name="name",
+        last_name="surname",
+        **extra,
+    )
+    return Profile.objects.create(user=user)
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_post_fanned_out_by_worker(self):
+        """Test that a new post reaches feeds when its job runs"""
+        author = create_profile("author@social.com")
+        follower = create_profile("follower@social.com")
+        Follow.objects.create(follower=follower, following=author)
+
+        post = Post.objects.create(profile=author, title="T", content="C")
+
+        self.assertFalse(FeedItem.objects.filter(post=post).exists())
+        self.assertEqual(
+            Job.objects.get().name, "social.ranking.fan_out_published"
+        )
+        self.assertTrue(jobs.run_next_job())
+        self.assertTrue(
+            FeedItem.objects.filter(profile=follower, post=post).exists()
+        )
+        self.assertFalse(Job.objects.exists())
+        self.assertFalse(jobs.run_next_job())
+
+    def test_priority_and_run_at_order(self):
+        jobs.enqueue(record, value="low")
+        jobs.enqueue(record, value="later", priority=5, delay=timedelta(1))
+        jobs.enqueue(record, value="high", priority=5)
+
+        while jobs.run_next_job():
+            pass
+
+        self.assertEqual(calls, ["high", "low"])
+        self.assertEqual(Job.objects.get().kwargs, {"value": "later"})
+
+    def test_failed_job_retried_with_backoff(self):
+        """Test that a failing job is retried later until out of attempts"""
+        job = jobs.enqueue(explode)
+
+        jobs.run_next_job()
+
+        job.refresh_from_db()
+        self.assertEqual(job.state, Job.QUEUED)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+        self.assertIn("ValueError: boom", job.last_error)
+        self.assertFalse(jobs.run_next_job())
+
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs("social.jobs", "ERROR"):
+            jobs.run_next_job()
+
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.attempts), (Job.FAILED, 2))
+
+    def test_stale_job_requeued(self):
+        job = jobs.enqueue(record, value="stale")
+        jobs.claim_next_job()
+        Job.objects.update(started_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(jobs.requeue_stale_jobs(), 1)
+        call_command("run_workers", once=True, stdout=StringIO())
+
+        self.assertEqual(calls, ["stale"])
+        self.assertFalse(Job.objects.filter(pk=job.pk).exists())
+
+    @override_settings(JOBS_RUN_INLINE=True)
+    def test_inline_mode(self):
+        self.assertIsNone(jobs.enqueue(record, value="now"))
+        self.assertEqual(calls, ["now"])
+        self.assertFalse(Job.objects.exists())
+
+
+class JobMetricsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        admin = create_profile("admin@social.com", is_staff=True)
+        self.client.force_authenticate(user=admin.user)
+
+    def test_queue_depth_and_latency(self):
+        Job.objects.create(
+            name="waiting", run_at=timezone.now() - timedelta(minutes=1)
+        )
+        Job.objects.create(name="waiting", run_at=timezone.now())
+        Job.objects.create(
+            name="waiting", run_at=timezone.now() + timedelta(minutes=1)
+        )
+        Job.objects.create(
+            name="broken", state=Job.FAILED, run_at=timezone.now()
+        )
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        broken, waiting = res.data
+        self.assertEqual(
+            (broken["name"], broken["failed"], broken["latency"]),
+            ("broken", 1, 0),
+        )
+        self.assertEqual((waiting["queued"], waiting["scheduled"]), (2, 1))
+        self.assertGreaterEqual(waiting["latency"], 60)
+
+        res = self.client.get(METRICS_URL, {"format": "prometheus"})
+        self.assertIn(
+            'jobs_queued{name="waiting"} 2', res.content.decode().splitlines()
+        )
+
+    def test_metrics_for_admins_only(self):
+        user = create_profile("user@social.com")
+        self.client.force_authenticate(user=user.user)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import LiveServerTestCase, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from social.loadtest import Sample, compare, summarize
+from social.models import Post
+
+
+@override_settings(JOBS_RUN_INLINE=True, COUNTER_FLUSH_INTERVAL=0)
+class LoadTestTests(LiveServerTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def load_test(self, **options):
+        out = StringIO()
+        call_command(
+            "load_test",
+            url=self.live_server_url,
+            rps=20,
+            duration=1,
+            concurrency=2,
+            seed=1,
+            stdout=out,
+            **options,
+        )
+        return out.getvalue()
+
+    def test_synthetic_mix_saved(self):
+        """Test that a synthetic run succeeds and saves its results"""
+        self.load_test(output=self.path("run.json"))
+
+        with open(self.path("run.json")) as file:
+            results = json.load(file)
+        self.assertEqual(results["requests"], 20)
+        self.assertEqual(results["errors"], 0)
+        self.assertEqual(
+            sum(op["requests"] for op in results["operations"].values()), 20
+        )
+        self.assertIn("p99", results["latency"])
+
+    def test_replay_compared_with_baseline(self):
+        with open(self.path("mix.jsonl"), "w") as file:
+            for user in range(4):
+                record = {
+                    "method": "POST",
+                    "path": reverse("social:post-list"),
+                    "body": {"title": "Replayed", "content": "Content"},
+                    "user": user,
+                }
+                file.write(json.dumps(record) + "\n")
+        self.load_test(
+            replay=self.path("mix.jsonl"), output=self.path("base.json")
+        )
+
+        out = self.load_test(
+            replay=self.path("mix.jsonl"), compare=self.path("base.json")
+        )
+
+        self.assertEqual(Post.objects.filter(title="Replayed").count(), 8)
+        self.assertIn("Against the baseline", out)
+
+
+class SummaryTests(SimpleTestCase):
+    def test_errors_and_percentiles(self):
+        samples = [
+            Sample("feed", 200, latency / 1000) for latency in range(1, 100)
+        ]
+        samples += [Sample("feed", 500, 0.5), Sample("post", 0, 0.001)]
+
+        summary = summarize(samples, elapsed=2)
+
+        self.assertEqual(summary["throughput"], 50.5)
+        self.assertEqual(summary["errors"], 2)
+        self.assertEqual(summary["operations"]["feed"]["latency"]["p50"], 50)
+        self.assertEqual(summary["statuses"], {"0": 1, "200": 99, "500": 1})
+        rows = compare(summary, summary)
+        self.assertIn(("post", "error_rate", 1.0, 1.0), rows)
@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from social.deletion import purge_next_batch, request_deletion
+from social.models import City, Country, CountryAlias, Profile
+
+PROFILES_URL = reverse("social:profile-list")
+FACETS_URL = reverse("social:profile-facets")
+ME_URL = reverse("social:profile-profile")
+
+
+def create_user(email):
+    return get_user_model().objects.create_user(
+        email=email,
+        password="1qazcde3",
+        first_name="name",
+        last_name="surname",
+    )
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=0)
+class LocationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def create_profile(self, email, **location):
+        user = create_user(email)
+        self.client.force_authenticate(user=user)
+        res = self.client.post(PROFILES_URL, location)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return Profile.objects.get(pk=res.data["id"])
+
+    def facets(self, **params):
+        res = self.client.get(FACETS_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return (
+            {row["name"]: row["count"] for row in res.data["countries"]},
+            {row["name"]: row["count"] for row in res.data["cities"]},
+        )
+
+    def test_spellings_share_location_rows(self):
+        """Test that names differing in case and spaces are one location"""
+        first = self.create_profile(
+            "first@social.com", country="Ukraine", city="Kyiv"
+        )
+        second = self.create_profile(
+            "second@social.com", country=" ukraine", city="KYIV "
+        )
+
+        self.assertEqual(first.country, second.country)
+        self.assertEqual(first.city, second.city)
+        self.assertEqual(Country.objects.filter(key="ukraine").count(), 1)
+        self.assertEqual(self.facets(), ({"Ukraine": 2}, {"Kyiv": 2}))
+
+        res = self.client.get(PROFILES_URL, {"city": "kyiv"})
+        self.assertEqual(len(res.data), 2)
+        self.assertEqual(res.data[0]["country"], "Ukraine")
+
+    def test_facets_follow_moves_and_deletions(self):
+        """Test that counts change as profiles move and get deleted"""
+        moving = self.create_profile(
+            "moving@social.com", country="Ukraine", city="Kyiv"
+        )
+        self.create_profile("staying@social.com", country="Ukraine")
+        staying = Profile.objects.get(user__email="staying@social.com")
+
+        self.client.force_authenticate(user=moving.user)
+        res = self.client.patch(ME_URL, {"country": "Poland"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(res.data["city"])
+        self.assertEqual(self.facets(), ({"Ukraine": 1, "Poland": 1}, {}))
+
+        request_deletion(staying)
+        self.assertEqual(self.facets(), ({"Poland": 1}, {}))
+        while purge_next_batch():
+            pass
+        self.assertEqual(Country.objects.get(name="Ukraine").profile_count, 0)
+
+    def test_alias_resolves_to_country(self):
+        """Test that aliases of a country file profiles under it"""
+        self.create_profile("first@social.com", country="United States")
+
+        self.create_profile("second@social.com", country="usa", city="Boston")
+
+        self.assertFalse(Country.objects.filter(key="usa").exists())
+        res = self.client.get(PROFILES_URL, {"country": "USA"})
+        self.assertEqual(len(res.data), 2)
+        self.assertEqual(
+            self.facets(country="usa"), ({"United States": 2}, {"Boston": 1})
+        )
+
+    def test_new_alias_merges_its_country(self):
+        """Test that an alias for a spelling that got its own country moves
+        that country's profiles, cities and counts to the aliased one"""
+        first = self.create_profile(
+            "first@social.com", country="United States", city="Boston"
+        )
+        second = self.create_profile(
+            "second@social.com", country="Estados Unidos", city="Boston"
+        )
+        self.create_profile(
+            "third@social.com", country="Estados Unidos", city="Miami"
+        )
+        self.assertNotEqual(first.country, second.country)
+
+        CountryAlias.objects.create(
+            country=first.country, key="Estados  Unidos"
+        )
+
+        self.assertFalse(Country.objects.filter(key="estados unidos").exists())
+        second.refresh_from_db()
+        self.assertEqual(second.country, first.country)
+        self.assertEqual(second.city, first.city)
+        self.assertEqual(
+            self.facets(country="Estados Unidos"),
+            ({"United States": 3}, {"Boston": 2, "Miami": 1}),
+        )
+
+    def test_city_needs_country(self):
+        user = create_user("city@social.com")
+        self.client.force_authenticate(user=user)
+
+        res = self.client.post(PROFILES_URL, {"city": "Kyiv"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(City.objects.exists())
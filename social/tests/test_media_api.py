@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+MEDIA_ROOT = tempfile.mkdtemp()
+FILE_CONTENT = b"0123456789" * 10
+MEDIA_URL = "/media/uploads/posts/video.mp4"
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, MEDIA_ACCEL_REDIRECT_HEADER=None)
+class MediaServingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(MEDIA_ROOT, "uploads/posts"), exist_ok=True)
+        with open(
+            os.path.join(MEDIA_ROOT, "uploads/posts/video.mp4"), "wb"
+        ) as file:
+            file.write(FILE_CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="media@social.com",
+            password="1qazcde3",
+            first_name="media_name",
+            last_name="media_surname",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_media_requires_authentication(self):
+        res = APIClient().get(MEDIA_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_full_file(self):
+        res = self.client.get(MEDIA_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(res.streaming_content), FILE_CONTENT)
+        self.assertEqual(res["Accept-Ranges"], "bytes")
+        self.assertIn("ETag", res)
+
+    def test_byte_range(self):
+        res = self.client.get(MEDIA_URL, HTTP_RANGE="bytes=10-19")
+
+        self.assertEqual(res.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b"".join(res.streaming_content), FILE_CONTENT[10:20])
+        self.assertEqual(res["Content-Range"], "bytes 10-19/100")
+
+        res = self.client.get(MEDIA_URL, HTTP_RANGE="bytes=-5")
+        self.assertEqual(b"".join(res.streaming_content), FILE_CONTENT[-5:])
+
+        res = self.client.get(MEDIA_URL, HTTP_RANGE="bytes=500-")
+        self.assertEqual(
+            res.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+
+    def test_unusable_range_ignored(self):
+        """Test that malformed and multiple ranges get the whole file"""
+        for header in ("bytes=0-9,20-29", "bytes=9-0", "items=0-9"):
+            res = self.client.get(MEDIA_URL, HTTP_RANGE=header)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(b"".join(res.streaming_content), FILE_CONTENT)
+
+    def test_etag_not_modified(self):
+        etag = self.client.get(MEDIA_URL)["ETag"]
+        res = self.client.get(MEDIA_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_path_traversal(self):
+        res = self.client.get("/media/../settings.py")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT_HEADER="X-Accel-Redirect")
+    def test_accel_redirect(self):
+        res = self.client.get(MEDIA_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res["X-Accel-Redirect"], "/protected-media/uploads/posts/video.mp4"
+        )
+        self.assertEqual(res.content, b"")
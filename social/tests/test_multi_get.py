@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from social.models import Post, Profile
+from social.serializers import PostSerializer, ProfileSerializer
+from social_media_api.views import MAX_MULTI_GET_IDS
+
+POSTS_URL = reverse("social:post-list")
+PROFILES_URL = reverse("social:profile-list")
+
+
+def create_profile(email):
+    user = get_user_model().objects.create_user(
+        email=email,
+        password="1qazcde3",
+        first_name="name",
+        last_name="surname",
+    )
+    return Profile.objects.create(user=user)
+
+
+class MultiGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.profile = create_profile("author@social.com")
+        cls.other = create_profile("other@social.com")
+        cls.posts = [
+            Post.objects.create(
+                profile=cls.profile, title=f"Post {index}", content="Content"
+            )
+            for index in range(3)
+        ]
+        cls.scheduled = Post.objects.create(
+            profile=cls.profile,
+            title="Scheduled",
+            content="Content",
+            published=False,
+            publish_at=timezone.now() + timedelta(days=1),
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.other.user)
+
+    def test_posts_in_request_order(self):
+        """Test that posts follow the order of ids, missing ones marked"""
+        first, second, third = self.posts
+        ids = [third.id, 0, first.id, self.scheduled.id, third.id]
+
+        with self.assertNumQueries(2):
+            res = self.client.get(POSTS_URL, {"ids": ",".join(map(str, ids))})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"],
+            [
+                PostSerializer(third).data,
+                None,
+                PostSerializer(first).data,
+                None,
+            ],
+        )
+        self.assertEqual(res.data["missing"], [0, self.scheduled.id])
+
+    def test_profiles_with_detail_fields(self):
+        ids = f"{self.other.id},{self.profile.id}"
+
+        res = self.client.get(PROFILES_URL, {"ids": ids, "fields": "id"})
+        self.assertEqual(
+            res.data["results"],
+            [{"id": self.other.id}, {"id": self.profile.id}],
+        )
+
+        res = self.client.get(PROFILES_URL, {"ids": ids})
+        self.assertEqual(
+            res.data["results"][1], ProfileSerializer(self.profile).data
+        )
+        self.assertEqual(res.data["missing"], [])
+
+    def test_invalid_ids(self):
+        res = self.client.get(POSTS_URL, {"ids": "1,two"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        ids = ",".join(str(pk) for pk in range(1, MAX_MULTI_GET_IDS + 2))
+        res = self.client.get(PROFILES_URL, {"ids": ids})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,166 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from social.models import Profile, Post, Notification
+from social.notifications import (
+    NotificationBuffer,
+    upsert_digests,
+    window_start,
+)
+
+NOTIFICATIONS_URL = reverse("social:notification-list")
+UNREAD_COUNT_URL = reverse("social:notification-unread-count")
+MARK_READ_URL = reverse("social:notification-mark-read")
+
+
+def get_follow_url(profile_id):
+    return reverse("social:profile-follow", args=[profile_id])
+
+
+def create_profile(email, first_name):
+    user = get_user_model().objects.create_user(
+        email=email,
+        password="1qazcde3",
+        first_name=first_name,
+        last_name="surname",
+    )
+    return Profile.objects.create(user=user)
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=0)
+class NotificationAPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_profile("author@social.com", "author")
+        cls.readers = [
+            create_profile(f"reader{i}@social.com", f"reader{i}")
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def follow_author(self, reader):
+        self.client.force_authenticate(user=reader.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(get_follow_url(self.author.id))
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_follows_aggregate_into_one_digest(self):
+        """Test that follows in one window become a single notification"""
+        for reader in self.readers:
+            self.follow_author(reader)
+
+        self.client.force_authenticate(user=self.author.user)
+        res = self.client.get(NOTIFICATIONS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]["verb"], Notification.FOLLOW)
+        self.assertEqual(res.data[0]["event_count"], 3)
+        self.assertEqual(
+            res.data[0]["message"], "reader2 surname and 2 others followed you"
+        )
+
+        res = self.client.get(UNREAD_COUNT_URL)
+        self.assertEqual(res.data["unread"], 1)
+
+    def test_new_post_notifies_followers(self):
+        """Test that followers get a post digest from a new post"""
+        for reader in self.readers[:2]:
+            self.follow_author(reader)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(profile=self.author, title="a", content="a")
+            Post.objects.create(profile=self.author, title="b", content="b")
+
+        for reader in self.readers[:2]:
+            notification = Notification.objects.get(recipient=reader)
+            self.assertEqual(notification.verb, Notification.POST)
+            self.assertEqual(notification.event_count, 2)
+        self.assertFalse(
+            Notification.objects.filter(recipient=self.readers[2]).exists()
+        )
+
+    def test_failed_flush_not_counted_twice(self):
+        """Test that batches written before a failed one are rolled back
+        with it, so the retried events count once"""
+        for reader in self.readers:
+            self.follow_author(reader)
+        calls = []
+
+        def fail_second_batch(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("Lost connection")
+            upsert_digests(*args)
+
+        buffer = NotificationBuffer()
+        with (
+            mock.patch("social.notifications.UPSERT_BATCH_SIZE", 1),
+            mock.patch(
+                "social.notifications.upsert_digests", fail_second_batch
+            ),
+        ):
+            with self.assertRaises(RuntimeError):
+                buffer.post(self.author.id)
+            buffer.flush()
+
+        self.assertEqual(
+            list(
+                Notification.objects.filter(
+                    verb=Notification.POST
+                ).values_list("event_count", flat=True)
+            ),
+            [1] * len(self.readers),
+        )
+        for reader in self.readers:
+            reader.refresh_from_db()
+            self.assertEqual(reader.unread_notifications, 1)
+
+    def test_upserts_add_up(self):
+        """Test that digests flushed more than once add their counts and
+        turn unread once per read"""
+        reader, actor = self.readers[0], self.author.pk
+        window = window_start(timezone.now())
+
+        upsert_digests(Notification.POST, window, {reader.id: (2, actor)})
+        upsert_digests(Notification.POST, window, {reader.id: (3, actor)})
+        Notification.objects.update(read=True)
+        upsert_digests(Notification.POST, window, {reader.id: (1, actor)})
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.event_count, 6)
+        self.assertFalse(notification.read)
+        reader.refresh_from_db()
+        self.assertEqual(reader.unread_notifications, 2)
+
+    def test_mark_read_resets_unread_count(self):
+        """Test that reading notifications resets the counter until
+        a new event arrives in the digest"""
+        self.follow_author(self.readers[0])
+
+        self.client.force_authenticate(user=self.author.user)
+        res = self.client.post(MARK_READ_URL)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.get(UNREAD_COUNT_URL).data["unread"], 0)
+        self.assertTrue(Notification.objects.get().read)
+
+        self.follow_author(self.readers[1])
+
+        self.client.force_authenticate(user=self.author.user)
+        self.assertEqual(self.client.get(UNREAD_COUNT_URL).data["unread"], 1)
+        notification = Notification.objects.get()
+        self.assertFalse(notification.read)
+        self.assertEqual(notification.event_count, 2)
+
+    def test_notifications_require_authentication(self):
+        res = self.client.get(NOTIFICATIONS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
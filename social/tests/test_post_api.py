@@ -1,10 +1,18 @@
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
-from social.models import Profile, Post
+from social import ranking
+from social.counters import CounterBuffer, WriteBuffer
+from social.models import Profile, Post, Follow
+from social.scheduler import publish_due_posts
 from social.serializers import PostListSerializer, PostSerializer
 
 POSTS_URL = reverse("social:post-list")
@@ -28,6 +36,7 @@ class UnauthorizedUserTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+@override_settings(JOBS_RUN_INLINE=True)
 class PostAPITestCase(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -45,12 +54,8 @@ class PostAPITestCase(TestCase):
             last_name="test_user_surname",
         )
 
-        cls.profile_1 = Profile.objects.create(
-            user=cls.test_admin, country="USA", city="Boston"
-        )
-        cls.profile_2 = Profile.objects.create(
-            user=cls.test_user, country="Ukraine", city="Kyiv"
-        )
+        cls.profile_1 = Profile.objects.create(user=cls.test_admin)
+        cls.profile_2 = Profile.objects.create(user=cls.test_user)
         cls.post_1 = Post.objects.create(
             profile=cls.profile_1,
             title="Post_1",
@@ -150,6 +155,28 @@ class AuthorizedUserTests(PostAPITestCase):
         self.assertNotIn(serialized_post_3, res.data)
         self.assertNotIn(serialized_post_4, res.data)
 
+    def test_post_sparse_fieldsets(self):
+        """Test that ?fields= limits the payload and the loaded columns"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(POSTS_URL + "?fields=id,title")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), Post.objects.count())
+        for post in res.data:
+            self.assertEqual(set(post), {"id", "title"})
+        post_queries = [
+            query["sql"] for query in queries if "social_post" in query["sql"]
+        ]
+        self.assertEqual(len(post_queries), 1)
+        self.assertNotIn("user_user", post_queries[0])
+        self.assertNotIn("content", post_queries[0])
+
+        res = self.client.get(POSTS_URL + "?fields=id,user")
+        self.assertEqual(
+            res.data[0],
+            {"id": res.data[0]["id"], "user": self.profile_2.full_name},
+        )
+
     def test_post_detail(self):
         """Test that user can get any post detail"""
         # try to get post of another user
@@ -193,6 +220,165 @@ class AuthorizedUserTests(PostAPITestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_ranked_feed_endpoint(self):
+        """Test feed ranked by precomputed scores with cursor pagination"""
+        Follow.objects.create(
+            follower=self.profile_2, following=self.profile_1
+        )
+
+        res = self.client.get(POSTS_URL + "feed/?ranking=top")
+        ids = [post["id"] for post in res.data["results"]]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(ids, [self.post_2.id, self.post_1.id])
+        self.assertIn("next", res.data)
+
+        # interactions with the author lift all of their posts together
+        ranking.record_interaction(self.profile_2.id, self.profile_1.id)
+        new_post = Post.objects.create(
+            profile=self.profile_1, title="Post_5", content="Content #test"
+        )
+        res = self.client.get(POSTS_URL + "feed/?ranking=top&hashtag=test")
+        ids = [post["id"] for post in res.data["results"]]
+
+        self.assertEqual(ids, [new_post.id, self.post_1.id])
+
+        res = self.client.get(POSTS_URL + "feed/?ranking=top&page_size=1")
+        self.assertEqual(len(res.data["results"]), 1)
+        res = self.client.get(res.data["next"])
+        self.assertEqual(res.data["results"][0]["id"], self.post_2.id)
+
+        # unfollowing removes the author's posts from the ranked feed
+        Follow.objects.get(follower=self.profile_2).delete()
+        res = self.client.get(POSTS_URL + "feed/?ranking=top")
+        self.assertEqual(res.data["results"], [])
+
+    def test_scheduled_post(self):
+        """Test that scheduled posts stay hidden until the scheduler runs"""
+        Follow.objects.create(
+            follower=self.profile_1, following=self.profile_2
+        )
+        payload = {
+            "title": "Scheduled",
+            "content": "Later",
+            "publish_at": timezone.now() - timedelta(minutes=1),
+        }
+        res = self.client.post(POSTS_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        payload["publish_at"] = timezone.now() + timedelta(hours=1)
+        res = self.client.post(POSTS_URL, payload)
+        post_id = res.data["id"]
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        for url in (POSTS_URL, POSTS_URL + "me/"):
+            res = self.client.get(url)
+            self.assertNotIn(post_id, [post["id"] for post in res.data])
+
+        res = self.client.get(POSTS_URL + "scheduled/")
+        self.assertEqual([post["id"] for post in res.data], [post_id])
+
+        # the author can still edit it, nobody else can see it
+        res = self.client.get(get_post_detail_url(post_id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        admin_client = APIClient()
+        admin_client.force_authenticate(user=self.test_admin)
+        res = admin_client.get(get_post_detail_url(post_id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.assertEqual(publish_due_posts(), 0)
+        Post.objects.filter(pk=post_id).update(
+            publish_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(publish_due_posts(), 1)
+
+        res = self.client.get(POSTS_URL)
+        self.assertIn(post_id, [post["id"] for post in res.data])
+        res = admin_client.get(POSTS_URL + "feed/?ranking=top")
+        self.assertEqual(res.data["results"][0]["id"], post_id)
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=0)
+class LikeTests(PostAPITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.test_user)
+
+    def test_like_unlike(self):
+        """Test that users can like and unlike any post once"""
+        url = get_post_detail_url(self.post_1.id)
+
+        res = self.client.post(url + "like/")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.post(url + "like/")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(url)
+        self.assertEqual(res.data["like_count"], 1)
+        self.assertTrue(res.data["liked_by_me"])
+
+        res = self.client.post(url + "unlike/")
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        res = self.client.post(url + "unlike/")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(url)
+        self.assertEqual(res.data["like_count"], 0)
+        self.assertFalse(res.data["liked_by_me"])
+
+    def test_liked_by_me_single_query(self):
+        """Test that liked_by_me is resolved once for the whole page"""
+        for post in (self.post_1, self.post_3):
+            self.client.post(get_post_detail_url(post.id) + "like/")
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(POSTS_URL)
+
+        liked = {post["id"] for post in res.data if post["liked_by_me"]}
+        like_queries = [
+            query for query in queries if "social_like" in query["sql"]
+        ]
+        self.assertEqual(liked, {self.post_1.id, self.post_3.id})
+        self.assertEqual(len(like_queries), 1)
+
+    def test_like_counter_is_batched(self):
+        """Test that buffered increments are written in one UPDATE"""
+        counter = CounterBuffer(Post, "like_count")
+        self.addCleanup(counter.stop)
+
+        with override_settings(COUNTER_FLUSH_INTERVAL=3600):
+            with self.assertNumQueries(0):
+                for post in (self.post_1, self.post_1, self.post_2):
+                    counter.add(post.id)
+
+        with self.assertNumQueries(1):
+            counter.flush()
+
+        self.post_1.refresh_from_db()
+        self.post_2.refresh_from_db()
+        self.assertEqual(self.post_1.like_count, 2)
+        self.assertEqual(self.post_2.like_count, 1)
+
+    def test_write_buffer_needs_write(self):
+        class IncompleteBuffer(WriteBuffer):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteBuffer()
+
+    def test_stopped_counter_writes_pending(self):
+        counter = CounterBuffer(Post, "like_count")
+        with override_settings(COUNTER_FLUSH_INTERVAL=3600):
+            counter.add(self.post_1.id)
+
+        counter.stop()
+
+        self.assertIsNone(counter._worker)
+        self.post_1.refresh_from_db()
+        self.assertEqual(self.post_1.like_count, 1)
+
 
 class AdminUserTest(PostAPITestCase):
     def setUp(self):
@@ -1,10 +1,13 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.db.models import Q
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
+from social.locations import get_city, get_country
 from social.models import Profile
 from social.serializers import ProfileListSerializer, ProfileSerializer
 
@@ -21,6 +24,13 @@ def create_temp_user():
     return user
 
 
+def create_profile(user, country, city):
+    country = get_country(country)
+    return Profile.objects.create(
+        user=user, country=country, city=get_city(country, city)
+    )
+
+
 def get_profile_detail_url(profile_id):
     return reverse("social:profile-detail", args=[profile_id])
 
@@ -60,15 +70,9 @@ class ProfileAPITestCase(TestCase):
             first_name="user_3_name",
             last_name="user_3_surname",
         )
-        cls.profile_1 = Profile.objects.create(
-            user=cls.user_1, country="USA", city="Boston"
-        )
-        cls.profile_2 = Profile.objects.create(
-            user=cls.user_2, country="Ukraine", city="Kyiv"
-        )
-        cls.profile_3 = Profile.objects.create(
-            user=cls.user_3, country="Poland", city="Wroclaw"
-        )
+        cls.profile_1 = create_profile(cls.user_1, "USA", "Boston")
+        cls.profile_2 = create_profile(cls.user_2, "Ukraine", "Kyiv")
+        cls.profile_3 = create_profile(cls.user_3, "Poland", "Wroclaw")
 
 
 class AuthorizedUserTests(ProfileAPITestCase):
@@ -94,6 +98,23 @@ class AuthorizedUserTests(ProfileAPITestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_profile_list_reads_stored_full_name(self):
+        """Test that names are listed without joining the user table"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(PROFILES_URL + "?name=user_1_name")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [profile["full_name"] for profile in res.data],
+            ["user_1_name user_1_surname"],
+        )
+        self.assertFalse(
+            any(
+                "user_user" in query["sql"] and "social_profile" in query["sql"]
+                for query in queries
+            )
+        )
+
     def test_user_profile_operation(self):
         """Test that authorized users can create/update/delete their profile"""
         # try to create profile
@@ -123,7 +144,7 @@ class AuthorizedUserTests(ProfileAPITestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         for key in payload:
-            self.assertEqual(payload[key], getattr(profile, key))
+            self.assertEqual(payload[key], str(getattr(profile, key)))
 
         # try to delete own profile
         res = self.client.delete(url)
@@ -131,8 +152,8 @@ class AuthorizedUserTests(ProfileAPITestCase):
 
     def test_profile_filtering(self):
         """Test filtering by user full name, country and city"""
-        res = self.client.get(PROFILES_URL + "?country=US")
-        profiles = Profile.objects.filter(country__icontains="US")
+        res = self.client.get(PROFILES_URL + "?country=us")
+        profiles = Profile.objects.filter(country__name="United States")
         serializer = ProfileListSerializer(profiles, many=True)
 
         serialized_user_1 = ProfileListSerializer(self.user_1.profile).data
@@ -145,8 +166,8 @@ class AuthorizedUserTests(ProfileAPITestCase):
         self.assertNotIn(serialized_user_2, res.data)
         self.assertNotIn(serialized_user_3, res.data)
 
-        res = self.client.get(PROFILES_URL + "?city=Kyiv")
-        profiles = Profile.objects.filter(city__icontains="Kyiv")
+        res = self.client.get(PROFILES_URL + "?city=kyiv")
+        profiles = Profile.objects.filter(city__name="Kyiv")
         serializer = ProfileListSerializer(profiles, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -168,6 +189,25 @@ class AuthorizedUserTests(ProfileAPITestCase):
         self.assertNotIn(serialized_user_2, res.data)
         self.assertIn(serialized_user_3, res.data)
 
+    def test_profile_sparse_fieldsets(self):
+        """Test that ?fields= skips unneeded joins and prefetches"""
+        url = get_profile_detail_url(self.profile_1.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url + "?fields=id,full_name")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            {"id": self.profile_1.id, "full_name": self.profile_1.full_name},
+        )
+        self.assertFalse(
+            any("social_follow" in query["sql"] for query in queries)
+        )
+
+        res = self.client.get(url + "?fields=followers,following")
+        self.assertEqual(res.data, {"followers": 0, "following": 0})
+
     def test_profile_detail(self):
         """Test that user can get any profile but update/delete is forbidden"""
         # try to get another user profile
@@ -0,0 +1,178 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from social.comments import create_comment
+from social.deletion import purge_next_batch, request_deletion
+from social.models import (
+    Comment,
+    FeedItem,
+    Follow,
+    Like,
+    Post,
+    Profile,
+    ProfileDeletion,
+)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+POSTS_URL = reverse("social:post-list")
+
+
+def get_comments_url(post_id):
+    return reverse("social:post-comments", args=[post_id])
+
+
+def get_comment_detail_url(comment_id):
+    return reverse("social:comment-detail", args=[comment_id])
+
+
+def get_profile_detail_url(profile_id):
+    return reverse("social:profile-detail", args=[profile_id])
+
+
+def create_profile(email):
+    user = get_user_model().objects.create_user(
+        email=email,
+        password="1qazcde3",
+        first_name="name",
+        last_name="surname",
+    )
+    return Profile.objects.create(user=user)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, COUNTER_FLUSH_INTERVAL=0)
+class ProfileDeletionTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.profile = create_profile("deleted@social.com")
+        self.other = create_profile("other@social.com")
+        Follow.objects.create(follower=self.other, following=self.profile)
+        Follow.objects.create(follower=self.profile, following=self.other)
+
+        self.post = Post.objects.create(
+            profile=self.profile, title="Post", content="Content"
+        )
+        self.post.media.save("video.mp4", ContentFile(b"video"))
+        self.other_post = Post.objects.create(
+            profile=self.other, title="Other", content="Content"
+        )
+        Like.objects.create(profile=self.profile, post=self.other_post)
+        Post.objects.filter(pk=self.other_post.pk).update(like_count=1)
+
+        root = create_comment(self.other_post, self.other, "root")
+        self.reply = create_comment(
+            self.other_post, self.profile, "reply", parent=root
+        )
+        create_comment(self.other_post, self.other, "nested", self.reply)
+        self.root = Comment.objects.get(pk=root.pk)
+
+        self.client = APIClient()
+
+    def purge(self, batch_size=500):
+        batches = 0
+        with self.captureOnCommitCallbacks(execute=True):
+            while purge_next_batch(batch_size):
+                batches += 1
+        return batches
+
+    def test_delete_hides_profile_immediately(self):
+        """Test that a deleted profile and its posts disappear at once"""
+        self.client.force_authenticate(user=self.profile.user)
+        res = self.client.delete(get_profile_detail_url(self.profile.id))
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.client.force_authenticate(user=self.other.user)
+        res = self.client.get(get_profile_detail_url(self.profile.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.get(POSTS_URL)
+        self.assertEqual(
+            [post["id"] for post in res.data], [self.other_post.id]
+        )
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
+
+    def test_delete_hides_comments_immediately(self):
+        request_deletion(self.profile)
+        self.client.force_authenticate(user=self.other.user)
+
+        res = self.client.get(get_comments_url(self.other_post.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["id"], self.root.id)
+        self.assertEqual(res.data["results"][0]["replies"], [])
+
+        res = self.client.get(get_comment_detail_url(self.reply.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_purge_removes_profile_data(self):
+        """Test that purging deletes rows and files and fixes counters"""
+        media = self.post.media.name
+        request_deletion(self.profile)
+
+        self.purge()
+
+        self.assertFalse(Profile.objects.filter(pk=self.profile.pk).exists())
+        self.assertTrue(
+            get_user_model().objects.filter(pk=self.profile.user_id).exists()
+        )
+        self.assertFalse(Post.objects.filter(profile=self.profile).exists())
+        self.assertFalse(Follow.objects.filter(follower=self.other).exists())
+        self.assertFalse(FeedItem.objects.filter(post=self.post).exists())
+        self.assertFalse(default_storage.exists(media))
+
+        self.other_post.refresh_from_db()
+        self.assertEqual(self.other_post.like_count, 0)
+        self.assertEqual(self.other_post.comment_count, 1)
+        self.root.refresh_from_db()
+        self.assertEqual(self.root.reply_count, 0)
+
+        deletion = ProfileDeletion.objects.get()
+        self.assertIsNone(deletion.profile)
+        self.assertIsNotNone(deletion.finished_at)
+        self.assertEqual(deletion.deleted_files, 1)
+
+    def test_purge_runs_in_bounded_batches(self):
+        """Test that every batch deletes at most batch_size rows"""
+        Post.objects.create(profile=self.profile, title="2", content="2")
+        deletion = request_deletion(self.profile, delete_user=True)
+        self.assertFalse(
+            get_user_model().objects.get(pk=self.profile.user_id).is_active
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            purge_next_batch(batch_size=1)
+        deletion.refresh_from_db()
+        self.assertEqual(deletion.phase, "comments")
+        self.assertEqual(deletion.deleted_rows, 1)
+
+        batches = self.purge(batch_size=1)
+
+        deletion.refresh_from_db()
+        self.assertEqual(deletion.phase, "profile")
+        self.assertLessEqual(deletion.deleted_rows, batches + 1)
+        self.assertFalse(
+            get_user_model().objects.filter(pk=self.profile.user_id).exists()
+        )
+
+    def test_hard_deleted_profile_finishes_deletion(self):
+        """Test that a deletion whose profile was removed some other way
+        is finished instead of failing on every run"""
+        deletion = request_deletion(self.profile)
+        self.profile.user.delete()
+
+        self.assertEqual(self.purge(), 1)
+
+        deletion.refresh_from_db()
+        self.assertIsNone(deletion.profile)
+        self.assertIsNotNone(deletion.finished_at)
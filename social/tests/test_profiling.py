@@ -0,0 +1,71 @@
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from social_media_api.profiling import DUMP_HEADER
+
+POSTS_URL = reverse("social:post-list")
+PROFILING_DIR = Path(tempfile.mkdtemp())
+
+
+@override_settings(PROFILING_DIR=PROFILING_DIR)
+class ProfilingTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(PROFILING_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.staff = get_user_model().objects.create_user(
+            email="staff@social.com", password="1qazcde3", is_staff=True
+        )
+        self.user = get_user_model().objects.create_user(
+            email="user@social.com", password="1qazcde3"
+        )
+
+    def tearDown(self):
+        for path in PROFILING_DIR.iterdir():
+            path.unlink()
+
+    def get_posts(self, user, **headers):
+        token = AccessToken.for_user(user)
+        return self.client.get(
+            POSTS_URL, HTTP_AUTHORIZATION=f"Bearer {token}", **headers
+        )
+
+    def test_staff_request_profiled_on_header(self):
+        """Test that staff get their request profiled with the header"""
+        res = self.get_posts(self.staff, HTTP_X_PROFILE="1")
+
+        name = res[DUMP_HEADER]
+        self.assertTrue(name.startswith("social.post-list."))
+        self.assertTrue((PROFILING_DIR / name).exists())
+
+        out = StringIO()
+        call_command("profile_summary", view="social:post-list", stdout=out)
+        self.assertIn("social.post-list: 1 profiles", out.getvalue())
+        self.assertIn("cumulative", out.getvalue())
+
+    def test_header_ignored_for_other_users(self):
+        res = self.get_posts(self.user, HTTP_X_PROFILE="1")
+
+        self.assertNotIn(DUMP_HEADER, res)
+        self.assertEqual(list(PROFILING_DIR.iterdir()), [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled_requests_profiled(self):
+        self.get_posts(self.user)
+        self.get_posts(self.user)
+
+        out = StringIO()
+        call_command("profile_summary", list=True, stdout=out)
+        self.assertIn("social.post-list: 2 profiles", out.getvalue())
@@ -0,0 +1,55 @@
+import gzip
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from social_media_api.schema import generate_schema, render_schema
+
+SCHEMA_URL = reverse("schema")
+
+
+class SchemaTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            email="schema@social.com", password="1qazcde3"
+        )
+        self.client.force_authenticate(user=user)
+
+    def test_committed_schema_is_current(self):
+        """Test that schema.yml matches the schema generated from code"""
+        with open(settings.OPENAPI_SCHEMA_FILE, "rb") as file:
+            committed = file.read()
+
+        self.assertEqual(
+            committed.decode(),
+            render_schema(generate_schema()).decode(),
+            "schema.yml is out of date, regenerate it with "
+            "`python manage.py spectacular --file schema.yml`",
+        )
+
+    def test_schema_etag(self):
+        res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(b"openapi:", res.content)
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+
+    def test_schema_gzip_and_json(self):
+        res = self.client.get(
+            SCHEMA_URL + "?format=json", HTTP_ACCEPT_ENCODING="gzip, br"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        schema = json.loads(gzip.decompress(res.content))
+        self.assertEqual(schema["info"]["title"], "Social Media API")
@@ -0,0 +1,242 @@
+import copy
+import itertools
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import NotSupportedError, connections
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from social.comments import create_comment
+from social.models import Comment, Follow, Like, Post, Profile
+from social.sharding import jump_hash, shard_for
+
+POSTS_URL = reverse("social:post-list")
+FEED_URL = reverse("social:post-feed")
+EXTRA_SHARDS = ("shard_1", "shard_2")
+SHARDS = ["default", *EXTRA_SHARDS]
+
+author_numbers = itertools.count(1)
+
+
+def create_profile(email=None):
+    user = get_user_model().objects.create_user(
+        email=email or f"author{next(author_numbers)}@social.com",
+        password="1qazcde3",
+        first_name="name",
+        last_name="surname",
+    )
+    return Profile.objects.create(user=user)
+
+
+class JumpHashTests(SimpleTestCase):
+    def test_new_bucket_takes_its_share_only(self):
+        """Test that adding a bucket moves keys to it and nowhere else"""
+        moved = 0
+        for key in range(10_000):
+            before, after = jump_hash(key, 3), jump_hash(key, 4)
+            self.assertIn(after, (before, 3))
+            moved += before != after
+
+        self.assertAlmostEqual(moved / 10_000, 1 / 4, delta=0.03)
+
+
+@override_settings(
+    SHARDS=SHARDS, JOBS_RUN_INLINE=True, COUNTER_FLUSH_INTERVAL=0
+)
+class ShardingTests(TestCase):
+    """Runs with two more test databases, created like default's, as
+    shard_1 and shard_2"""
+
+    # the shards only exist once setUpClass added them
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.shard_names = {}
+        for alias in EXTRA_SHARDS:
+            settings_dict = copy.deepcopy(connections["default"].settings_dict)
+            if settings_dict["ENGINE"].endswith("sqlite3"):
+                settings_dict["NAME"] = ":memory:"
+                settings_dict["TEST"]["NAME"] = None
+            else:
+                name = f"{settings_dict['NAME']}_{alias}"
+                settings_dict["TEST"]["NAME"] = name
+            connections.settings[alias] = settings_dict
+            cls.shard_names[alias] = settings_dict["NAME"]
+            connections[alias].creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias, name in cls.shard_names.items():
+            connections[alias].creation.destroy_test_db(name, verbosity=0)
+            del connections[alias]
+            del connections.settings[alias]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.me = create_profile("me@social.com")
+        self.client.force_authenticate(user=self.me.user)
+
+    def create_authors(self, shard_count=len(SHARDS)):
+        """Profiles until every shard of the first shard_count has one,
+        by shard"""
+        authors = {}
+        while len(authors) < shard_count:
+            profile = create_profile()
+            authors.setdefault(
+                SHARDS[jump_hash(profile.pk, shard_count)], profile
+            )
+        return authors
+
+    def test_rows_stored_on_their_profile_shard(self):
+        authors = self.create_authors()
+        posts = [
+            Post.objects.create(profile=author, title="Title", content="C")
+            for author in authors.values()
+        ]
+        Follow.objects.bulk_create(
+            Follow(follower=author, following=self.me)
+            for author in authors.values()
+        )
+
+        self.assertEqual(len({post.pk for post in posts}), len(posts))
+        for alias, author in authors.items():
+            self.assertEqual(
+                list(
+                    Post.objects.using(alias).values_list("profile", flat=True)
+                ),
+                [author.pk],
+            )
+            self.assertTrue(
+                Follow.objects.using(alias).filter(follower=author).exists()
+            )
+        self.assertEqual(Post.objects.count(), len(posts))
+        self.assertEqual(Post.objects.get(pk=posts[-1].pk), posts[-1])
+        self.assertEqual(self.me.followers.count(), len(authors))
+
+    def test_query_joining_other_tables_rejected(self):
+        with self.assertRaises(NotSupportedError):
+            list(Post.objects.filter(profile__full_name="name surname"))
+
+    def test_feed_merged_by_date_across_shards(self):
+        authors = self.create_authors()
+        for author in authors.values():
+            self.client.post(
+                reverse("social:profile-follow", args=[author.pk])
+            )
+        start = timezone.now() - timedelta(hours=1)
+        posts = []
+        for minutes in range(6):
+            author = list(authors.values())[minutes % len(authors)]
+            post = Post.objects.create(
+                profile=author, title=f"Post {minutes}", content="C"
+            )
+            Post.objects.filter(pk=post.pk).update(
+                created_at=start + timedelta(minutes=minutes)
+            )
+            posts.append(post.pk)
+
+        res = self.client.get(FEED_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([post["id"] for post in res.data], posts[::-1])
+
+        res = self.client.get(POSTS_URL)
+
+        self.assertEqual([post["id"] for post in res.data], posts[::-1])
+        self.assertEqual(res.data[0]["user"], "name surname")
+        self.assertEqual(
+            list(Post.objects.values_list("title", flat=True)[:2]),
+            ["Post 5", "Post 4"],
+        )
+
+        res = self.client.get(FEED_URL, {"ranking": "top"})
+
+        self.assertEqual(
+            sorted(post["id"] for post in res.data["results"]), posts
+        )
+
+    def test_follow_and_unfollow_across_shards(self):
+        authors = self.create_authors()
+        target = authors["shard_2"]
+
+        res = self.client.post(
+            reverse("social:profile-follow", args=[target.pk])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        follow = Follow.objects.get(follower=self.me, following=target)
+        self.assertTrue(
+            Follow.objects.using(shard_for(self.me.pk))
+            .filter(pk=follow.pk)
+            .exists()
+        )
+        res = self.client.get(
+            reverse("social:profile-followers", args=[target.pk])
+        )
+        self.assertEqual(len(res.data), 1)
+
+        res = self.client.post(
+            reverse("social:profile-unfollow", args=[target.pk])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Follow.objects.filter(following=target).exists())
+
+    def test_post_deleted_with_its_rows_on_default(self):
+        authors = self.create_authors()
+        author = authors["shard_1"]
+        post = Post.objects.create(profile=author, title="Title", content="C")
+        Like.objects.create(profile=self.me, post=post)
+        create_comment(post, self.me, "Comment")
+        self.client.force_authenticate(user=author.user)
+
+        res = self.client.delete(reverse("social:post-detail", args=[post.pk]))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Post.objects.filter(pk=post.pk).exists())
+        self.assertFalse(Like.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_reshard_moves_rows_to_new_shard(self):
+        with self.settings(SHARDS=SHARDS[:2]):
+            authors = list(self.create_authors(shard_count=2).values())
+            # and one moving to shard_2 once it's added
+            while all(jump_hash(author.pk, 3) != 2 for author in authors):
+                authors.append(create_profile())
+            posts = [
+                Post.objects.create(profile=author, title="Title", content="C")
+                for author in authors
+            ]
+            Follow.objects.bulk_create(
+                Follow(follower=author, following=self.me)
+                for author in authors
+            )
+
+        out = StringIO()
+        call_command("reshard", stdout=out)
+
+        self.assertRegex(out.getvalue(), r"Moved [1-9]\d* posts from ")
+        for alias in SHARDS:
+            for post in Post.objects.using(alias):
+                self.assertEqual(shard_for(post.profile_id), alias)
+            for follow in Follow.objects.using(alias):
+                self.assertEqual(shard_for(follow.follower_id), alias)
+        self.assertEqual(
+            sorted(Post.objects.values_list("pk", flat=True)),
+            sorted(post.pk for post in posts),
+        )
+        self.assertEqual(self.me.followers.count(), len(authors))
+        self.assertEqual(
+            Post.objects.get(pk=posts[-1].pk).created_at, posts[-1].created_at
+        )
@@ -0,0 +1,172 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from social.changelog import compact
+from social.deletion import request_deletion
+from social.models import ChangeLogEntry, Follow, Post, Profile
+from social.scheduler import publish_due_posts
+
+SYNC_URL = reverse("social:sync")
+ME_URL = reverse("user:manage")
+
+
+def create_profile(email):
+    user = get_user_model().objects.create_user(
+        email=email,
+        password="1qazcde3",
+        first_name="name",
+        last_name="surname",
+    )
+    return Profile.objects.create(user=user)
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncTests(TestCase):
+    def setUp(self):
+        self.profile = create_profile("me@social.com")
+        self.followed = create_profile("followed@social.com")
+        self.stranger = create_profile("stranger@social.com")
+        self.follow = Follow.objects.create(
+            follower=self.profile, following=self.followed
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.profile.user)
+
+    def sync(self, cursor=None, **params):
+        if cursor:
+            params["since"] = cursor
+        res = self.client.get(SYNC_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_relevant_changes_since_cursor(self):
+        """Test that only changes after the cursor that concern the user
+        are returned, deletions included"""
+        data = self.sync()
+        self.assertTrue(data["reset"])
+        cursor = data["cursor"]
+
+        post = Post.objects.create(
+            profile=self.followed, title="Post", content="Content"
+        )
+        Post.objects.create(profile=self.stranger, title="Other", content="C")
+        follower = Follow.objects.create(
+            follower=self.stranger, following=self.profile
+        )
+        post.title = "Edited"
+        post.save()
+        follower_id = follower.id
+        follower.delete()
+
+        data = self.sync(cursor)
+
+        self.assertFalse(data["reset"])
+        self.assertEqual(
+            [(c["model"], c["id"], c["action"]) for c in data["changes"]],
+            [
+                ("post", post.id, "create"),
+                ("follow", follower_id, "create"),
+                ("post", post.id, "update"),
+                ("follow", follower_id, "delete"),
+            ],
+        )
+        self.assertEqual(self.sync(data["cursor"])["changes"], [])
+
+    def test_scheduled_post_reported_once_published(self):
+        cursor = self.sync()["cursor"]
+        post = Post.objects.create(
+            profile=self.followed,
+            title="Post",
+            content="Content",
+            published=False,
+            publish_at=timezone.now() + timedelta(hours=1),
+        )
+        post.title = "Edited"
+        post.save()
+        self.assertEqual(self.sync(cursor)["changes"], [])
+
+        Post.objects.filter(pk=post.pk).update(publish_at=timezone.now())
+        publish_due_posts()
+
+        self.assertEqual(
+            self.sync(cursor)["changes"],
+            [{"model": "post", "id": post.id, "action": "create"}],
+        )
+
+    def test_bounded_pages(self):
+        cursor = self.sync()["cursor"]
+        for index in range(3):
+            Post.objects.create(
+                profile=self.profile, title=f"{index}", content="Content"
+            )
+
+        first = self.sync(cursor, limit=2)
+        second = self.sync(first["cursor"], limit=2)
+
+        self.assertTrue(first["has_more"])
+        self.assertEqual(len(first["changes"]), 2)
+        self.assertFalse(second["has_more"])
+        self.assertEqual(len(second["changes"]), 1)
+
+    def test_soft_deleted_profile_reported(self):
+        cursor = self.sync()["cursor"]
+
+        request_deletion(self.followed)
+
+        self.assertEqual(
+            self.sync(cursor)["changes"],
+            [{"model": "profile", "id": self.followed.id, "action": "delete"}],
+        )
+
+    def test_rename_of_followed_user_reported(self):
+        """Test that a rename, stored on the profile without a save,
+        still reaches the followers' sync"""
+        cursor = self.sync()["cursor"]
+        client = APIClient()
+        client.force_authenticate(user=self.followed.user)
+
+        res = client.patch(ME_URL, {"first_name": "renamed"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.sync(cursor)["changes"],
+            [{"model": "profile", "id": self.followed.id, "action": "update"}],
+        )
+
+    def test_compaction_keeps_newest_entry(self):
+        """Test that compaction drops superseded and expired entries"""
+        post = Post.objects.create(
+            profile=self.profile, title="Post", content="Content"
+        )
+        post.save()
+        post.delete()
+        ChangeLogEntry.objects.filter(model="profile").update(
+            created_at=timezone.now() - timedelta(days=31)
+        )
+
+        compact()
+
+        self.assertEqual(
+            list(
+                ChangeLogEntry.objects.filter(model="post").values_list(
+                    "action", flat=True
+                )
+            ),
+            ["delete"],
+        )
+        self.assertFalse(ChangeLogEntry.objects.filter(model="profile"))
+
+    def test_expired_cursor_resets(self):
+        expired = int((timezone.now() - timedelta(days=31)).timestamp())
+
+        data = self.sync(f"0-{expired}")
+
+        self.assertTrue(data["reset"])
+        res = self.client.get(SYNC_URL, {"since": "not-a-cursor"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,14 +1,29 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from social.views import ProfileViewSet, PostViewSet
+from social.views import (
+    BootstrapView,
+    JobMetricsView,
+    ProfileViewSet,
+    SyncView,
+    PostViewSet,
+    CommentViewSet,
+    NotificationViewSet,
+)
 
 app_name = "social"
 
 router = DefaultRouter()
 router.register("profiles", ProfileViewSet, basename="profile")
 router.register("posts", PostViewSet, basename="post")
+router.register("comments", CommentViewSet, basename="comment")
+router.register(
+    "notifications", NotificationViewSet, basename="notification"
+)
 
 urlpatterns = [
+    path("bootstrap/", BootstrapView.as_view(), name="bootstrap"),
+    path("sync/", SyncView.as_view(), name="sync"),
+    path("jobs/metrics/", JobMetricsView.as_view(), name="job-metrics"),
     path("", include(router.urls)),
 ]
@@ -1,62 +1,194 @@
-from django.db.models import Q
+import hashlib
+
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.http import quote_etag
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.generics import get_object_or_404
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-
-from social.models import Profile, Follow, Post
+from rest_framework.views import APIView
+
+from social import ranking
+from social.changelog import (
+    MAX_SYNC_PAGE_SIZE,
+    SYNC_PAGE_SIZE,
+    changes_since,
+    head_cursor,
+)
+from social.comments import (
+    CommentDepthError,
+    DEFAULT_THREAD_DEPTH,
+    MAX_DEPTH,
+    create_comment,
+    delete_comment,
+    load_replies,
+)
+from social.counters import like_counter
+from social.deletion import request_deletion
+from social.jobs import MetricsRenderer, queue_metrics
+from social.locations import (
+    city_facets,
+    country_facets,
+    find_cities,
+    find_country,
+)
+from social.models import (
+    Profile,
+    Follow,
+    Post,
+    Like,
+    Comment,
+    Notification,
+    exclude_deleted_profiles,
+)
+from social.search import (
+    AUTOCOMPLETE_LIMIT,
+    MAX_AUTOCOMPLETE_LIMIT,
+    autocomplete,
+)
+from social.pagination import CommentThreadPagination, RankedFeedPagination
+from social.sharding import is_sharded, subquery
+from social.streaming import EventStreamRenderer, feed_events
 from social.permissions import IsAdminOrOwnerOrReadOnly
 from social.serializers import (
     ProfileSerializer,
     ProfileCreateSerializer,
     ProfileListSerializer,
+    ProfileAutocompleteSerializer,
+    ProfileFacetsSerializer,
     FollowUnfollowSerializer,
     FollowersSerializer,
     FollowingSerializer,
     PostSerializer,
     PostCreateUpdateSerializer,
     PostListSerializer,
+    LikeSerializer,
+    CommentSerializer,
+    NotificationSerializer,
+    BootstrapSerializer,
+    SyncSerializer,
+    JobMetricsSerializer,
+)
+from social_media_api.views import (
+    MAX_MULTI_GET_IDS,
+    MultiGetMixin,
+    SparseFieldsetViewMixin,
+    ValuesListMixin,
+)
+
+BOOTSTRAP_FEED_SIZE = 20
+BOOTSTRAP_FOLLOWING_SIZE = 100
+
+FIELDS_PARAMETER = OpenApiParameter(
+    name="fields",
+    description="Comma separated fields to return (ex. ?fields=id,title)",
+    type=OpenApiTypes.STR,
+    required=False,
+)
+IDS_PARAMETER = OpenApiParameter(
+    name="ids",
+    description=f"Comma separated ids to fetch at once, at most "
+    f"{MAX_MULTI_GET_IDS} (ex. ?ids=3,1,2). The response is "
+    f'{{"results": [...], "missing": [...]}} in the order of the ids, '
+    f"with null for missing ones",
+    type=OpenApiTypes.STR,
+    required=False,
+)
+DEPTH_PARAMETER = OpenApiParameter(
+    name="depth",
+    description=f"Levels of replies to include "
+    f"(default {DEFAULT_THREAD_DEPTH}, max {MAX_DEPTH})",
+    type=OpenApiTypes.INT,
+    required=False,
 )
 
 
-class ProfileViewSet(viewsets.ModelViewSet):
-    queryset = Profile.objects.select_related("user").prefetch_related(
-        "following", "followers"
+def get_autocomplete_limit(request) -> int:
+    try:
+        limit = int(request.query_params.get("limit", AUTOCOMPLETE_LIMIT))
+    except ValueError:
+        limit = AUTOCOMPLETE_LIMIT
+    return min(max(limit, 1), MAX_AUTOCOMPLETE_LIMIT)
+
+
+def get_sync_limit(request) -> int:
+    try:
+        limit = int(request.query_params.get("limit", SYNC_PAGE_SIZE))
+    except ValueError:
+        limit = SYNC_PAGE_SIZE
+    return min(max(limit, 1), MAX_SYNC_PAGE_SIZE)
+
+
+def get_thread_depth(request) -> int:
+    try:
+        depth = int(request.query_params.get("depth", DEFAULT_THREAD_DEPTH))
+    except ValueError:
+        depth = DEFAULT_THREAD_DEPTH
+    return min(max(depth, 0), MAX_DEPTH)
+
+
+class ProfileViewSet(
+    MultiGetMixin,
+    SparseFieldsetViewMixin,
+    ValuesListMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = (
+        Profile.objects.active()
+        .select_related("country", "city")
+        .prefetch_related("following", "followers")
     )
     serializer_class = ProfileSerializer
+    throttle_scopes = {"follow": "follow", "unfollow": "follow"}
     permission_classes = (IsAdminOrOwnerOrReadOnly,)
 
     def get_queryset(self):
         """Profile filtering by user first or last name, country or city"""
         name = self.request.query_params.get("name")
-        country = self.request.query_params.get("country")
-        city = self.request.query_params.get("city")
+        country_name = self.request.query_params.get("country")
+        city_name = self.request.query_params.get("city")
 
         queryset = self.queryset
 
         if name:
+            queryset = queryset.filter(full_name__icontains=name)
+        country = None
+        if country_name:
+            country = find_country(country_name)
+            if country is None:
+                queryset = queryset.none()
+            else:
+                queryset = queryset.filter(country=country)
+        if city_name:
             queryset = queryset.filter(
-                Q(user__first_name__icontains=name)
-                | Q(user__last_name__icontains=name)
+                city__in=find_cities(city_name, country)
             )
-        if country:
-            queryset = queryset.filter(country__icontains=country)
-        if city:
-            queryset = queryset.filter(city__icontains=city)
 
-        return queryset
+        return self.prune_queryset(queryset)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def perform_destroy(self, instance):
+        """Hide the profile, its data is deleted in the background"""
+        request_deletion(instance)
+
     def get_serializer_class(self):
         if self.action == "create":
             return ProfileCreateSerializer
-        if self.action == "list":
+        if self.action == "list" and not self.is_multi_get():
             return ProfileListSerializer
+        if self.action == "autocomplete":
+            return ProfileAutocompleteSerializer
+        if self.action == "facets":
+            return ProfileFacetsSerializer
         if self.action in ["follow", "unfollow"]:
             return FollowUnfollowSerializer
         if self.action == "followers":
@@ -75,22 +207,79 @@ class ProfileViewSet(viewsets.ModelViewSet):
             ),
             OpenApiParameter(
                 name="country",
-                description="Filter profiles by country",
+                description="Filter profiles by country name or alias",
                 type=OpenApiTypes.STR,
                 required=False,
             ),
             OpenApiParameter(
                 name="city",
-                description="Filter profiles by city",
+                description="Filter profiles by city name",
                 type=OpenApiTypes.STR,
                 required=False,
             ),
+            IDS_PARAMETER,
+            FIELDS_PARAMETER,
         ]
     )
     def list(self, request, *args, **kwargs):
         """Get list of all profiles"""
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="prefix",
+                description="Beginning of the full name, case and accents "
+                "are ignored (ex. ?prefix=jo)",
+                type=OpenApiTypes.STR,
+                required=True,
+            ),
+            OpenApiParameter(
+                name="limit",
+                description=f"Number of matches (default "
+                f"{AUTOCOMPLETE_LIMIT}, max {MAX_AUTOCOMPLETE_LIMIT})",
+                type=OpenApiTypes.INT,
+                required=False,
+            ),
+        ]
+    )
+    @action(detail=False, methods=["GET"])
+    def autocomplete(self, request):
+        """Most followed profiles whose full name starts with a prefix"""
+        profiles = autocomplete(
+            request.query_params.get("prefix", ""),
+            get_autocomplete_limit(request),
+        )
+        data = ProfileAutocompleteSerializer.serialize_values(
+            profiles, self.get_serializer_context()
+        )
+        return Response(data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="country",
+                description="Count cities of this country only",
+                type=OpenApiTypes.STR,
+                required=False,
+            ),
+        ]
+    )
+    @action(detail=False, methods=["GET"])
+    def facets(self, request):
+        """Most common countries and cities with their number of profiles"""
+        country_name = request.query_params.get("country")
+        country = find_country(country_name) if country_name else None
+        if country_name and country is None:
+            cities = []
+        else:
+            cities = city_facets(country)
+
+        serializer = self.get_serializer(
+            {"countries": country_facets(), "cities": cities}
+        )
+        return Response(serializer.data)
+
     @action(
         detail=False,
         methods=["GET", "PUT", "PATCH"],
@@ -98,7 +287,9 @@ class ProfileViewSet(viewsets.ModelViewSet):
     )
     def profile(self, request):
         """Get the authenticated user's profile"""
-        profile = get_object_or_404(Profile, user=request.user)
+        profile = get_object_or_404(
+            self.prune_queryset(Profile.objects.active()), user=request.user
+        )
 
         if request.method == "GET":
             serializer = self.get_serializer(profile)
@@ -121,7 +312,7 @@ class ProfileViewSet(viewsets.ModelViewSet):
         """Start following a user"""
         profile_to_follow = self.get_object()
 
-        if not Profile.objects.filter(user=request.user).exists():
+        if not Profile.objects.active().filter(user=request.user).exists():
             return Response(
                 {"message": "You have to create a profile first"},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -163,7 +354,7 @@ class ProfileViewSet(viewsets.ModelViewSet):
         """Stop following a user"""
         profile_to_unfollow = self.get_object()
 
-        if not Profile.objects.filter(user=request.user).exists():
+        if not Profile.objects.active().filter(user=request.user).exists():
             return Response(
                 {"message": "You have to create a profile first"},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -195,7 +386,9 @@ class ProfileViewSet(viewsets.ModelViewSet):
     def followers(self, request, pk=None):
         """List of all the user's followers"""
         profile = self.get_object()
-        followers = profile.followers.select_related("follower__user")
+        followers = self.prune_queryset(
+            profile.followers.select_related("follower")
+        )
         serializer = self.get_serializer(followers, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -203,21 +396,41 @@ class ProfileViewSet(viewsets.ModelViewSet):
     def following(self, request, pk=None):
         """List of all user subscriptions"""
         profile = self.get_object()
-        following = profile.following.select_related("following__user")
+        following = self.prune_queryset(
+            profile.following.select_related("following")
+        )
         serializer = self.get_serializer(following, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class PostViewSet(viewsets.ModelViewSet):
-    queryset = Post.objects.select_related("profile__user")
+class PostViewSet(
+    MultiGetMixin,
+    SparseFieldsetViewMixin,
+    ValuesListMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Post.objects.select_related("profile")
     serializer_class = PostSerializer
     permission_classes = (IsAdminOrOwnerOrReadOnly,)
+    throttle_scopes = {"create": "post_create"}
 
     def get_queryset(self):
-        queryset = self.queryset
+        """Published posts, authors also reach their scheduled ones"""
+        queryset = self.queryset.visible()
+
+        if self.action == "list" or not self.request.user.is_authenticated:
+            queryset = queryset.published()
+        else:
+            own_profiles = Profile.objects.filter(
+                user=self.request.user
+            ).values_list("pk", flat=True)
+            queryset = queryset.filter(
+                Q(published=True) | Q(profile__in=subquery(own_profiles))
+            )
+
         queryset = self._apply_filters(queryset)
 
-        return queryset
+        return self.prune_queryset(queryset)
 
     def _apply_filters(self, queryset):
         """Post filtering by hashtag or title"""
@@ -235,14 +448,20 @@ class PostViewSet(viewsets.ModelViewSet):
         return queryset
 
     def get_serializer_class(self):
-        if self.action == "list":
+        if self.action == "list" and not self.is_multi_get():
             return PostListSerializer
         if self.action in ["create", "update", "partial_update"]:
             return PostCreateUpdateSerializer
+        if self.action in ["like", "unlike"]:
+            return LikeSerializer
+        if self.action == "comments":
+            return CommentSerializer
         return PostSerializer
 
     def create(self, request, *args, **kwargs):
-        profile = get_object_or_404(Profile, user=request.user)
+        profile = get_object_or_404(
+            Profile.objects.active(), user=request.user
+        )
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -264,6 +483,8 @@ class PostViewSet(viewsets.ModelViewSet):
                 type=OpenApiTypes.STR,
                 required=False,
             ),
+            IDS_PARAMETER,
+            FIELDS_PARAMETER,
         ]
     )
     def list(self, request, *args, **kwargs):
@@ -284,14 +505,17 @@ class PostViewSet(viewsets.ModelViewSet):
                 type=OpenApiTypes.STR,
                 required=False,
             ),
+            FIELDS_PARAMETER,
         ]
     )
     @action(detail=False, methods=["GET"], url_path="me")
     def my_posts(self, request, pk=None):
         """List of all user's posts"""
-        profile = get_object_or_404(Profile, user=request.user)
-        posts = profile.posts.all()
-        filtered_posts = self._apply_filters(posts)
+        profile = get_object_or_404(
+            Profile.objects.active(), user=request.user
+        )
+        posts = profile.posts.published()
+        filtered_posts = self.prune_queryset(self._apply_filters(posts))
         serializer = self.get_serializer(filtered_posts, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -309,16 +533,430 @@ class PostViewSet(viewsets.ModelViewSet):
                 type=OpenApiTypes.STR,
                 required=False,
             ),
+            FIELDS_PARAMETER,
+            OpenApiParameter(
+                name="ranking",
+                description="Rank the feed by relevance instead of date "
+                "(ex. ?ranking=top), results are cursor paginated",
+                type=OpenApiTypes.STR,
+                enum=["top"],
+                required=False,
+            ),
         ]
     )
     @action(detail=False, methods=["GET"])
     def feed(self, request, pk=None):
         """List of posts of users to which the user is subscribed"""
-        profile = get_object_or_404(Profile, user=request.user)
+        profile = get_object_or_404(
+            Profile.objects.active(), user=request.user
+        )
+
+        if request.query_params.get("ranking") == "top":
+            return self._ranked_feed(profile)
+
         followed_profiles = profile.following.values_list(
             "following", flat=True
         )
-        posts = Post.objects.filter(profile__in=followed_profiles)
-        filtered_posts = self._apply_filters(posts)
+        posts = Post.objects.published().filter(
+            profile__in=subquery(followed_profiles)
+        )
+        filtered_posts = self.prune_queryset(self._apply_filters(posts))
         serializer = self.get_serializer(filtered_posts, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(responses={(200, "text/event-stream"): OpenApiTypes.STR})
+    @action(
+        detail=False,
+        methods=["GET"],
+        renderer_classes=[EventStreamRenderer],
+    )
+    def stream(self, request, pk=None):
+        """Server-Sent Events stream of new posts from followed profiles.
+
+        Requires the ASGI application to hold connections open cheaply"""
+        if not isinstance(request._request, ASGIRequest):
+            # WSGI drains the endless iterator before sending anything
+            return HttpResponse(
+                "The feed stream needs the ASGI server",
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+                content_type="text/plain",
+            )
+
+        profile = get_object_or_404(
+            Profile.objects.active(), user=request.user
+        )
+        followed_profiles = list(
+            profile.following.values_list("following", flat=True)
+        )
+        response = StreamingHttpResponse(
+            feed_events(followed_profiles), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @action(detail=False, methods=["GET"])
+    def scheduled(self, request, pk=None):
+        """List of user's posts waiting to be published"""
+        profile = get_object_or_404(
+            Profile.objects.active(), user=request.user
+        )
+        posts = profile.posts.filter(published=False).order_by("publish_at")
+        serializer = self.get_serializer(posts, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(
+        detail=True, methods=["POST"], permission_classes=[IsAuthenticated]
+    )
+    def like(self, request, pk=None):
+        """Like a post"""
+        post = self.get_object()
+        profile = Profile.objects.active().filter(user=request.user).first()
+
+        if profile is None:
+            return Response(
+                {"message": "You have to create a profile first"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        _, created = Like.objects.get_or_create(profile=profile, post=post)
+
+        if not created:
+            return Response(
+                {"message": f"You already like {post.title}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        like_counter.add(post.id)
+        ranking.record_interaction(profile.id, post.profile_id)
+
+        return Response(
+            {"message": f"You like {post.title}"},
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(
+        detail=True, methods=["POST"], permission_classes=[IsAuthenticated]
+    )
+    def unlike(self, request, pk=None):
+        """Remove a like from a post"""
+        post = self.get_object()
+        deleted, _ = Like.objects.filter(
+            profile__user=request.user, post=post
+        ).delete()
+
+        if not deleted:
+            return Response(
+                {"message": f"You don't like {post.title}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        like_counter.add(post.id, -1)
+
+        return Response(
+            {"message": f"You unlike {post.title}"},
+            status=status.HTTP_204_NO_CONTENT,
+        )
+
+    @extend_schema(parameters=[DEPTH_PARAMETER])
+    @action(
+        detail=True,
+        methods=["GET", "POST"],
+        permission_classes=[IsAuthenticated],
+    )
+    def comments(self, request, pk=None):
+        """Comment thread of a post, paginated by top-level comments"""
+        post = self.get_object()
+
+        if request.method == "POST":
+            return self._create_comment(post)
+
+        roots = (
+            post.comments.visible().filter(depth=0).select_related("profile")
+        )
+        paginator = CommentThreadPagination()
+        page = paginator.paginate_queryset(roots, request, view=self)
+        serializer = self.get_serializer(
+            page, many=True, context=self._thread_context(page)
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    def _thread_context(self, roots):
+        context = self.get_serializer_context()
+        context["replies"] = load_replies(
+            roots, get_thread_depth(self.request)
+        )
+        return context
+
+    def _create_comment(self, post):
+        profile = (
+            Profile.objects.active().filter(user=self.request.user).first()
+        )
+
+        if profile is None:
+            return Response(
+                {"message": "You have to create a profile first"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = self.get_serializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        parent = serializer.validated_data.get("parent")
+
+        if parent and parent.post_id != post.id:
+            return Response(
+                {"parent": ["Reply must belong to the same post"]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            comment = create_comment(
+                post,
+                profile,
+                serializer.validated_data["content"],
+                parent=parent,
+            )
+        except CommentDepthError as error:
+            return Response(
+                {"parent": [str(error)]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            self.get_serializer(comment).data, status=status.HTTP_201_CREATED
+        )
+
+    def _ranked_feed(self, profile):
+        """Feed ordered by the precomputed FeedItem scores"""
+        feed_items = profile.feed_items.filter(author__deleted_at__isnull=True)
+        if is_sharded():
+            # posts are on the shards, not on default with the feed
+            feed_items = feed_items.prefetch_related("post__profile")
+        else:
+            feed_items = feed_items.select_related("post__profile")
+
+        params = self.request.query_params
+        if params.get("title") or params.get("hashtag"):
+            followed_profiles = profile.following.values_list(
+                "following", flat=True
+            )
+            posts = self._apply_filters(
+                Post.objects.filter(profile__in=subquery(followed_profiles))
+            )
+            feed_items = feed_items.filter(
+                post__in=subquery(posts.values_list("pk", flat=True))
+            )
+
+        paginator = RankedFeedPagination()
+        page = paginator.paginate_queryset(feed_items, self.request, view=self)
+        serializer = self.get_serializer(
+            [feed_item.post for feed_item in page], many=True
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+
+class CommentViewSet(
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = Comment.objects.visible().select_related("profile")
+    serializer_class = CommentSerializer
+    permission_classes = (IsAdminOrOwnerOrReadOnly,)
+
+    @extend_schema(parameters=[DEPTH_PARAMETER])
+    def retrieve(self, request, *args, **kwargs):
+        """Comment with the subtree of its replies"""
+        comment = self.get_object()
+        context = self.get_serializer_context()
+        context["replies"] = load_replies(
+            [comment], get_thread_depth(request)
+        )
+        serializer = self.get_serializer(comment, context=context)
+        return Response(serializer.data)
+
+    def perform_destroy(self, instance):
+        delete_comment(instance)
+
+
+class NotificationViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    serializer_class = NotificationSerializer
+
+    def get_queryset(self):
+        return Notification.objects.filter(
+            recipient__user=self.request.user
+        ).select_related("last_actor")
+
+    def list(self, request, *args, **kwargs):
+        """Notification digests of the authenticated user"""
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        responses={200: {"type": "object", "properties": {"unread": {}}}}
+    )
+    @action(detail=False, methods=["GET"], url_path="unread-count")
+    def unread_count(self, request):
+        """Number of unread digests, read from a counter"""
+        profile = get_object_or_404(
+            Profile.objects.only("unread_notifications"), user=request.user
+        )
+        return Response({"unread": max(profile.unread_notifications, 0)})
+
+    @action(detail=False, methods=["POST"], url_path="read")
+    def mark_read(self, request):
+        """Mark all notifications as read"""
+        profile = get_object_or_404(
+            Profile.objects.active(), user=request.user
+        )
+        profile.notifications.filter(read=False).update(read=True)
+        Profile.objects.filter(pk=profile.pk).update(unread_notifications=0)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def follow_count(field: str):
+    """Subquery counting the follows whose `field` is the outer profile"""
+    follows = (
+        Follow.objects.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    return Coalesce(Subquery(follows), 0)
+
+
+class BootstrapView(APIView):
+    """Everything the app needs on launch, in one response.
+
+    Replaces the user, own profile, following and feed requests. The
+    ETag is a hash of the body, so unchanged data costs the client a
+    304 instead of the transfer and parsing."""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(responses=BootstrapSerializer)
+    def get(self, request):
+        profiles = (
+            Profile.objects.active()
+            .filter(user=request.user)
+            .select_related("country", "city")
+        )
+        if not is_sharded():
+            profiles = profiles.annotate(
+                followers_total=follow_count("following"),
+                following_total=follow_count("follower"),
+            )
+        profile = profiles.first()
+        feed, following = [], []
+        if profile is not None:
+            follows = Follow.objects.filter(follower=profile)
+            if is_sharded():
+                # follows can't be counted in a subquery on default
+                profile.followers_total = Follow.objects.filter(
+                    following=profile
+                ).count()
+                profile.following_total = follows.count()
+            feed = (
+                Post.objects.published()
+                .filter(
+                    profile__in=subquery(
+                        follows.values_list("following", flat=True)
+                    )
+                )
+                .select_related("profile")[:BOOTSTRAP_FEED_SIZE]
+            )
+            following = exclude_deleted_profiles(
+                follows, "following"
+            ).values_list("following_id", flat=True)[:BOOTSTRAP_FOLLOWING_SIZE]
+
+        serializer = BootstrapSerializer(
+            {
+                "user": request.user,
+                "profile": profile,
+                "feed": feed,
+                "following": list(following),
+            },
+            context={"request": request},
+        )
+        body = JSONRenderer().render(serializer.data)
+        etag = quote_etag(hashlib.md5(body).hexdigest())
+
+        if etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(body, content_type="application/json")
+        response["ETag"] = etag
+        response["Vary"] = "Authorization"
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+class SyncView(APIView):
+    """Changes to posts, follows and profiles since a cursor.
+
+    Without a cursor, or with one past the change log retention, the
+    response has reset set: the client reloads its data in full and
+    continues from the returned cursor. Changed objects are fetched
+    with ?ids= on the post and profile lists."""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="since",
+                description="Cursor returned by the previous sync",
+                type=OpenApiTypes.STR,
+                required=False,
+            ),
+            OpenApiParameter(
+                name="limit",
+                description=f"Number of changes (default {SYNC_PAGE_SIZE}, "
+                f"max {MAX_SYNC_PAGE_SIZE})",
+                type=OpenApiTypes.INT,
+                required=False,
+            ),
+        ],
+        responses=SyncSerializer,
+    )
+    def get(self, request):
+        profile = get_object_or_404(
+            Profile.objects.active(), user=request.user
+        )
+        since = request.query_params.get("since")
+        page = (
+            changes_since(profile, since, get_sync_limit(request))
+            if since
+            else None
+        )
+
+        if page is None:
+            data = {
+                "changes": [],
+                "cursor": head_cursor(),
+                "has_more": False,
+                "reset": True,
+            }
+        else:
+            changes, cursor, has_more = page
+            data = {
+                "changes": changes,
+                "cursor": cursor,
+                "has_more": has_more,
+                "reset": False,
+            }
+        return Response(SyncSerializer(data).data)
+
+
+class JobMetricsView(APIView):
+    """Depth and latency of the job queue per job name, as JSON or with
+    ?format=prometheus for scraping"""
+
+    permission_classes = (IsAdminUser,)
+    renderer_classes = (JSONRenderer, MetricsRenderer)
+
+    @extend_schema(responses=JobMetricsSerializer(many=True))
+    def get(self, request):
+        return Response(
+            JobMetricsSerializer(queue_metrics(), many=True).data
+        )
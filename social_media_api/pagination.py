@@ -0,0 +1,75 @@
+"""Pagination without exact COUNT(*) on large tables.
+
+Counting every row of a large table is a sequential scan, on each page
+load. Above ESTIMATED_COUNT_THRESHOLD rows the count comes from the
+PostgreSQL planner instead: pg_class.reltuples for a whole table, summed
+over the partitions of a partitioned one, the row estimate of EXPLAIN
+for a filtered queryset. Smaller results, and other databases, are
+counted exactly. Querysets spread over shards (see social.sharding) sum
+the estimates of their shards.
+"""
+
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+ESTIMATED_COUNT_THRESHOLD = 10_000
+
+
+def estimate_count(queryset):
+    """Planner estimate of the queryset's row count, None if unknown"""
+    if len(getattr(queryset, "shards", lambda: ())()) > 1:
+        estimates = [
+            estimate_count(queryset.using(alias))
+            for alias in queryset.shards()
+        ]
+        return None if None in estimates else sum(estimates)
+
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    query = queryset.query
+    with connection.cursor() as cursor:
+        if not (query.where or query.distinct or query.is_sliced):
+            cursor.execute(
+                "SELECT CASE WHEN relkind = 'p' THEN ("
+                "SELECT COALESCE(sum(GREATEST(child.reltuples, 0)), -1) "
+                "FROM pg_inherits JOIN pg_class child "
+                "ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = pg_class.oid"
+                ") ELSE reltuples END "
+                "FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            # -1 until the table was first vacuumed or analyzed
+            estimate = row[0] if row else -1
+        else:
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = plan[0]["Plan"]["Plan Rows"]
+
+    return int(estimate) if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    threshold = ESTIMATED_COUNT_THRESHOLD
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, "query"):
+            estimate = estimate_count(self.object_list)
+            if estimate is not None and estimate >= self.threshold:
+                return estimate
+        return super().count
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    django_paginator_class = EstimatedCountPaginator
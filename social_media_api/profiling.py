@@ -0,0 +1,92 @@
+"""Request profiling with cProfile.
+
+ProfilingMiddleware profiles a PROFILING_SAMPLE_RATE fraction of
+requests, and every request of a staff user sending PROFILE_HEADER.
+Each profile is dumped to PROFILING_DIR as
+<view name>.<milliseconds>.<pid>.prof, for `manage.py profile_summary`
+or any pstats viewer. Requests the header got profiled carry the dump
+name in the response.
+"""
+
+import cProfile
+import logging
+import os
+import random
+import time
+from pathlib import Path
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+DUMP_HEADER = "X-Profile-Dump"
+DUMP_SUFFIX = ".prof"
+
+
+def profiling_dir() -> Path:
+    return Path(getattr(settings, "PROFILING_DIR", "profiles"))
+
+
+def dump_name(view_name: str) -> str:
+    return (
+        f"{view_name.replace(':', '.')}.{int(time.time() * 1000)}"
+        f".{os.getpid()}{DUMP_SUFFIX}"
+    )
+
+
+def dump_view_name(path: Path) -> str:
+    """View name of a dump, "social.post-feed" for social:post-feed"""
+    return path.name.removesuffix(DUMP_SUFFIX).rsplit(".", 2)[0]
+
+
+def profile_requested(request) -> bool:
+    """Whether a staff user, by session or bearer token, sent
+    PROFILE_HEADER"""
+    if PROFILE_HEADER not in request.headers:
+        return False
+    user = getattr(request, "user", None)
+    if user is not None and user.is_staff:
+        return True
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except (InvalidToken, TokenError):
+        return False
+    return authenticated is not None and authenticated[0].is_staff
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample_rate = getattr(settings, "PROFILING_SAMPLE_RATE", 0)
+        requested = profile_requested(request)
+        if not (requested or random.random() < sample_rate):
+            return self.get_response(request)
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # another profiler is active in this thread
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.disable()
+
+        match = request.resolver_match
+        name = dump_name(match.view_name if match else "unresolved")
+        try:
+            profiling_dir().mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(profiling_dir() / name)
+        except OSError:
+            logger.exception("Failed to save profile %s", name)
+            return response
+
+        if requested:
+            response[DUMP_HEADER] = name
+        return response
@@ -0,0 +1,95 @@
+"""OpenAPI schema generated ahead of time.
+
+Generating the schema introspects every view and serializer, which
+takes hundreds of milliseconds. It is written to OPENAPI_SCHEMA_FILE
+with `python manage.py spectacular --file schema.yml` and committed,
+test_schema fails when that file no longer matches the code. Each
+process renders and compresses the schema once per format.
+
+Integer bounds of model fields follow PostgreSQL, the project's
+database, whichever database the schema is generated with.
+"""
+
+import gzip
+import hashlib
+from functools import lru_cache
+
+import yaml
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection, models
+from django.db.backends.base.operations import BaseDatabaseOperations
+from django.utils.http import quote_etag
+from drf_spectacular import openapi
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+
+SCHEMA_RENDERERS = {"yaml": OpenApiYamlRenderer, "json": OpenApiJsonRenderer}
+
+
+class AutoSchema(openapi.AutoSchema):
+    def _insert_min_max(self, field, content) -> None:
+        super()._insert_min_max(field, content)
+        model_field = get_model_field(field)
+        if not isinstance(model_field, models.IntegerField):
+            return
+
+        # bounds the connection put on the model field, not a validator
+        internal_type = model_field.get_internal_type()
+        portable = BaseDatabaseOperations.integer_field_ranges.get(
+            internal_type
+        )
+        if portable is None:
+            return
+        current = connection.ops.integer_field_range(internal_type)
+        for key, value, bound in zip(
+            ("minimum", "maximum"), current, portable
+        ):
+            if key in content and content[key] == value:
+                content[key] = bound
+
+
+def get_model_field(field):
+    """The model field a ModelSerializer field was built from, if any"""
+    model = getattr(getattr(field.parent, "Meta", None), "model", None)
+    if model is None or not field.source or "." in field.source:
+        return None
+    try:
+        return model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        return None
+
+
+class RenderedSchema:
+    def __init__(self, body: bytes):
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.body = body
+        self.gzipped = gzip.compress(body, mtime=0)
+        self.etag = quote_etag(digest)
+        self.gzip_etag = quote_etag(f"{digest}-gzip")
+
+
+def generate_schema() -> dict:
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=True)
+
+
+def render_schema(schema: dict, schema_format: str = "yaml") -> bytes:
+    return SCHEMA_RENDERERS[schema_format]().render(
+        schema, renderer_context={}
+    )
+
+
+@lru_cache
+def load_schema() -> dict:
+    """The committed schema, generated once when the file is missing"""
+    try:
+        with open(settings.OPENAPI_SCHEMA_FILE, encoding="utf-8") as file:
+            return yaml.safe_load(file)
+    except FileNotFoundError:
+        return generate_schema()
+
+
+@lru_cache
+def get_rendered_schema(schema_format: str) -> RenderedSchema:
+    return RenderedSchema(render_schema(load_schema(), schema_format))
@@ -0,0 +1,133 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = "fields"
+
+
+def get_requested_fields(request) -> set | None:
+    """Return field names listed in ?fields= for read requests"""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+
+    fields = request.query_params.get(FIELDS_PARAM)
+    if not fields:
+        return None
+
+    return {name.strip() for name in fields.split(",") if name.strip()}
+
+
+def resolve_lookup(model, lookup: str):
+    """Split an ORM lookup into the columns, joins and prefetches it needs.
+
+    Returns None when the lookup ends on something the ORM can't load
+    (a property or a method), so the caller can skip pruning."""
+    parts = lookup.split("__")
+    current = model
+
+    for index, part in enumerate(parts):
+        try:
+            field = current._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+
+        path = "__".join(parts[: index + 1])
+        if not field.is_relation:
+            return {path}, {"__".join(parts[:index])} - {""}, set()
+        if field.one_to_many or field.many_to_many or not field.concrete:
+            return set(), set(), {path}
+        if index == len(parts) - 1:
+            return {path}, set(), set()
+
+        current = field.related_model
+
+    return None
+
+
+class SparseFieldsetMixin:
+    """Limit serialized fields to the ones listed in ?fields=.
+
+    Meta.sparse_sources maps a field name or source the ORM can't see
+    through (e.g. a model property) to the lookups it reads."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        root = self
+        if isinstance(self.parent, serializers.ListSerializer):
+            root = self.parent
+        if root.parent is not None:
+            return fields
+
+        requested = get_requested_fields(self.context.get("request"))
+        if requested is None:
+            return fields
+
+        return {
+            name: field for name, field in fields.items() if name in requested
+        }
+
+    @classmethod
+    def prune_queryset(cls, queryset, requested: set):
+        """Load only the columns, joins and prefetches requested fields need"""
+        fields = cls().get_fields()
+        sources = getattr(cls.Meta, "sparse_sources", {})
+        model = queryset.model
+
+        only = {model._meta.pk.name}
+        select_related = set()
+        prefetch_related = set()
+
+        for name in requested & set(fields):
+            source = fields[name].source or name
+            if name in sources:
+                lookups = sources[name]
+            elif source in sources:
+                lookups = sources[source]
+            elif source == "*":
+                return queryset
+            else:
+                lookups = (source.replace(".", "__"),)
+
+            for lookup in lookups:
+                resolved = resolve_lookup(model, lookup)
+                if resolved is None:
+                    return queryset
+                columns, joins, prefetches = resolved
+                only |= columns
+                select_related |= joins
+                prefetch_related |= prefetches
+
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+
+        return queryset.only(*only)
+
+
+class ValuesSerializerMixin:
+    """Fast path for list endpoints that builds items from .values() rows.
+
+    Subclasses declare the lookups they read in Meta.values_lookups and
+    turn rows into items in represent_values(), producing exactly what
+    the regular field machinery would."""
+
+    def __init_subclass__(cls, **kwargs):
+        # serializer metaclasses rule out abc, check at class creation
+        super().__init_subclass__(**kwargs)
+        if (
+            cls.represent_values.__func__
+            is ValuesSerializerMixin.represent_values.__func__
+        ):
+            raise TypeError(f"{cls.__name__} must define represent_values()")
+
+    @classmethod
+    def represent_values(cls, rows, context: dict) -> list:
+        raise NotImplementedError
+
+    @classmethod
+    def serialize_values(cls, queryset, context: dict) -> list:
+        rows = queryset.values(*cls.Meta.values_lookups)
+        return cls.represent_values(rows, context)
@@ -61,6 +61,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "social_media_api.profiling.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -99,6 +100,35 @@ DATABASES = {
     }
 }
 
+# Databases posts and follows are sharded to by profile id, besides
+# default, as comma separated host:port/name (see social.sharding).
+# New shards can only be appended, then run `manage.py reshard`
+for index, shard in enumerate(
+    filter(None, os.getenv("POSTGRES_SHARDS", "").split(",")), start=1
+):
+    address, _, name = shard.strip().partition("/")
+    host, _, port = address.partition(":")
+    DATABASES[f"shard_{index}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "NAME": name or DATABASES["default"]["NAME"],
+    }
+
+SHARDS = list(DATABASES)
+DATABASE_ROUTERS = ["social.sharding.ShardRouter"]
+
+CACHES = {
+    "default": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+        if os.getenv("REDIS_URL")
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -138,8 +168,18 @@ USE_TZ = True
 STATIC_URL = "static/"
 
 MEDIA_ROOT = "/files/media"
+
+# Files uploaded to the admin user import, waiting for the job workers
+USER_IMPORT_DIR = os.getenv("USER_IMPORT_DIR", "/files/imports")
 MEDIA_URL = "/media/"
 
+# Hand media bodies off to the front proxy: "X-Accel-Redirect" (nginx)
+# or "X-Sendfile" (apache/lighttpd). Leave empty to stream from Django.
+MEDIA_ACCEL_REDIRECT_HEADER = os.getenv("MEDIA_ACCEL_REDIRECT_HEADER")
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv(
+    "MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/"
+)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -152,15 +192,69 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
-    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_SCHEMA_CLASS": "social_media_api.schema.AutoSchema",
+    "DEFAULT_THROTTLE_CLASSES": (
+        "social_media_api.throttling.TokenBucketThrottle",
+    ),
+    # scopes of throttled actions, "N/period" is a bucket of N tokens
+    # refilled at N per period
+    "DEFAULT_THROTTLE_RATES": {
+        "register": "10/hour",
+        "follow": "60/min",
+        "post_create": "30/min",
+    },
+    # proxies in front of the app, anonymous clients are throttled by the
+    # address the last of them saw; 0 ignores X-Forwarded-For altogether
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES") or 0),
 }
 
+# Cache holding throttle buckets, atomic across nodes with Redis
+THROTTLE_CACHE = "default"
+
+# Serialize list endpoints straight from .values() rows
+FAST_LIST_SERIALIZATION = True
+
+# Seconds between batched writes of buffered counters (e.g. like_count),
+# 0 writes every increment immediately
+COUNTER_FLUSH_INTERVAL = 2
+
+# Runs tests with COUNTER_FLUSH_INTERVAL = 0, no flusher threads
+TEST_RUNNER = "social_media_api.test_runner.TestRunner"
+
+# Seconds a change log entry waits before sync serves it, so writes
+# committing out of id order aren't skipped by a cursor
+SYNC_SETTLE_SECONDS = 5
+
+# Run enqueued jobs right away in the enqueuing process instead of
+# leaving them to run_workers
+JOBS_RUN_INLINE = os.getenv("JOBS_RUN_INLINE") == "1"
+
+# Fraction of requests profiled with cProfile, on top of those of staff
+# users sending an X-Profile header. Dumps are saved to PROFILING_DIR.
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", BASE_DIR / "profiles")
+
+# Where manage_post_partitions saves archived months of posts
+POST_ARCHIVE_DIR = os.getenv("POST_ARCHIVE_DIR", BASE_DIR / "archive")
+
+# Delivers new posts to feed streams: InProcessBroker for a single
+# process, PostgresBroker to relay events between nodes with
+# LISTEN/NOTIFY. Needed with the scheduler, which publishes posts in its
+# own process, docker-compose sets it
+FEED_STREAM_BROKER = os.getenv(
+    "FEED_STREAM_BROKER", "social.streaming.InProcessBroker"
+)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=2),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "ROTATE_REFRESH_TOKENS": False,
 }
 
+# Pre-generated schema served at /api/doc/, regenerate after API changes
+# with `python manage.py spectacular --file schema.yml`
+OPENAPI_SCHEMA_FILE = BASE_DIR / "schema.yml"
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Social Media API",
     "DESCRIPTION": "API for Social Media",
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Writes buffered counters through during tests, so no flusher
+    thread outlives the test that started it"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._counter_flush_interval = settings.COUNTER_FLUSH_INTERVAL
+        settings.COUNTER_FLUSH_INTERVAL = 0
+
+    def teardown_test_environment(self, **kwargs):
+        settings.COUNTER_FLUSH_INTERVAL = self._counter_flush_interval
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,157 @@
+"""Token-bucket throttling of write-heavy endpoints.
+
+Buckets use GCRA (generic cell rate algorithm): a rate of "N/period"
+is a bucket of N tokens refilled at N per period, stored as a single
+"theoretical arrival time" per client. A decision is one read and one
+write of that timestamp.
+
+With a Redis cache the update runs as a Lua script, atomic across all
+nodes. Other caches, and Redis outages, fall back to buckets kept in
+the memory of each process.
+"""
+
+import logging
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+GCRA_SCRIPT = """
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = tonumber(redis.call("GET", KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local wait = tat - tolerance - now
+if wait > 0 then
+    return tostring(wait)
+end
+tat = tat + interval
+local ttl = math.ceil((tat - now) * 1000)
+redis.call("SET", KEYS[1], tostring(tat), "PX", ttl)
+return "0"
+"""
+
+
+@lru_cache
+def parse_rate(rate: str) -> tuple:
+    """Turn "N/period" into the (interval, tolerance) of a bucket"""
+    num, period = rate.split("/")
+    capacity = int(num)
+    interval = PERIODS[period[0]] / capacity
+    return interval, interval * (capacity - 1)
+
+
+class LocalBuckets:
+    """Buckets in the memory of the current process"""
+
+    max_keys = 100_000
+
+    def __init__(self):
+        self._tats = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, interval: float, tolerance: float) -> float:
+        now = time.time()
+        with self._lock:
+            tat = max(self._tats.get(key, now), now)
+            wait = tat - tolerance - now
+            if wait > 0:
+                return wait
+            if len(self._tats) >= self.max_keys:
+                self._prune(now)
+            self._tats[key] = tat + interval
+        return 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tats.clear()
+
+    def _prune(self, now: float) -> None:
+        # a bucket whose arrival time passed is full, same as no bucket
+        self._tats = {key: tat for key, tat in self._tats.items() if tat > now}
+
+
+class RedisBuckets:
+    def __init__(self, cache: RedisCache, fallback: LocalBuckets):
+        self.cache = cache
+        self.fallback = fallback
+        self._script = None
+
+    def take(self, key: str, interval: float, tolerance: float) -> float:
+        key = self.cache.make_and_validate_key(key)
+        try:
+            client = self.cache._cache.get_client(key, write=True)
+            if self._script is None:
+                self._script = client.register_script(GCRA_SCRIPT)
+            wait = self._script(
+                keys=[key], args=[interval, tolerance], client=client
+            )
+        except Exception:
+            logger.warning("Throttle cache unavailable, using local buckets")
+            return self.fallback.take(key, interval, tolerance)
+        return float(wait)
+
+
+local_buckets = LocalBuckets()
+
+
+@lru_cache
+def get_buckets(alias: str):
+    cache = caches[alias]
+    if isinstance(cache, RedisCache):
+        return RedisBuckets(cache, local_buckets)
+    return local_buckets
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttles the actions a view assigns a scope to.
+
+    Views set `throttle_scope`, or `throttle_scopes` mapping viewset
+    actions to scopes. Rates come from DEFAULT_THROTTLE_RATES, requests
+    are counted per user, or per IP address for anonymous clients."""
+
+    def __init__(self):
+        self.retry_after = None
+
+    def get_scope(self, view):
+        scopes = getattr(view, "throttle_scopes", None)
+        if scopes and getattr(view, "action", None) in scopes:
+            return scopes[view.action]
+        return getattr(view, "throttle_scope", None)
+
+    def get_client_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None:
+            return True
+
+        interval, tolerance = parse_rate(rate)
+        key = f"throttle:{scope}:{self.get_client_key(request)}"
+        wait = get_buckets(settings.THROTTLE_CACHE).take(
+            key, interval, tolerance
+        )
+        if wait > 0:
+            self.retry_after = wait
+            return False
+        return True
+
+    def wait(self):
+        return self.retry_after
@@ -16,20 +16,26 @@ Including another URLconf
 """
 
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from django.urls import path, include, re_path
+from drf_spectacular.views import SpectacularSwaggerView
+
+from social_media_api.views import CachedSchemaView, MediaView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/user/", include("user.urls", namespace="user")),
     path("api/social/", include("social.urls", namespace="social")),
-    path("api/doc/", SpectacularAPIView.as_view(), name="schema"),
+    path("api/doc/", CachedSchemaView.as_view(), name="schema"),
     path(
         "api/doc/swagger/",
         SpectacularSwaggerView.as_view(url_name="schema"),
         name="swagger-ui",
     ),
     path("__debug__/", include("debug_toolbar.urls")),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    re_path(
+        rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.*)$",
+        MediaView.as_view(),
+        name="media",
+    ),
+]
@@ -0,0 +1,293 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date, quote_etag
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from social_media_api.schema import get_rendered_schema
+from social_media_api.serializers import get_requested_fields
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+STREAM_CHUNK_SIZE = 64 * 1024
+MULTI_GET_PARAM = "ids"
+MAX_MULTI_GET_IDS = 100
+
+
+class RangeFileWrapper:
+    """Iterate over a byte range of a file in fixed-size chunks"""
+
+    def __init__(
+        self, filelike, offset, length, chunk_size=STREAM_CHUNK_SIZE
+    ):
+        self.filelike = filelike
+        self.filelike.seek(offset)
+        self.remaining = length
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.remaining <= 0:
+            raise StopIteration
+        data = self.filelike.read(min(self.remaining, self.chunk_size))
+        if not data:
+            raise StopIteration
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.filelike.close()
+
+
+def parse_range_header(header, size):
+    """Return (start, end) for a single byte range or None if unusable.
+
+    A range starting at or past the end of the file is returned as is,
+    it is unsatisfiable rather than unusable."""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # suffix range: the last N bytes of the file, none for N = 0
+        length = int(last)
+        if length == 0:
+            return size, size - 1
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    end = int(last) if last else size - 1
+    return start, min(end, size - 1)
+
+
+class SparseFieldsetViewMixin:
+    """Prune querysets to the fields requested with ?fields="""
+
+    def prune_queryset(self, queryset):
+        requested = get_requested_fields(self.request)
+        serializer_class = self.get_serializer_class()
+
+        if requested is None or not hasattr(
+            serializer_class, "prune_queryset"
+        ):
+            return queryset
+
+        return serializer_class.prune_queryset(queryset, requested)
+
+
+class ValuesListMixin:
+    """Serve list actions through the serializer's .values() fast path
+    when FAST_LIST_SERIALIZATION is enabled.
+
+    Sparse fieldset requests keep the regular path, which already loads
+    only the requested columns."""
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+
+        if (
+            not getattr(settings, "FAST_LIST_SERIALIZATION", False)
+            or not hasattr(serializer_class, "serialize_values")
+            or self.paginator is not None
+            or get_requested_fields(request) is not None
+        ):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        data = serializer_class.serialize_values(
+            queryset, self.get_serializer_context()
+        )
+        return Response(data)
+
+
+def parse_ids(value: str) -> list:
+    """Distinct ids of a comma separated list, in their given order"""
+    try:
+        ids = [int(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise ValidationError({MULTI_GET_PARAM: "Ids must be integers"})
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_MULTI_GET_IDS:
+        raise ValidationError(
+            {MULTI_GET_PARAM: f"At most {MAX_MULTI_GET_IDS} ids per request"}
+        )
+    return ids
+
+
+class MultiGetMixin:
+    """Serve ?ids=1,2,3 on list actions with one query.
+
+    Objects come back in the order of the ids, serialized with the detail
+    serializer, which get_serializer_class() should return when
+    is_multi_get() is true. Ids that don't exist or aren't visible to
+    the user are null in results and listed in missing."""
+
+    def is_multi_get(self) -> bool:
+        request = getattr(self, "request", None)
+        return (
+            self.action == "list"
+            and request is not None
+            and MULTI_GET_PARAM in request.query_params
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_multi_get():
+            return super().list(request, *args, **kwargs)
+
+        ids = parse_ids(request.query_params[MULTI_GET_PARAM])
+        queryset = self.filter_queryset(self.get_queryset())
+        found = {obj.pk: obj for obj in queryset.filter(pk__in=ids)}
+
+        data = iter(
+            self.get_serializer(
+                [found[pk] for pk in ids if pk in found], many=True
+            ).data
+        )
+        return Response(
+            {
+                "results": [
+                    next(data) if pk in found else None for pk in ids
+                ],
+                "missing": [pk for pk in ids if pk not in found],
+            }
+        )
+
+
+class MediaView(APIView):
+    """Serve uploaded media to authenticated users.
+
+    When MEDIA_ACCEL_REDIRECT_HEADER is configured the file body is handed
+    off to the front proxy, otherwise it is streamed by Django with
+    support for conditional and byte-range requests"""
+
+    schema = None
+
+    def get(self, request, path):
+        try:
+            full_path = safe_join(settings.MEDIA_ROOT, path)
+        except SuspiciousFileOperation:
+            raise Http404
+
+        if not os.path.isfile(full_path):
+            raise Http404
+
+        stat = os.stat(full_path)
+        etag = quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+        last_modified = http_date(stat.st_mtime)
+
+        if etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+            response["ETag"] = etag
+            return response
+
+        accel_header = getattr(settings, "MEDIA_ACCEL_REDIRECT_HEADER", None)
+        if accel_header:
+            response = self._accel_response(accel_header, path, full_path)
+        else:
+            response = self._file_response(request, full_path, stat, etag)
+
+        response["ETag"] = etag
+        response["Last-Modified"] = last_modified
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+    @staticmethod
+    def _accel_response(header, path, full_path):
+        """Let nginx (X-Accel-Redirect) or apache (X-Sendfile) send the body"""
+        response = HttpResponse()
+        if header == "X-Accel-Redirect":
+            prefix = getattr(
+                settings, "MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/"
+            )
+            response[header] = prefix + path.lstrip("/")
+        else:
+            response[header] = full_path
+        # the proxy fills in the real content type from the file
+        del response["Content-Type"]
+        return response
+
+    @staticmethod
+    def _file_response(request, full_path, stat, etag):
+        size = stat.st_size
+        range_header = request.headers.get("Range")
+        if_range = request.headers.get("If-Range")
+
+        byte_range = None
+        if range_header and (not if_range or if_range == etag):
+            # a Range header that can't be used is ignored (RFC 9110)
+            byte_range = parse_range_header(range_header, size)
+
+        if byte_range is not None:
+            if byte_range[0] >= size:
+                response = HttpResponse(
+                    status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+                )
+                response["Content-Range"] = f"bytes */{size}"
+                return response
+
+            start, end = byte_range
+            length = end - start + 1
+            content_type, _ = mimetypes.guess_type(full_path)
+            response = StreamingHttpResponse(
+                RangeFileWrapper(open(full_path, "rb"), start, length),
+                status=status.HTTP_206_PARTIAL_CONTENT,
+                content_type=content_type or "application/octet-stream",
+            )
+            response["Content-Length"] = str(length)
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            return response
+
+        # a plain file object lets the WSGI server use sendfile()
+        return FileResponse(open(full_path, "rb"))
+
+
+class CachedSchemaView(SpectacularAPIView):
+    """Serve the pre-generated OpenAPI schema, selected by content
+    negotiation like SpectacularAPIView, with ETag and gzip support"""
+
+    schema = None
+
+    def get(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        schema = get_rendered_schema(renderer.format)
+
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            body, etag = schema.gzipped, schema.gzip_etag
+        else:
+            body, etag = schema.body, schema.etag
+
+        if etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(
+                body,
+                content_type=f"{renderer.media_type}; charset=utf-8",
+            )
+            if body is schema.gzipped:
+                response["Content-Encoding"] = "gzip"
+
+        response["ETag"] = etag
+        response["Vary"] = "Accept, Accept-Encoding"
+        response["Cache-Control"] = "no-cache"
+        return response
@@ -1,14 +1,32 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 from django.utils.translation import gettext as _
 
+from social.admin import LargeTableAdminMixin, SoftDeleteProfileMixin
+from social.models import Profile
+from social.search import sync_profile_names
+from .importing import FORMATS, queue_import
 from .models import User
 
 
+class UserImportForm(forms.Form):
+    file = forms.FileField()
+    format = forms.ChoiceField(
+        choices=[(file_format, file_format.upper()) for file_format in FORMATS]
+    )
+
+
 @admin.register(User)
-class UserAdmin(DjangoUserAdmin):
+class UserAdmin(LargeTableAdminMixin, SoftDeleteProfileMixin, DjangoUserAdmin):
     """Define admin model for custom User model with no email field."""
 
+    delete_user = True
+
     fieldsets = (
         (None, {"fields": ("email", "password")}),
         (_("Personal info"), {"fields": ("first_name", "last_name")}),
@@ -36,5 +54,54 @@ class UserAdmin(DjangoUserAdmin):
         ),
     )
     list_display = ("email", "first_name", "last_name", "is_staff")
-    search_fields = ("email", "first_name", "last_name")
+    search_fields = (
+        "email__startswith",
+        "first_name__startswith",
+        "last_name__startswith",
+    )
     ordering = ("email",)
+
+    def get_profile(self, obj):
+        return Profile.objects.filter(user=obj).first()
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and {"first_name", "last_name"} & set(form.changed_data):
+            sync_profile_names(obj)
+
+    def get_urls(self):
+        return [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_users_view),
+                name="user_user_import",
+            ),
+        ] + super().get_urls()
+
+    def import_users_view(self, request):
+        """Queue the import of users with profiles from an uploaded CSV
+        or NDJSON, run by the job workers"""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        form = UserImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            name = queue_import(
+                form.cleaned_data["file"], form.cleaned_data["format"]
+            )
+            self.message_user(
+                request,
+                f"Import of {name} queued, the workers log its report",
+                messages.SUCCESS,
+            )
+            return redirect("admin:user_user_changelist")
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": _("Import users"),
+            "form": form,
+        }
+        return TemplateResponse(
+            request, "admin/user/user/import_users.html", context
+        )
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class UserConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "user"
+
+    def ready(self):
+        # registers the import job for the workers
+        from user import importing  # noqa: F401
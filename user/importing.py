@@ -0,0 +1,260 @@
+"""Bulk import of user accounts from CSV or NDJSON.
+
+Hashing a password is deliberately slow, so creating accounts one by
+one is bound by a single core. Passwords are hashed in a process pool
+across all cores while users and their profiles are inserted with
+bulk_create, one transaction per batch. A batch hitting an email
+registered meanwhile is inserted again row by row to report it.
+
+Files uploaded in the admin are kept in USER_IMPORT_DIR, out of the
+served media, and imported by the import_users_file job.
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from social.changelog import log_changes
+from social.jobs import enqueue, job
+from social.locations import count_location, get_city, get_country
+from social.models import Profile
+from social.search import profile_names
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+HASH_CHUNK_SIZE = 16
+MIN_PASSWORD_LENGTH = 5
+
+USER_FIELDS = ("email", "password", "first_name", "last_name")
+PROFILE_FIELDS = ("bio", "country", "city")
+FORMATS = ("csv", "ndjson")
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, line: int, message: str) -> None:
+        self.errors.append((line, message))
+
+
+def read_csv(file):
+    reader = csv.DictReader(file)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_ndjson(file):
+    for line, text in enumerate(file, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError:
+            row = None
+        yield line, row if isinstance(row, dict) else None
+
+
+def read_rows(file, file_format: str):
+    """(line, row) pairs of a text or binary file, None for bad rows"""
+    if isinstance(file.read(0), bytes):
+        file = io.TextIOWrapper(file, encoding="utf-8-sig")
+    if file_format == "csv":
+        return read_csv(file)
+    return read_ndjson(file)
+
+
+def clean_row(row) -> dict:
+    if row is None:
+        raise ValidationError("Malformed row")
+
+    cleaned = {
+        field: str(row.get(field) or "").strip()
+        for field in USER_FIELDS + PROFILE_FIELDS
+    }
+    missing = [field for field in USER_FIELDS if not cleaned[field]]
+    if missing:
+        raise ValidationError(f"Missing {', '.join(missing)}")
+
+    cleaned["email"] = get_user_model().objects.normalize_email(
+        cleaned["email"]
+    )
+    validate_email(cleaned["email"])
+    if len(cleaned["password"]) < MIN_PASSWORD_LENGTH:
+        raise ValidationError(
+            f"Password must have at least {MIN_PASSWORD_LENGTH} characters"
+        )
+    return cleaned
+
+
+def setup_worker():
+    # spawned workers start without the parent's configured settings
+    django.setup()
+
+
+def hash_passwords(passwords, workers: int):
+    """Hashed passwords in input order, computed by `workers` processes"""
+    if workers <= 1:
+        return map(make_password, passwords), None
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=setup_worker
+    )
+    return (
+        executor.map(make_password, passwords, chunksize=HASH_CHUNK_SIZE),
+        executor,
+    )
+
+
+def resolve_location(country_name: str, city_name: str, cache: dict) -> dict:
+    """Country and city rows of a profile, looked up once per import"""
+    key = (country_name, city_name)
+    if key not in cache:
+        country = get_country(country_name)
+        cache[key] = {
+            "country": country,
+            "city": get_city(country, city_name),
+        }
+    return cache[key]
+
+
+@transaction.atomic
+def insert_batch(
+    rows: list, passwords: list, report: ImportReport, locations: dict
+) -> None:
+    user_model = get_user_model()
+    existing = set(
+        user_model.objects.filter(
+            email__in=[row["email"] for _, row in rows]
+        ).values_list("email", flat=True)
+    )
+
+    accounts = []
+    for (line, row), password in zip(rows, passwords):
+        if row["email"] in existing:
+            report.add_error(line, "User with this email already exists")
+            continue
+        user = {
+            "email": row["email"],
+            "password": password,
+            "first_name": row["first_name"],
+            "last_name": row["last_name"],
+        }
+        profile = {
+            "bio": row["bio"],
+            **resolve_location(row["country"], row["city"], locations),
+        }
+        accounts.append((line, user, profile))
+
+    try:
+        with transaction.atomic():
+            profiles = create_accounts(accounts)
+    except IntegrityError:
+        # signed up since the check, find the rows one by one
+        profiles = []
+        for line, user, profile in accounts:
+            try:
+                with transaction.atomic():
+                    profiles += create_accounts([(line, user, profile)])
+            except IntegrityError:
+                report.add_error(line, "User with this email already exists")
+
+    for profile in profiles:
+        count_location(profile.country_id, profile.city_id)
+    report.created += len(profiles)
+
+
+def create_accounts(accounts: list) -> list:
+    """Users with their profiles from (line, user, profile) fields,
+    returns the profiles"""
+    users = get_user_model().objects.bulk_create(
+        get_user_model()(**user) for _, user, _ in accounts
+    )
+    profiles = Profile.objects.bulk_create(
+        Profile(user=user, **profile_names(user), **profile)
+        for user, (_, _, profile) in zip(users, accounts)
+    )
+    log_changes("profile", profiles, "create")
+    return profiles
+
+
+def import_users(
+    rows, batch_size: int = IMPORT_BATCH_SIZE, workers: int = None
+) -> ImportReport:
+    """Create users with profiles from (line, row) pairs"""
+    report = ImportReport()
+    valid, emails = [], set()
+
+    for line, row in rows:
+        try:
+            cleaned = clean_row(row)
+        except ValidationError as error:
+            report.add_error(line, "; ".join(error.messages))
+            continue
+        if cleaned["email"] in emails:
+            report.add_error(line, "Duplicate email in the file")
+            continue
+        emails.add(cleaned["email"])
+        valid.append((line, cleaned))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    locations = {}
+    hashes, executor = hash_passwords(
+        [row["password"] for _, row in valid], min(workers, len(valid))
+    )
+    try:
+        for start in range(0, len(valid), batch_size):
+            batch = valid[start : start + batch_size]
+            insert_batch(
+                batch, list(islice(hashes, len(batch))), report, locations
+            )
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    return report
+
+
+def import_storage() -> FileSystemStorage:
+    return FileSystemStorage(location=settings.USER_IMPORT_DIR)
+
+
+def queue_import(file, file_format: str) -> str:
+    """Keep an uploaded file for the import job, returns its name"""
+    name = import_storage().save(f"users.{file_format}", file)
+    enqueue(import_users_file, name=name, file_format=file_format)
+    return name
+
+
+@job()
+def import_users_file(name: str, file_format: str) -> None:
+    """Job importing a file kept by queue_import(), the report is logged"""
+    storage = import_storage()
+    with storage.open(name, "rb") as file:
+        report = import_users(read_rows(file.file, file_format))
+
+    for line, message in report.errors:
+        logger.warning("Import %s line %s: %s", name, line, message)
+    logger.info(
+        "Import %s created %s users, %s rows failed",
+        name,
+        report.created,
+        len(report.errors),
+    )
+    storage.delete(name)
@@ -0,0 +1,63 @@
+import os
+import time
+
+from django.core.management import BaseCommand, CommandError
+
+from user.importing import FORMATS, IMPORT_BATCH_SIZE, import_users, read_rows
+
+
+class Command(BaseCommand):
+    """Creates users with profiles from a CSV or NDJSON file"""
+
+    help = (
+        "Import users from CSV or NDJSON with email, password, first_name, "
+        "last_name and optional bio, country, city"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="File format, detected from the extension by default",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=IMPORT_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Processes hashing passwords, all cores by default",
+        )
+
+    def handle(self, *args, **options):
+        file_format = options["format"] or self._detect_format(options["path"])
+        started = time.perf_counter()
+
+        with open(options["path"], encoding="utf-8-sig", newline="") as file:
+            report = import_users(
+                read_rows(file, file_format),
+                batch_size=options["batch_size"],
+                workers=options["workers"],
+            )
+
+        for line, message in report.errors:
+            self.stderr.write(f"line {line}: {message}")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {report.created} users in {elapsed:.1f}s, "
+                f"{len(report.errors)} rows failed"
+            )
+        )
+
+    @staticmethod
+    def _detect_format(path):
+        extension = os.path.splitext(path)[1].lstrip(".").lower()
+        if extension in ("json", "jsonl"):
+            extension = "ndjson"
+        if extension not in FORMATS:
+            raise CommandError("Can't detect the format, pass --format")
+        return extension
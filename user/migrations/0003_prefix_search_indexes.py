@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-19 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("user", "0002_alter_user_first_name_alter_user_last_name"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["first_name"],
+                name="user_first_name_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["last_name"],
+                name="user_last_name_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+    ]
@@ -53,3 +53,18 @@ class User(AbstractUser):
     REQUIRED_FIELDS = ["first_name", "last_name"]
 
     objects = UserManager()
+
+    class Meta(AbstractUser.Meta):
+        # serve the admin's prefix searches, email has one from unique
+        indexes = [
+            models.Index(
+                fields=["first_name"],
+                name="user_first_name_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+            models.Index(
+                fields=["last_name"],
+                name="user_last_name_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
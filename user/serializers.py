@@ -2,8 +2,11 @@ from django.contrib.auth import get_user_model, authenticate
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
+from social.search import sync_profile_names
+from social_media_api.serializers import SparseFieldsetMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
 
     class Meta:
         model = get_user_model()
@@ -38,6 +41,9 @@ class UserSerializer(serializers.ModelSerializer):
             user.set_password(password)
             user.save()
 
+        if {"first_name", "last_name"} & validated_data.keys():
+            sync_profile_names(user)
+
         return user
 
 
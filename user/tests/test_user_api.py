@@ -1,9 +1,13 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from social.models import Profile
+from social_media_api.throttling import local_buckets
+
 CREATE_USER_URL = reverse("user:create")
 TOKEN_URL = reverse("user:token_obtain_pair")
 ME_URL = reverse("user:manage")
@@ -60,6 +64,59 @@ class PublicUserApiTests(TestCase):
         self.assertFalse(user_exists)
 
 
+@override_settings(
+    REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {"register": "2/min"},
+    }
+)
+class RegisterThrottleTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        local_buckets.clear()
+
+    def register(self, email, **extra):
+        payload = {
+            "email": email,
+            "password": "testpass",
+            "first_name": "test_name",
+            "last_name": "test_last_name",
+        }
+        return self.client.post(CREATE_USER_URL, payload, **extra)
+
+    def test_register_throttled_per_ip(self):
+        """Test that registrations from one address use a token bucket"""
+        for i in range(2):
+            res = self.register(f"user{i}@test.com")
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.register("user2@test.com")
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn(res["Retry-After"], ("29", "30"))
+
+        res = self.register("user3@test.com", REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_forwarded_for_ignored_without_proxy(self):
+        """Test that rotating X-Forwarded-For doesn't get a new bucket"""
+        statuses = [
+            self.register(
+                f"user{i}@test.com", HTTP_X_FORWARDED_FOR=f"10.0.1.{i}"
+            ).status_code
+            for i in range(3)
+        ]
+
+        self.assertEqual(
+            statuses,
+            [
+                status.HTTP_201_CREATED,
+                status.HTTP_201_CREATED,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            ],
+        )
+
+
 class PrivateUserApiTests(TestCase):
     """TEST API requests that require authentication"""
 
@@ -105,3 +162,13 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.email, payload["email"])
         self.assertTrue(self.user.check_password(payload["password"]))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_rename_updates_profile_full_name(self):
+        """Test that renaming the user updates the stored profile name"""
+        profile = Profile.objects.create(user=self.user)
+        self.assertEqual(profile.full_name, "test_name test_last_name")
+
+        self.client.patch(ME_URL, {"last_name": "  Lovelace "})
+
+        profile.refresh_from_db()
+        self.assertEqual(profile.full_name, "test_name Lovelace")
@@ -0,0 +1,143 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from social.models import ChangeLogEntry, Profile
+from user.importing import import_users, read_rows, resolve_location
+
+IMPORT_DIR = tempfile.mkdtemp()
+CSV_CONTENT = """email,password,first_name,last_name,country
+first@test.com,testpass,First,User,Poland
+second@test.com,testpass,Second,User,
+bad-email,testpass,Bad,Email,
+short@test.com,pw,Short,Password,
+first@test.com,testpass,First,Again,
+existing@test.com,testpass,Existing,User,
+"""
+
+
+class UserImportTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(IMPORT_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        get_user_model().objects.create_user(
+            email="existing@test.com", password="testpass"
+        )
+
+    def test_import_csv_in_process_pool(self):
+        """Test that valid rows are created and the others reported"""
+        report = import_users(
+            read_rows(io.StringIO(CSV_CONTENT), "csv"),
+            batch_size=1,
+            workers=2,
+        )
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual([line for line, _ in report.errors], [4, 5, 6, 7])
+
+        user = get_user_model().objects.get(email="first@test.com")
+        self.assertTrue(user.check_password("testpass"))
+        self.assertEqual(user.profile.country.name, "Poland")
+        self.assertTrue(Profile.objects.filter(user__email="second@test.com"))
+        self.assertEqual(
+            set(
+                ChangeLogEntry.objects.filter(
+                    model="profile", action="create"
+                ).values_list("object_id", flat=True)
+            ),
+            set(Profile.objects.values_list("pk", flat=True)),
+        )
+
+    def test_import_ndjson_command(self):
+        rows = [
+            {
+                "email": "ndjson@test.com",
+                "password": "testpass",
+                "first_name": "Nd",
+                "last_name": "Json",
+                "country": "Ukraine",
+                "city": "Kyiv",
+            },
+            {"email": "broken@test.com"},
+        ]
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".ndjson", delete=False
+        ) as file:
+            file.write("\n".join(json.dumps(row) for row in rows))
+            file.write("\nnot json\n")
+        self.addCleanup(os.remove, file.name)
+
+        out, err = io.StringIO(), io.StringIO()
+        call_command(
+            "import_users", file.name, workers=1, stdout=out, stderr=err
+        )
+
+        self.assertIn("Created 1 users", out.getvalue())
+        self.assertIn("line 2: Missing password", err.getvalue())
+        self.assertIn("line 3: Malformed row", err.getvalue())
+        profile = Profile.objects.get(user__email="ndjson@test.com")
+        self.assertEqual(profile.city.name, "Kyiv")
+
+    @override_settings(JOBS_RUN_INLINE=True, USER_IMPORT_DIR=IMPORT_DIR)
+    def test_admin_import(self):
+        """Test that an uploaded file is imported by a job"""
+        admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="testpass"
+        )
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile(
+            "users.csv", CSV_CONTENT.encode(), content_type="text/csv"
+        )
+
+        with self.assertLogs("user.importing") as logs:
+            res = self.client.post(
+                reverse("admin:user_user_import"),
+                {"file": upload, "format": "csv"},
+                follow=True,
+            )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertContains(res, "queued")
+        self.assertIn("created 2 users", "\n".join(logs.output))
+        self.assertIn(
+            "line 4: Enter a valid email address.", "\n".join(logs.output)
+        )
+        self.assertEqual(os.listdir(IMPORT_DIR), [])
+
+    def test_batch_reports_concurrent_signup(self):
+        """Test that an email registered after the batch checked it fails
+        its row only"""
+
+        def resolve_and_sign_up(country, city, cache):
+            if not get_user_model().objects.filter(email="second@test.com"):
+                get_user_model().objects.create_user(
+                    email="second@test.com", password="testpass"
+                )
+            return resolve_location(country, city, cache)
+
+        with mock.patch(
+            "user.importing.resolve_location", resolve_and_sign_up
+        ):
+            report = import_users(
+                read_rows(io.StringIO(CSV_CONTENT), "csv"), workers=1
+            )
+
+        self.assertEqual(report.created, 1)
+        self.assertIn(
+            (3, "User with this email already exists"), report.errors
+        )
+        self.assertTrue(
+            Profile.objects.filter(user__email="first@test.com").exists()
+        )
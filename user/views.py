@@ -8,6 +8,7 @@ from user.serializers import UserSerializer
 class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
     permission_classes = (AllowAny,)
+    throttle_scope = "register"
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):